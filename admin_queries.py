@@ -0,0 +1,33 @@
+# admin_queries.py
+"""Filter daftar admin dan ekspor, dipakai bersama oleh app.py, exports.py dan pemeriksaan index (indexes.py)."""
+from datetime import datetime, timedelta
+
+
+def date_range(field, date_from=None, date_to=None):
+    """Kondisi rentang tanggal (YYYY-MM-DD, inklusif). ValueError jika format salah."""
+    condition = {}
+    if date_from:
+        condition['$gte'] = datetime.strptime(date_from, '%Y-%m-%d')
+    if date_to:
+        condition['$lt'] = datetime.strptime(date_to, '%Y-%m-%d') + timedelta(days=1)
+    return {field: condition} if condition else {}
+
+
+def bookings_query(date_from=None, date_to=None, status=None, origin=None, destination=None):
+    query = date_range('booking_date', date_from, date_to)
+    if status:
+        query['status'] = status
+    if origin:
+        query['flight_details.origin'] = origin.upper()
+    if destination:
+        query['flight_details.destination'] = destination.upper()
+    return query
+
+
+def flights_query(date_from=None, date_to=None, origin=None, destination=None):
+    query = date_range('departure_time', date_from, date_to)
+    if origin:
+        query['origin'] = origin.upper()
+    if destination:
+        query['destination'] = destination.upper()
+    return query
@@ -0,0 +1,145 @@
+# airports.py
+import argparse
+import os
+import threading
+import time
+from pymongo import UpdateOne
+
+
+class AirportCatalog:
+    """Daftar bandara dengan cache TTL di memori dan koleksi `airports` yang dipelihara inkremental.
+
+    Koleksi `airports` menyimpan jumlah penerbangan per kode bandara (asal + tujuan),
+    sehingga halaman tidak perlu menjalankan distinct() atas seluruh koleksi flights.
+    Jika koleksi itu belum pernah dibangun, pembangunannya berjalan di latar belakang (atau lewat
+    `python airports.py`); request tidak pernah menunggu agregasi atas seluruh flights.
+    """
+
+    def __init__(self, flights_collection, airports_collection, ttl=300):
+        self.flights_collection = flights_collection
+        self.airports_collection = airports_collection
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()  # Paling banyak satu rebuild latar belakang per proses
+        self._airports = None
+        self._expires_at = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self):
+        with self._lock:
+            if self._airports is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return list(self._airports)
+            self.misses += 1
+
+        airports = sorted(doc['_id'] for doc in self.airports_collection.find({'flights': {'$gt': 0}}, {'_id': 1}))
+        if not airports and self.flights_collection.estimated_document_count():
+            # Koleksi airports belum pernah dibangun (misalnya data lama): daftar kosong tidak di-cache
+            self.rebuild_in_background()
+            return []
+
+        with self._lock:
+            self._airports = airports
+            self._expires_at = time.monotonic() + self.ttl
+        return list(airports)
+
+    def rebuild(self):
+        """Membangun ulang koleksi airports dari koleksi flights.
+
+        Jumlah ditulis dengan upsert per kode lalu kode yang sudah tidak dipakai dihapus, jadi koleksi
+        tidak pernah kosong sesaat bagi pembaca lain.
+        """
+        counts = {}
+        for field in ('origin', 'destination'):
+            for doc in self.flights_collection.aggregate([{'$group': {'_id': f'${field}', 'flights': {'$sum': 1}}}]):
+                counts[doc['_id']] = counts.get(doc['_id'], 0) + doc['flights']
+        if counts:
+            self.airports_collection.bulk_write([UpdateOne({'_id': code}, {'$set': {'flights': n}}, upsert=True)
+                                                 for code, n in counts.items()], ordered=False)
+        self.airports_collection.delete_many({'_id': {'$nin': list(counts)}})
+        self.invalidate()
+        return sorted(counts)
+
+    def rebuild_in_background(self):
+        """Memulai rebuild di thread latar belakang jika belum ada yang berjalan; tidak pernah menunggu."""
+        if self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_and_release, daemon=True).start()
+
+    def _rebuild_and_release(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    def invalidate(self):
+        with self._lock:
+            self._airports = None
+
+    def _apply(self, deltas):
+        if not self.airports_collection.estimated_document_count():
+            # Belum pernah dibangun: hitung penuh dari flights di latar belakang (perubahan ini ikut terhitung)
+            self.rebuild_in_background()
+            return
+        ops = [UpdateOne({'_id': code}, {'$inc': {'flights': delta}}, upsert=True)
+               for code, delta in deltas.items() if delta]
+        if ops:
+            self.airports_collection.bulk_write(ops, ordered=False)
+
+    def flight_added(self, flight):
+        self._apply(self._deltas(flight, 1))
+        with self._lock:
+            if self._airports is not None:
+                self._airports = sorted(set(self._airports) | {flight['origin'], flight['destination']})
+
+    def flight_removed(self, flight):
+        self._apply(self._deltas(flight, -1))
+        # Bandara bisa hilang dari daftar, jadi muat ulang dari koleksi airports
+        self.invalidate()
+
+    def flight_changed(self, old_flight, new_flight):
+        deltas = self._deltas(old_flight, -1)
+        for code, delta in self._deltas(new_flight, 1).items():
+            deltas[code] = deltas.get(code, 0) + delta
+        self._apply(deltas)
+        self.invalidate()
+
+    def flights_changed(self, changes):
+        """Versi batch untuk impor jadwal: list tuple (lama atau None, baru)."""
+        deltas = {}
+        for old_flight, new_flight in changes:
+            for flight, sign in ((old_flight, -1), (new_flight, 1)):
+                if flight is not None:
+                    for code, delta in self._deltas(flight, sign).items():
+                        deltas[code] = deltas.get(code, 0) + delta
+        self._apply(deltas)
+        self.invalidate()
+
+    @staticmethod
+    def _deltas(flight, sign):
+        deltas = {}
+        for code in (flight['origin'], flight['destination']):
+            deltas[code] = deltas.get(code, 0) + sign
+        return deltas
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0
+            }
+
+
+if __name__ == '__main__':
+    from mongo_session import connect
+
+    parser = argparse.ArgumentParser(description='Bangun ulang koleksi airports dari koleksi flights.')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    airports = AirportCatalog(db['flights'], db['airports']).rebuild()
+    print(f"✔️ {len(airports)} bandara dibangun ulang.")
+    client.close()
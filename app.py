@@ -1,24 +1,210 @@
 # app.py
-from flask import Flask, render_template, request, redirect, url_for, flash
-from pymongo import MongoClient
+from flask import Flask, Response, abort, render_template, request, redirect, url_for, flash, session, stream_template, stream_with_context
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from bson.objectid import ObjectId
 from datetime import datetime, timedelta
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 import os
+import heapq
+import json
+import time
 from functools import wraps
+import reservation
+from booking_coalescer import BookingCoalescer
+import indexes
+from airports import AirportCatalog
+from stats import StatsRecorder
+from user_cache import UserCache, USER_FIELDS
+from passwords import PasswordHasher, PasswordHashTimeout, LoginThrottle
+from metrics import MetricsRegistry, CommandTimer, instrument
+from search_cache import create_search_cache, SEARCH_VERSION
+import schedule_import
+from schedule_import import parse_flight
+import admin_queries
+import exports
+from flight_cancellation import FlightCancellationJobs
+from archive import FlightArchive
+from route_graph import RouteGraph, SORT_KEYS as CONNECTION_SORT_KEYS
+from mongo_session import MongoSession, DEFAULT_DATABASE, client_options_from_env, read_routes_from_env
+from http_cache import CollectionVersion, choose_encoding, make_etag, compress, MIN_COMPRESS_SIZE
+from pagination import keyset_page, keyset_filter, InvalidPageToken
+from flight_search import build_flight_search_query
 
 app = Flask(__name__)
 # Ganti dengan secret key yang kuat dan ambil dari variabel lingkungan saat deployment
 app.secret_key = os.environ.get("FLASK_SECRET_KEY", "a-very-strong-and-unique-secret-key-for-dev-123!")
 
+# --- Konfigurasi Metrik ---
+# SLOW_QUERY_MS > 0 mengaktifkan log perintah MongoDB yang lebih lambat dari batas ini (beserta bentuk filternya)
+request_metrics = MetricsRegistry(slow_query_ms=int(os.environ.get("SLOW_QUERY_MS", "0")), logger=app.logger)
+instrument(app, request_metrics)
+# Token opsional agar Prometheus bisa mengambil /admin/metrics tanpa sesi login admin
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
 # --- Konfigurasi MongoDB ---
 MONGO_URI = os.environ.get("MONGO_URI", "mongodb://localhost:27017/")
-client = MongoClient(MONGO_URI)
-db = client['booking_tiket_db']
+# Client dibuat per proses saat pertama dipakai, jadi aman untuk worker gunicorn --preload. Pool, timeout dan
+# kompresi diatur lewat MONGO_MAX_POOL_SIZE, MONGO_*_TIMEOUT_MS, MONGO_COMPRESSORS (lihat mongo_session.py).
+# Halaman pencarian dan laporan membaca dari secondary (MONGO_READ_MAX_STALENESS); MONGO_SECONDARY_READS=0
+# mematikannya. Respons ber-ETag versi data (API JSON) tetap dari primary.
+# Nama database bisa diganti (misalnya oleh test) agar tidak menyentuh data utama
+MONGO_DB = os.environ.get("MONGO_DB", DEFAULT_DATABASE)
+client = MongoSession(MONGO_URI, MONGO_DB, read_routes=read_routes_from_env(),
+                      event_listeners=[CommandTimer(request_metrics)], **client_options_from_env())
+db = client.database()
 users_collection = db['users']
 flights_collection = db['flights']
 bookings_collection = db['bookings']
+# Sesi login harus langsung melihat pengguna yang baru mendaftar, juga di rute yang membaca dari secondary
+users_primary = client.primary('users')
+# Pengisian cache pencarian selalu dari primary (lihat index())
+flights_primary = client.primary('flights')
+stats_recorder = StatsRecorder(db)
+# Versi data penerbangan (termasuk kursi) untuk ETag API; dibaca ulang dari MongoDB paling sering tiap TTL
+flights_version = CollectionVersion(client.primary('versions'), 'flights', ttl=float(os.environ.get("FLIGHTS_VERSION_TTL", "1")))
+# Lebar bucket waktu (detik) di ETag respons yang bergantung pada waktu sekarang (pencarian tanpa tanggal)
+API_TIME_BUCKET_SECONDS = int(os.environ.get("API_TIME_BUCKET_SECONDS", "60"))
+airport_catalog = AirportCatalog(flights_collection, db['airports'],
+                                 ttl=int(os.environ.get("AIRPORT_CACHE_TTL", "300")))
+
+# Gunakan transaksi multi-dokumen untuk reservasi (butuh replica set)
+RESERVATION_USE_TRANSACTIONS = os.environ.get("RESERVATION_USE_TRANSACTIONS", "0") == "1"
+# BOOKING_COALESCE=1: pemesanan serentak pada satu penerbangan digabung menjadi satu batch tulis (flash sale)
+booking_coalescer = None
+
+def _booking_batch_written(results):
+    # Satu batch coalescer: counter dashboard diakumulasi dan versi data dinaikkan sekali
+    confirmed = [(booking, flight) for status, booking, flight in results if status == reservation.RESERVED]
+    if confirmed:
+        stats_recorder.bookings_changed(confirmed=confirmed)
+        flights_version.bump()
+
+if os.environ.get("BOOKING_COALESCE", "0") == "1":
+    booking_coalescer = BookingCoalescer(
+        flights_collection, bookings_collection,
+        max_wait=float(os.environ.get("BOOKING_COALESCE_MAX_WAIT_MS", "5")) / 1000,
+        max_batch=int(os.environ.get("BOOKING_COALESCE_MAX_BATCH", "100")),
+        client=client, use_transaction=RESERVATION_USE_TRANSACTIONS,
+        on_batch=_booking_batch_written, logger=app.logger
+    )
+
+# Pastikan index tersedia saat aplikasi dijalankan (nonaktifkan dengan MONGO_ENSURE_INDEXES=0)
+if os.environ.get("MONGO_ENSURE_INDEXES", "1") == "1":
+    try:
+        indexes.ensure_indexes(db, logger=app.logger)
+    except Exception as e:
+        app.logger.error(f"Error creating indexes: {e}")
+
+# Database baru (kosong): counter dashboard langsung ditandai terekonsiliasi, tidak perlu menunggu stats.py
+try:
+    stats_recorder.reconcile_if_empty()
+except Exception as e:
+    app.logger.error(f"Error reconciling stats: {e}")
+
+# --- Konfigurasi Paginasi ---
+SEARCH_PAGE_SIZE = int(os.environ.get("SEARCH_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = 100
+ADMIN_PAGE_SIZE = int(os.environ.get("ADMIN_PAGE_SIZE", "50"))
+# Ukuran batch cursor saat halaman admin dirender secara streaming (?stream=1)
+ADMIN_STREAM_BATCH_SIZE = int(os.environ.get("ADMIN_STREAM_BATCH_SIZE", "500"))
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "1000"))
+EXPORT_BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", "2000"))
+# Hanya field yang ditampilkan di index.html
+FLIGHT_LIST_PROJECTION = {'flight_number': 1, 'origin': 1, 'destination': 1, 'departure_time': 1, 'price': 1}
+FLIGHT_API_PROJECTION = dict(FLIGHT_LIST_PROJECTION, arrival_time=1, available_seats=1, status=1)
+
+# --- Cache Hasil Pencarian ---
+# SEARCH_CACHE_BACKEND: 'memory' (per worker), 'sqlite' (dibagi antar worker lewat SEARCH_CACHE_PATH) atau 'none'.
+# Invalidasi sampai ke worker lain lewat versi 'search' di MongoDB (diperiksa saat membaca, paling lama tiap TTL).
+search_cache = create_search_cache(
+    os.environ.get("SEARCH_CACHE_BACKEND", "memory"),
+    ttl=int(os.environ.get("SEARCH_CACHE_TTL", "30")),
+    depth=int(os.environ.get("SEARCH_CACHE_DEPTH", "100")),
+    path=os.environ.get("SEARCH_CACHE_PATH"),
+    version=CollectionVersion(client.primary('versions'), SEARCH_VERSION,
+                              ttl=float(os.environ.get("FLIGHTS_VERSION_TTL", "1")))
+)
+
+def invalidate_search_cache(*flights):
+    if search_cache:
+        search_cache.invalidate_routes([(flight['origin'], flight['destination']) for flight in flights])
+
+# --- Pembatalan Penerbangan ---
+def _flight_cancellation_finished(flight):
+    # Kursi baru dikembalikan di akhir job, jadi versi data dan cache pencarian diperbarui lagi
+    flights_version.bump()
+    if flight is not None:
+        invalidate_search_cache(flight)
+
+cancellation_jobs = FlightCancellationJobs(
+    db, batch_size=int(os.environ.get("CANCEL_BATCH_SIZE", "2000")),
+    stats_recorder=stats_recorder, on_finished=_flight_cancellation_finished
+)
+
+# --- Pencarian Transit ---
+# Graf jadwal di memori tiap worker untuk itinerary 1–2 kali transit (CONNECTING_SEARCH=0 mematikannya)
+schedule_version = CollectionVersion(client.primary('versions'), 'schedule',
+                                     ttl=float(os.environ.get("FLIGHTS_VERSION_TTL", "1")))
+route_graph = None
+if os.environ.get("CONNECTING_SEARCH", "1") == "1":
+    route_graph = RouteGraph(
+        flights_collection, schedule_version,
+        horizon_days=int(os.environ.get("ROUTE_GRAPH_HORIZON_DAYS", "90")),
+        min_connection=timedelta(minutes=int(os.environ.get("CONNECTION_MIN_MINUTES", "45"))),
+        max_connection=timedelta(hours=int(os.environ.get("CONNECTION_MAX_HOURS", "12"))),
+        max_stops=int(os.environ.get("CONNECTION_MAX_STOPS", "2")),
+        budget_ms=int(os.environ.get("CONNECTION_BUDGET_MS", "50")),
+        max_age_seconds=int(os.environ.get("ROUTE_GRAPH_MAX_AGE", "3600"))
+    )
+CONNECTION_LIMIT = int(os.environ.get("CONNECTION_LIMIT", "10"))
+# Rentang keberangkatan transit jika pengguna tidak memilih tanggal
+CONNECTION_WINDOW_HOURS = int(os.environ.get("CONNECTION_WINDOW_HOURS", "24"))
+
+def schedule_changed(*changes):
+    """Perubahan jadwal (lama atau None, baru atau None) diteruskan ke graf rute."""
+    if route_graph:
+        route_graph.flights_changed(changes)
+
+# --- Arsip ---
+# Penerbangan yang tiba lebih dari ARCHIVE_HORIZON_DAYS hari lalu dipindahkan oleh `python archive.py`;
+# aplikasi hanya membaca bucket arsip saat riwayat diminta
+flight_archive = FlightArchive(db, horizon_days=int(os.environ.get("ARCHIVE_HORIZON_DAYS", "90")))
+
+# --- Konfigurasi Cache Pengguna ---
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "60"))
+# Penghapusan/perubahan peran menaikkan versi 'users' (user_cache.invalidate), sehingga semua worker memuat ulang
+# pengguna paling lambat setelah FLIGHTS_VERSION_TTL detik, bukan setelah USER_CACHE_TTL
+user_cache = UserCache(maxsize=int(os.environ.get("USER_CACHE_SIZE", "1024")), ttl=USER_CACHE_TTL,
+                       version=CollectionVersion(client.primary('versions'), 'users',
+                                                 ttl=float(os.environ.get("FLIGHTS_VERSION_TTL", "1"))))
+# Simpan data minimal pengguna di session yang ditandatangani agar load_user tidak perlu ke MongoDB sama sekali.
+# Record di session juga membawa versi 'users', jadi pengguna yang dihapus/diturunkan perannya ikut dimuat ulang.
+USER_SESSION_CACHE = os.environ.get("USER_SESSION_CACHE", "0") == "1"
+USER_PROJECTION = {field: 1 for field in USER_FIELDS}
+
+# --- Konfigurasi Hash Password ---
+password_hasher = PasswordHasher(
+    method=os.environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+    workers=int(os.environ.get("PASSWORD_HASH_WORKERS", "2")),
+    timeout=int(os.environ.get("PASSWORD_HASH_TIMEOUT", "30")),
+    observer=request_metrics.timed('hash')
+)
+PASSWORD_BUSY_MESSAGE = 'Server sedang sibuk, silakan coba lagi sebentar lagi.'
+login_throttle = LoginThrottle(
+    max_attempts=int(os.environ.get("LOGIN_MAX_ATTEMPTS", "5")),
+    window=int(os.environ.get("LOGIN_THROTTLE_WINDOW", "60"))
+)
+
+request_metrics.register_gauge('airport_cache', airport_catalog.stats)
+request_metrics.register_gauge('user_cache', user_cache.stats)
+request_metrics.register_gauge('mongo_client', client.stats)
+if search_cache:
+    request_metrics.register_gauge('search_cache', search_cache.stats)
+if route_graph:
+    request_metrics.register_gauge('route_graph', route_graph.stats)
+if booking_coalescer:
+    request_metrics.register_gauge('booking_coalescer', booking_coalescer.stats)
 
 # --- Konfigurasi Flask-Login ---
 login_manager = LoginManager()
@@ -33,7 +219,7 @@ class User(UserMixin):
         self.id = str(user_data['_id'])
         self.username = user_data['username']
         self.email = user_data['email']
-        self.password_hash = user_data['password']
+        self.password_hash = user_data.get('password')
         self.role = user_data.get('role', 'user')
 
     def is_admin(self):
@@ -42,8 +228,21 @@ class User(UserMixin):
 @login_manager.user_loader
 def load_user(user_id):
     try:
-        user_data = users_collection.find_one({'_id': ObjectId(user_id)})
+        # Versi dibaca sebelum data pengguna: penghapusan di tengah pemuatan membuat record ini langsung usang
+        version = user_cache.current_version()
+        if USER_SESSION_CACHE:
+            record = session.get('_user_record')
+            if (record and record['_id'] == user_id and record['expires_at'] > time.time()
+                    and record.get('version') == version):
+                user_cache.record_session_hit()
+                return User(record)
+        user_data = user_cache.get(
+            user_id, lambda uid: users_primary.find_one({'_id': ObjectId(uid)}, USER_PROJECTION)
+        )
         if user_data:
+            if USER_SESSION_CACHE:
+                session['_user_record'] = dict(user_data, expires_at=time.time() + USER_CACHE_TTL,
+                                               version=version)
             return User(user_data)
     except Exception as e:
         app.logger.error(f"Error loading user: {e}")
@@ -62,19 +261,108 @@ def admin_required(f):
 # --- Fungsi Pembantu & Konteks Global ---
 def get_unique_airports():
     try:
-        origins = flights_collection.distinct('origin')
-        destinations = flights_collection.distinct('destination')
-        all_airports = sorted(list(set(origins + destinations)))
-        return all_airports
+        return airport_catalog.get()
     except Exception as e:
         app.logger.error(f"Error getting unique airports: {e}")
         return []
 
+def get_page_size(default=SEARCH_PAGE_SIZE):
+    try:
+        page_size = int(request.args.get('per_page', default))
+    except ValueError:
+        page_size = default
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+def page_url(**changes):
+    """URL halaman saat ini dengan filter yang sama tetapi token kursor berbeda."""
+    args = request.args.to_dict()
+    args.pop('after', None)
+    args.pop('before', None)
+    args.update({k: v for k, v in changes.items() if v})
+    return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+def export_url(kind, fmt, history=None):
+    """URL ekspor dengan filter yang sedang aktif di halaman daftar admin.
+
+    Dari tampilan arsip ekspor selalu menyertakan riwayat (bucket arsip sesuai rentang tanggal).
+    """
+    args = {key: request.args[key] for key in ('date_from', 'date_to', 'status', 'origin', 'destination')
+            if request.args.get(key)}
+    if history or (history is None and request.args.get('archive')):
+        args['history'] = 1
+    return url_for('export_data', kind=kind, format=fmt, **args)
+
+def admin_collection(kind):
+    """Koleksi aktif, atau bucket arsip jika ?archive=<tahun> dipilih. Mengembalikan (koleksi, tahun)."""
+    year = request.args.get('archive', type=int)
+    if year is None or year not in flight_archive.years():
+        return db[kind], None
+    return (flight_archive.flights(year) if kind == 'flights' else flight_archive.bookings(year)), year
+
+def parse_date_range(field):
+    """Membaca filter date_from/date_to (YYYY-MM-DD) dari query string menjadi kondisi MongoDB."""
+    condition = {}
+    try:
+        if request.args.get('date_from'):
+            condition['$gte'] = datetime.strptime(request.args['date_from'], '%Y-%m-%d')
+        if request.args.get('date_to'):
+            condition['$lt'] = datetime.strptime(request.args['date_to'], '%Y-%m-%d') + timedelta(days=1)
+    except ValueError:
+        flash('Format tanggal tidak valid.', 'error')
+        return {}
+    return {field: condition} if condition else {}
+
+def connection_window(departure_date):
+    """Rentang keberangkatan leg pertama itinerary transit. ValueError jika format tanggal salah.
+
+    Tanpa tanggal hanya CONNECTION_WINDOW_HOURS ke depan (bukan semua penerbangan mendatang seperti hasil
+    langsung): pencarian graf dibatasi waktu, jadi rentangnya ditampilkan di halaman dan API.
+    """
+    if departure_date:
+        start = datetime.strptime(departure_date, '%Y-%m-%d')
+        return start, start + timedelta(days=1)
+    # Dibulatkan ke menit agar isi respons API stabil dalam satu bucket ETag
+    start = datetime.now().replace(second=0, microsecond=0)
+    return start, start + timedelta(hours=CONNECTION_WINDOW_HOURS)
+
+def search_connections(origin, destination, departure_date):
+    """Itinerary transit untuk halaman utama dan API: (daftar, terpotong). ValueError jika format tanggal salah."""
+    if not route_graph or not origin or not destination or origin == destination:
+        return [], False
+    start, end = connection_window(departure_date)
+    sort = request.args.get('sort') if request.args.get('sort') in CONNECTION_SORT_KEYS else 'duration'
+    return route_graph.search(origin, destination, max(start, datetime.now()), end, sort=sort,
+                              limit=CONNECTION_LIMIT, max_stops=request.args.get('max_stops', type=int))
+
+def render_admin_list(template, collection, query, sort_field, direction, items_name,
+                      projection=None, **context):
+    """Merender daftar admin per halaman (keyset) atau seluruhnya secara streaming dengan ?stream=1."""
+    if request.args.get('stream') == '1':
+        final_query, sort = keyset_filter(query, sort_field, direction)
+        items = collection.find(final_query, projection).sort(sort).batch_size(ADMIN_STREAM_BATCH_SIZE)
+        context.update({items_name: items, 'next_url': None, 'prev_url': None})
+        return app.response_class(stream_with_context(stream_template(template, **context)))
+
+    page_args = dict(page_size=get_page_size(ADMIN_PAGE_SIZE), direction=direction,
+                     after=request.args.get('after'), before=request.args.get('before'))
+    try:
+        items, next_token, prev_token = keyset_page(collection, query, sort_field, projection=projection, **page_args)
+    except InvalidPageToken as e:
+        flash(str(e), 'error')
+        return redirect(page_url())
+    context.update({
+        items_name: items,
+        'next_url': page_url(after=next_token) if next_token else None,
+        'prev_url': page_url(before=prev_token) if prev_token else None
+    })
+    return render_template(template, **context)
+
 @app.context_processor
 def inject_global_vars():
     """Menyediakan variabel global ke semua template."""
     return {
-        'current_year': datetime.now().year
+        'current_year': datetime.now().year,
+        'export_url': export_url
     }
 
 # --- Rute Autentikasi ---
@@ -98,15 +386,24 @@ def register():
             return redirect(url_for('register'))
 
         # Jadikan user pertama sebagai admin, sisanya user biasa
-        role = 'admin' if users_collection.count_documents({}) == 0 else 'user'
-
-        users_collection.insert_one({
-            'username': username,
-            'email': email,
-            'password': generate_password_hash(password),
-            'role': role,
-            'created_at': datetime.now()
-        })
+        role = 'admin' if users_collection.find_one({}, {'_id': 1}) is None else 'user'
+
+        try:
+            users_collection.insert_one({
+                'username': username,
+                'email': email,
+                'password': password_hasher.hash(password),
+                'role': role,
+                'created_at': datetime.now()
+            })
+        except DuplicateKeyError:
+            # Index unik menangkap registrasi ganda yang lolos dari pengecekan di atas
+            flash('Username atau email sudah digunakan!', 'error')
+            return redirect(url_for('register'))
+        except PasswordHashTimeout:
+            flash(PASSWORD_BUSY_MESSAGE, 'error')
+            return render_template('register.html'), 503
+        stats_recorder.user_registered()
         flash(f'Registrasi berhasil! Akun Anda terdaftar sebagai {role}. Silakan login.', 'success')
         return redirect(url_for('login'))
     return render_template('register.html')
@@ -118,9 +415,25 @@ def login():
     if request.method == 'POST':
         username = request.form['username'].strip()
         password = request.form['password']
+        if not login_throttle.allow(username):
+            flash('Terlalu banyak percobaan login. Silakan coba lagi nanti.', 'error')
+            return render_template('login.html'), 429
         user_data = users_collection.find_one({'username': username})
-
-        if user_data and check_password_hash(user_data['password'], password):
+        try:
+            verified = bool(user_data) and password_hasher.verify(user_data['password'], password)
+        except PasswordHashTimeout:
+            flash(PASSWORD_BUSY_MESSAGE, 'error')
+            return render_template('login.html'), 503
+
+        if verified:
+            login_throttle.reset(username)
+            if password_hasher.needs_rehash(user_data['password']):
+                # Upgrade hash lama ke algoritma/biaya yang sedang dikonfigurasi; dicoba lagi pada login berikutnya
+                try:
+                    users_collection.update_one({'_id': user_data['_id']},
+                                                {'$set': {'password': password_hasher.hash(password)}})
+                except PasswordHashTimeout:
+                    pass
             user = User(user_data)
             login_user(user)
             flash(f'Selamat datang kembali, {user.username}!', 'success')
@@ -138,39 +451,62 @@ def login():
 @login_required
 def logout():
     logout_user()
+    session.pop('_user_record', None)
     flash('Anda telah berhasil logout.', 'info')
     return redirect(url_for('index'))
 
 # --- Rute Publik & Pengguna ---
 @app.route('/')
+@client.read_route('search')
 def index():
-    query = {}
-    search_performed = False
     origin = request.args.get('origin', '')
     destination = request.args.get('destination', '')
     departure_date = request.args.get('departure_date', '')
+    search_performed = bool(departure_date)
 
-    if origin: query['origin'] = origin
-    if destination: query['destination'] = destination
-    if departure_date:
-        search_performed = True
-        try:
-            start_date = datetime.strptime(departure_date, '%Y-%m-%d')
-            end_date = start_date + timedelta(days=1)
-            query['departure_time'] = {'$gte': start_date, '$lt': end_date}
-        except ValueError:
-            flash('Format tanggal tidak valid.', 'error')
-            departure_date = '' # Reset jika error
-            search_performed = False
-
-    query['available_seats'] = {'$gt': 0}
-    if 'departure_time' not in query:
-        query['departure_time'] = {'$gte': datetime.now()}
+    try:
+        query = build_flight_search_query(origin, destination, departure_date)
+    except ValueError:
+        flash('Format tanggal tidak valid.', 'error')
+        departure_date = '' # Reset jika error
+        search_performed = False
+        query = build_flight_search_query(origin, destination, departure_date)
     
-    flights = list(flights_collection.find(query).sort('departure_time', 1))
+    cached_page = None
+    if search_cache and not request.args.get('after') and not request.args.get('before'):
+        # Halaman pertama pencarian populer dilayani dari cache, kursi tetap dibaca langsung
+        # Cache diisi dari primary: entri dipakai bersama semua worker sampai TTL habis, jadi tidak boleh
+        # berasal dari secondary yang belum melihat perubahan yang baru saja menghapus entri sebelumnya
+        cached_page = search_cache.first_page(flights_primary, query, origin, destination, departure_date,
+                                              get_page_size(), FLIGHT_LIST_PROJECTION)
+    if cached_page is not None:
+        flights, next_token = cached_page
+        prev_token = None
+    else:
+        try:
+            flights, next_token, prev_token = keyset_page(
+                flights_collection, query, 'departure_time', get_page_size(),
+                after=request.args.get('after'), before=request.args.get('before'),
+                projection=FLIGHT_LIST_PROJECTION
+            )
+        except InvalidPageToken as e:
+            flash(str(e), 'error')
+            flights, next_token, prev_token = keyset_page(
+                flights_collection, query, 'departure_time', get_page_size(), projection=FLIGHT_LIST_PROJECTION
+            )
+    connections, connection_window_end = [], None
+    if not request.args.get('after') and not request.args.get('before'):
+        try:
+            connections, _ = search_connections(origin, destination, departure_date)
+            if not departure_date:
+                connection_window_end = connection_window('')[1]
+        except Exception as e:
+            app.logger.error(f"Error searching connections: {e}")
     return render_template('index.html', flights=flights, search_performed=search_performed,
                            origin_filter=origin, destination_filter=destination, departure_date_filter=departure_date,
-                           airports=get_unique_airports())
+                           airports=get_unique_airports(), next_token=next_token, prev_token=prev_token,
+                           connections=connections, connection_sort=request.args.get('sort', 'duration'),
+                           connection_window_end=connection_window_end)
 
 @app.route('/flight/<flight_id>')
 def flight_details(flight_id):
@@ -188,34 +524,34 @@ def flight_details(flight_id):
 @login_required
 def book_flight(flight_id):
     try:
-        flight = flights_collection.find_one({'_id': ObjectId(flight_id)})
-        if not flight:
+        num_passengers = int(request.form.get('num_passengers', 1))
+        if num_passengers < 1:
+            flash('Jumlah penumpang tidak valid.', 'error')
+            return redirect(url_for('flight_details', flight_id=flight_id))
+
+        if booking_coalescer:
+            status, booking, flight = booking_coalescer.submit(
+                flight_id, current_user.id, num_passengers, username=current_user.username
+            )
+        else:
+            status, booking, flight = reservation.reserve_seats(
+                flights_collection, bookings_collection, flight_id, current_user.id, num_passengers,
+                username=current_user.username, client=client, use_transaction=RESERVATION_USE_TRANSACTIONS
+            )
+        if status == reservation.NOT_FOUND:
             flash('Penerbangan tidak ditemukan.', 'error')
             return redirect(url_for('index'))
-            
-        num_passengers = int(request.form.get('num_passengers', 1))
-        
-        if flight['available_seats'] < num_passengers:
+        if status == reservation.FLIGHT_CANCELLED:
+            flash('Maaf, penerbangan ini telah dibatalkan oleh maskapai.', 'error')
+            return redirect(url_for('flight_details', flight_id=flight_id))
+        if status == reservation.INSUFFICIENT_SEATS:
             flash('Maaf, jumlah kursi yang tersedia tidak mencukupi.', 'error')
             return redirect(url_for('flight_details', flight_id=flight_id))
-        
-        total_price = flight['price'] * num_passengers
-        
-        booking = {
-            'user_id': ObjectId(current_user.id),
-            'flight_id': ObjectId(flight_id),
-            'num_passengers': num_passengers,
-            'total_price': total_price,
-            'booking_date': datetime.now(),
-            'status': 'confirmed'
-        }
-        
-        bookings_collection.insert_one(booking)
-        flights_collection.update_one(
-            {'_id': ObjectId(flight_id)},
-            {'$inc': {'available_seats': -num_passengers}}
-        )
-        
+        if not booking_coalescer:
+            # Dengan coalescer, statistik dan versi sudah dicatat sekali per batch (_booking_batch_written)
+            stats_recorder.booking_confirmed(booking, flight)
+            flights_version.bump()
+
         flash('Pemesanan tiket berhasil dikonfirmasi!', 'success')
         return redirect(url_for('my_bookings'))
     except Exception as e:
@@ -225,47 +561,45 @@ def book_flight(flight_id):
 @app.route('/my_bookings')
 @login_required
 def my_bookings():
+    history = request.args.get('history') == '1'
     try:
-        pipeline = [
-            {'$match': {'user_id': ObjectId(current_user.id)}},
-            {'$lookup': {
-                'from': 'flights',
-                'localField': 'flight_id',
-                'foreignField': '_id',
-                'as': 'flight_details'
-            }},
-            {'$unwind': '$flight_details'},
-            {'$sort': {'booking_date': -1}}
-        ]
-        user_bookings = list(bookings_collection.aggregate(pipeline))
-        return render_template('my_bookings.html', bookings=user_bookings)
+        # Snapshot penerbangan sudah tersimpan di setiap booking, jadi cukup satu query berindeks
+        user_id = ObjectId(current_user.id)
+        user_bookings = list(bookings_collection.find({'user_id': user_id}).sort('booking_date', -1))
+        if history:
+            # Bucket arsip hanya dibaca jika pengguna meminta riwayat lama
+            seen = {booking['_id'] for booking in user_bookings}
+            archived = [dict(booking, archived=True) for booking in flight_archive.user_bookings(user_id)
+                        if booking['_id'] not in seen]
+            user_bookings = list(heapq.merge(user_bookings, archived, key=lambda b: b['booking_date'], reverse=True))
+        return render_template('my_bookings.html', bookings=user_bookings, history=history)
     except Exception as e:
         flash(f'Gagal memuat riwayat pemesanan: {e}', 'error')
-        return render_template('my_bookings.html', bookings=[])
+        return render_template('my_bookings.html', bookings=[], history=history)
 
 
 @app.route('/cancel_booking/<booking_id>', methods=['POST'])
 @login_required
 def cancel_booking(booking_id):
     try:
-        booking = bookings_collection.find_one({'_id': ObjectId(booking_id), 'user_id': ObjectId(current_user.id)})
+        status, booking, flight = reservation.release_booking(
+            flights_collection, bookings_collection, booking_id, user_id=current_user.id,
+            client=client, use_transaction=RESERVATION_USE_TRANSACTIONS
+        )
         
-        if not booking:
+        if status == reservation.NOT_FOUND:
             flash('Pemesanan tidak ditemukan.', 'error')
             return redirect(url_for('my_bookings'))
             
-        if booking['status'] == 'cancelled':
+        if status == reservation.ALREADY_CANCELLED:
             flash('Pemesanan ini sudah pernah dibatalkan.', 'info')
             return redirect(url_for('my_bookings'))
-
-        flights_collection.update_one(
-            {'_id': booking['flight_id']},
-            {'$inc': {'available_seats': booking['num_passengers']}}
-        )
-        bookings_collection.update_one(
-            {'_id': ObjectId(booking_id)},
-            {'$set': {'status': 'cancelled'}}
-        )
+        if flight:
+            stats_recorder.booking_cancelled(booking, flight)
+            flights_version.bump()
+            if flight['available_seats'] == booking['num_passengers']:
+                # Penerbangan yang tadinya penuh kini tersedia lagi, jadi harus muncul di hasil pencarian
+                invalidate_search_cache(flight)
         
         flash('Pemesanan berhasil dibatalkan.', 'success')
     except Exception as e:
@@ -273,24 +607,124 @@ def cancel_booking(booking_id):
 
     return redirect(url_for('my_bookings'))
 
+# --- API JSON (Read-only) ---
+def _json_default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} tidak bisa diubah ke JSON')
+
+def cached_json_response(build_payload, version=None, time_dependent=False):
+    """Respons JSON dengan ETag dari versi data (default: versi penerbangan); 304 dijawab sebelum menyentuh query.
+
+    `time_dependent`: isi respons bergantung pada waktu sekarang (keberangkatan >= now), jadi ETag juga memuat
+    bucket waktu agar penerbangan yang sudah berangkat tidak terus dilayani lewat 304.
+    """
+    encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+    if version is None:
+        version = flights_version.get()
+    bucket = int(time.time() // API_TIME_BUCKET_SECONDS) if time_dependent else None
+    etag = make_etag(version, request.path, sorted(request.args.items(multi=True)), encoding, bucket)
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        payload, status = build_payload()
+        body = json.dumps(payload, default=_json_default, separators=(',', ':')).encode()
+        if encoding and len(body) >= MIN_COMPRESS_SIZE:
+            body = compress(body, encoding)
+        else:
+            encoding = None
+        response = Response(body, status=status, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+# API tetap membaca dari primary: respons diberi ETag dari versi 'flights' (dibaca di primary), jadi body dari
+# secondary yang tertinggal akan tersimpan di klien dengan ETag versi baru dan tidak pernah diperbarui
+@app.route('/api/flights')
+def api_flights():
+    def build_payload():
+        try:
+            query = build_flight_search_query(request.args.get('origin', ''), request.args.get('destination', ''),
+                                              request.args.get('departure_date', ''))
+            flights, next_token, prev_token = keyset_page(
+                flights_collection, query, 'departure_time', get_page_size(),
+                after=request.args.get('after'), before=request.args.get('before'),
+                projection=FLIGHT_API_PROJECTION
+            )
+        except InvalidPageToken as e:
+            return {'error': str(e)}, 400
+        except ValueError:
+            return {'error': 'Format tanggal tidak valid.'}, 400
+        return {'flights': flights, 'next': next_token, 'prev': prev_token}, 200
+    # Tanpa tanggal hasilnya "mulai sekarang", jadi ikut berubah seiring waktu
+    return cached_json_response(build_payload, time_dependent=not request.args.get('departure_date'))
+
+@app.route('/api/connections')
+def api_connections():
+    def build_payload():
+        origin, destination = request.args.get('origin', ''), request.args.get('destination', '')
+        if not origin or not destination:
+            return {'error': 'Parameter origin dan destination wajib diisi.'}, 400
+        try:
+            itineraries, truncated = search_connections(origin, destination, request.args.get('departure_date', ''))
+            start, end = connection_window(request.args.get('departure_date', ''))
+        except ValueError:
+            return {'error': 'Format tanggal tidak valid.'}, 400
+        # Rentang keberangkatan ikut dikirim: tanpa tanggal lebih pendek daripada /api/flights
+        return {'itineraries': [item.to_dict() for item in itineraries], 'truncated': truncated,
+                'departure_from': start, 'departure_to': end}, 200
+    # Itinerary berasal dari graf worker ini (versi build-nya sendiri), kursinya dicek ke versi penerbangan
+    version = f"{flights_version.get()}.{route_graph.loaded_version if route_graph else '-'}"
+    return cached_json_response(build_payload, version=version, time_dependent=True)
+
+@app.route('/api/flights/<flight_id>')
+def api_flight_detail(flight_id):
+    def build_payload():
+        if not ObjectId.is_valid(flight_id):
+            return {'error': 'ID Penerbangan tidak valid.'}, 400
+        flight = flights_collection.find_one({'_id': ObjectId(flight_id)}, dict(FLIGHT_API_PROJECTION, total_seats=1))
+        if not flight:
+            return {'error': 'Penerbangan tidak ditemukan.'}, 404
+        if flight.get('status') == 'cancelled':
+            # Kursi dikembalikan saat pembatalan, jadi tanpa status ini penerbangan tampak masih bisa dipesan
+            return {'error': 'Penerbangan dibatalkan oleh maskapai.', 'flight': flight}, 410
+        return flight, 200
+    return cached_json_response(build_payload)
+
 # --- Rute Khusus Admin ---
 @app.route('/admin/dashboard')
 @login_required
 @admin_required
+@client.read_route('reports')
 def admin_dashboard():
-    stats = {
-        'total_users': users_collection.count_documents({}),
-        'total_flights': flights_collection.count_documents({}),
-        'total_bookings': bookings_collection.count_documents({'status': 'confirmed'})
-    }
-    return render_template('admin/admin_dashboard.html', stats=stats)
+    if not stats_recorder.is_reconciled():
+        # Rekonsiliasi penuh terlalu berat untuk request; dijalankan di akhir seeding atau lewat CLI
+        flash('Statistik belum direkonsiliasi; jalankan "python stats.py" agar counter lengkap.', 'info')
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    stats = stats_recorder.summary()
+    stats['airport_cache'] = airport_catalog.stats()
+    stats['user_cache'] = user_cache.stats()
+    # Ringkasan 30 hari ke depan dibaca dari koleksi route_stats, bukan dari koleksi bookings
+    window_end = today + timedelta(days=30)
+    return render_template('admin/admin_dashboard.html', stats=stats,
+                           route_stats=stats_recorder.route_summary(today, window_end),
+                           daily_stats=stats_recorder.daily_summary(today, today + timedelta(days=7)))
 
 @app.route('/admin/users')
 @login_required
 @admin_required
+@client.read_route('reports')
 def manage_users():
-    users = list(users_collection.find().sort('created_at', -1))
-    return render_template('admin/manage_users.html', users=users)
+    query = parse_date_range('created_at')
+    if request.args.get('role'):
+        query['role'] = request.args['role']
+    return render_admin_list('admin/manage_users.html', users_collection, query, 'created_at', -1, 'users',
+                             projection={'password': 0})
 
 @app.route('/admin/users/delete/<user_id>', methods=['POST'])
 @login_required
@@ -300,16 +734,28 @@ def delete_user(user_id):
         flash('Anda tidak dapat menghapus akun Anda sendiri.', 'error')
         return redirect(url_for('manage_users'))
     
-    users_collection.delete_one({'_id': ObjectId(user_id)})
+    if users_collection.delete_one({'_id': ObjectId(user_id)}).deleted_count:
+        user_cache.invalidate(user_id)
+        stats_recorder.user_deleted()
+        # Snapshot username di booking milik pengguna ini ikut dikosongkan
+        bookings_collection.update_many({'user_id': ObjectId(user_id)}, {'$set': {'username': None}})
+        flight_archive.clear_username(ObjectId(user_id))
     flash('Pengguna berhasil dihapus.', 'success')
     return redirect(url_for('manage_users'))
 
 @app.route('/admin/flights')
 @login_required
 @admin_required
+@client.read_route('reports')
 def manage_flights():
-    flights = list(flights_collection.find().sort('departure_time', 1))
-    return render_template('admin/manage_flights.html', flights=flights)
+    query = parse_date_range('departure_time')
+    if request.args.get('origin'):
+        query['origin'] = request.args['origin'].upper()
+    if request.args.get('destination'):
+        query['destination'] = request.args['destination'].upper()
+    collection, archive_year = admin_collection('flights')
+    return render_admin_list('admin/manage_flights.html', collection, query, 'departure_time', 1, 'flights',
+                             archive_year=archive_year, archive_years=flight_archive.years())
 
 @app.route('/admin/flights/add', methods=['GET', 'POST'])
 @login_required
@@ -317,20 +763,18 @@ def manage_flights():
 def add_flight():
     if request.method == 'POST':
         try:
-            total_seats = int(request.form['total_seats'])
-            flight_data = {
-                'flight_number': request.form['flight_number'].upper(),
-                'origin': request.form['origin'].upper(),
-                'destination': request.form['destination'].upper(),
-                'departure_time': datetime.strptime(request.form['departure_time'], '%Y-%m-%dT%H:%M'),
-                'arrival_time': datetime.strptime(request.form['arrival_time'], '%Y-%m-%dT%H:%M'),
-                'price': float(request.form['price']),
-                'total_seats': total_seats,
-                'available_seats': total_seats
-            }
+            flight_data = parse_flight(request.form)
+            flight_data['available_seats'] = flight_data['total_seats']
             flights_collection.insert_one(flight_data)
+            airport_catalog.flight_added(flight_data)
+            stats_recorder.flight_added(flight_data)
+            schedule_changed((None, flight_data))
+            flights_version.bump()
+            invalidate_search_cache(flight_data)
             flash('Penerbangan berhasil ditambahkan!', 'success')
             return redirect(url_for('manage_flights'))
+        except DuplicateKeyError:
+            flash('Penerbangan dengan nomor dan waktu keberangkatan yang sama sudah ada.', 'error')
         except Exception as e:
             flash(f'Gagal menambahkan penerbangan: {e}', 'error')
     return render_template('admin/add_edit_flight.html', airports=get_unique_airports())
@@ -346,26 +790,49 @@ def edit_flight(flight_id):
             return redirect(url_for('manage_flights'))
             
         if request.method == 'POST':
-            seats_occupied = flight['total_seats'] - flight['available_seats']
-            new_total_seats = int(request.form['total_seats'])
-            new_available_seats = new_total_seats - seats_occupied
-
-            if new_available_seats < 0:
-                flash('Total kursi baru tidak boleh kurang dari jumlah yang sudah dipesan.', 'error')
+            try:
+                fields = parse_flight(dict(request.form.items(), flight_number=flight['flight_number']))
+            except ValueError as e:
+                flash(str(e), 'error')
                 return redirect(url_for('edit_flight', flight_id=flight_id))
-
+            # Selisih kursi diterapkan dengan $inc: booking yang masuk di antara baca dan tulis tidak tertimpa.
+            # Filter total_seats memastikan selisih dihitung dari nilai yang sama dengan yang ada di database.
+            delta = fields['total_seats'] - flight['total_seats']
             update_data = {
                 '$set': {
-                    'origin': request.form['origin'].upper(),
-                    'destination': request.form['destination'].upper(),
-                    'departure_time': datetime.strptime(request.form['departure_time'], '%Y-%m-%dT%H:%M'),
-                    'arrival_time': datetime.strptime(request.form['arrival_time'], '%Y-%m-%dT%H:%M'),
-                    'price': float(request.form['price']),
-                    'total_seats': new_total_seats,
-                    'available_seats': new_available_seats
-                }
+                    'origin': fields['origin'],
+                    'destination': fields['destination'],
+                    'departure_time': fields['departure_time'],
+                    'arrival_time': fields['arrival_time'],
+                    'price': fields['price']
+                },
+                '$inc': {'total_seats': delta, 'available_seats': delta}
             }
-            flights_collection.update_one({'_id': ObjectId(flight_id)}, update_data)
+            updated_flight = flights_collection.find_one_and_update(
+                {'_id': flight['_id'], 'total_seats': flight['total_seats'], 'available_seats': {'$gte': -delta}},
+                update_data, return_document=ReturnDocument.AFTER
+            )
+            if updated_flight is None:
+                flash('Total kursi baru tidak boleh kurang dari jumlah yang sudah dipesan '
+                      '(atau data penerbangan baru saja berubah, silakan coba lagi).', 'error')
+                return redirect(url_for('edit_flight', flight_id=flight_id))
+            # Kursi sebelum update dihitung dari hasil update, jadi booking yang masuk sesudah dibaca
+            # (dan sudah dicatat oleh booking_confirmed) tidak terhitung dua kali di statistik
+            flight.update(total_seats=updated_flight['total_seats'] - delta,
+                          available_seats=updated_flight['available_seats'] - delta)
+            update_data['$set'].update(total_seats=updated_flight['total_seats'],
+                                       available_seats=updated_flight['available_seats'])
+            airport_catalog.flight_changed(flight, update_data['$set'])
+            stats_recorder.flight_changed(flight, updated_flight)
+            schedule_changed((flight, updated_flight))
+            flights_version.bump()
+            invalidate_search_cache(flight, update_data['$set'])
+            # Perbarui snapshot di semua booking penerbangan ini (harga tetap harga saat dipesan)
+            bookings_collection.update_many(
+                {'flight_id': ObjectId(flight_id)},
+                {'$set': {f'flight_details.{field}': update_data['$set'][field]
+                          for field in ('origin', 'destination', 'departure_time', 'arrival_time')}}
+            )
             flash('Penerbangan berhasil diperbarui!', 'success')
             return redirect(url_for('manage_flights'))
             
@@ -374,6 +841,80 @@ def edit_flight(flight_id):
         flash(f'Terjadi kesalahan: {e}', 'error')
         return redirect(url_for('manage_flights'))
 
+@app.route('/admin/flights/import', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def import_flights():
+    if request.method == 'GET':
+        return render_template('admin/import_flights.html', report=None)
+
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Pilih file jadwal (.csv atau .jsonl) terlebih dahulu.', 'error')
+        return redirect(url_for('import_flights'))
+
+    routes = set()
+    def apply_changes(changes):
+        airport_catalog.flights_changed(changes)
+        stats_recorder.flights_upserted(changes)
+        schedule_changed(*changes)
+        for old_flight, new_flight in changes:
+            routes.update((flight['origin'], flight['destination']) for flight in (old_flight, new_flight) if flight)
+
+    try:
+        # File dibaca langsung dari stream upload, tidak pernah dimuat utuh ke memori
+        rows = schedule_import.read_rows(schedule_import.open_stream(upload.stream, upload.filename),
+                                         request.form.get('format') or schedule_import.detect_format(upload.filename))
+        report = schedule_import.import_schedule(flights_collection, bookings_collection, rows,
+                                                 batch_size=IMPORT_BATCH_SIZE, on_batch=apply_changes)
+    except (ValueError, OSError, EOFError) as e:
+        flash(f'Gagal membaca file jadwal: {e}', 'error')
+        return redirect(url_for('import_flights'))
+
+    if routes:
+        flights_version.bump()
+        invalidate_search_cache(*[{'origin': origin, 'destination': destination} for origin, destination in routes])
+    if request.args.get('format') == 'json' or request.accept_mimetypes.best == 'application/json':
+        return Response(json.dumps(report.to_dict()), mimetype='application/json')
+    return render_template('admin/import_flights.html', report=report)
+
+@app.route('/admin/flights/cancel/<flight_id>', methods=['POST'])
+@login_required
+@admin_required
+def cancel_flight(flight_id):
+    try:
+        job, created = cancellation_jobs.submit(flight_id, requested_by=current_user.username,
+                                                reason=request.form.get('reason') or None)
+    except Exception as e:
+        flash(f'Gagal membatalkan penerbangan: {e}', 'error')
+        return redirect(url_for('manage_flights'))
+    if created:
+        # Penerbangan langsung hilang dari pencarian; booking dibatalkan di latar belakang
+        flights_version.bump()
+        schedule_changed(({'_id': job['flight_id']}, None))
+        invalidate_search_cache(flights_collection.find_one({'_id': job['flight_id']}, {'origin': 1, 'destination': 1}))
+        flash(f"Pembatalan penerbangan dimulai untuk {job['total']} pemesanan.", 'success')
+    else:
+        flash('Penerbangan ini sudah dibatalkan sebelumnya.', 'info')
+    return redirect(url_for('cancellation_job', job_id=job['_id']))
+
+@app.route('/admin/jobs/<job_id>')
+@login_required
+@admin_required
+def cancellation_job(job_id):
+    # Job yang prosesnya mati (lease habis) dilanjutkan saat progresnya dibuka
+    cancellation_jobs.resume_stale()
+    try:
+        job = cancellation_jobs.get(job_id)
+    except Exception:
+        job = None
+    if not job:
+        abort(404)
+    if request.args.get('format') == 'json':
+        return Response(json.dumps(job, default=_json_default), mimetype='application/json')
+    flight = flights_collection.find_one({'_id': job['flight_id']}, FLIGHT_API_PROJECTION)
+    return render_template('admin/cancellation_job.html', job=job, flight=flight)
+
 @app.route('/admin/flights/delete/<flight_id>', methods=['POST'])
 @login_required
 @admin_required
@@ -382,31 +923,90 @@ def delete_flight(flight_id):
         flash('Tidak bisa menghapus penerbangan yang memiliki pemesanan aktif.', 'error')
         return redirect(url_for('manage_flights'))
     
-    flights_collection.delete_one({'_id': ObjectId(flight_id)})
+    deleted_flight = flights_collection.find_one_and_delete({'_id': ObjectId(flight_id)})
+    if deleted_flight:
+        airport_catalog.flight_removed(deleted_flight)
+        stats_recorder.flight_deleted(deleted_flight)
+        schedule_changed((deleted_flight, None))
+        flights_version.bump()
+        invalidate_search_cache(deleted_flight)
     flash('Penerbangan berhasil dihapus.', 'success')
     return redirect(url_for('manage_flights'))
 
 @app.route('/admin/bookings')
 @login_required
 @admin_required
+@client.read_route('reports')
 def manage_all_bookings():
     try:
-        pipeline = [
-            {'$lookup': {
-                'from': 'flights', 'localField': 'flight_id', 'foreignField': '_id', 'as': 'flight_details'
-            }},
-            {'$unwind': '$flight_details'},
-            {'$lookup': {
-                'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user_details'
-            }},
-            {'$unwind': '$user_details'},
-            {'$sort': {'booking_date': -1}}
-        ]
-        all_bookings = list(bookings_collection.aggregate(pipeline))
-        return render_template('admin/manage_all_bookings.html', bookings=all_bookings)
+        query = parse_date_range('booking_date')
+        if request.args.get('status'):
+            query['status'] = request.args['status']
+        if request.args.get('origin'):
+            query['flight_details.origin'] = request.args['origin'].upper()
+        if request.args.get('destination'):
+            query['flight_details.destination'] = request.args['destination'].upper()
+
+        collection, archive_year = admin_collection('bookings')
+        return render_admin_list('admin/manage_all_bookings.html', collection, query, 'booking_date', -1,
+                                 'bookings', archive_year=archive_year, archive_years=flight_archive.years())
     except Exception as e:
         flash(f'Gagal memuat data pemesanan: {e}', 'error')
         return render_template('admin/manage_all_bookings.html', bookings=[])
 
+@app.route('/admin/export/<kind>')
+@login_required
+@admin_required
+def export_data(kind):
+    fmt = request.args.get('format', 'csv')
+    if kind not in exports.EXPORT_KINDS or fmt not in exports.EXPORT_FORMATS:
+        abort(404)
+    args = request.args
+    try:
+        if kind == 'bookings':
+            query = admin_queries.bookings_query(args.get('date_from'), args.get('date_to'), args.get('status'),
+                                                 args.get('origin'), args.get('destination'))
+        else:
+            query = admin_queries.flights_query(args.get('date_from'), args.get('date_to'),
+                                                args.get('origin'), args.get('destination'))
+    except ValueError:
+        abort(400, 'Format tanggal harus YYYY-MM-DD.')
+
+    # Baris ditulis langsung dari cursor; tidak ada daftar yang dimuat utuh di memori
+    # Cursor baru dibuka saat respons dialirkan (setelah view selesai), jadi rute baca dipasang di database-nya
+    reports_db = client.database('reports')
+    # ?history=1: bucket arsip yang beririsan dengan rentang tanggal ikut diekspor
+    archive = FlightArchive(reports_db) if args.get('history') == '1' else None
+    body = exports.export_chunks(reports_db, kind, fmt, query, EXPORT_BATCH_SIZE, archive=archive)
+    headers = {'Content-Disposition': f'attachment; filename={kind}-{datetime.now():%Y%m%d-%H%M}.{fmt}',
+               'Vary': 'Accept-Encoding'}
+    if 'gzip' in request.accept_encodings:
+        body = exports.gzip_chunks(body)
+        headers['Content-Encoding'] = 'gzip'
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    return Response(stream_with_context(body), mimetype=mimetype, headers=headers)
+
+@app.route('/health')
+def health():
+    """Liveness: proses hidup dan bisa melayani request, tanpa menyentuh MongoDB."""
+    return {'status': 'ok', 'pid': os.getpid()}
+
+@app.route('/health/ready')
+def readiness():
+    """Readiness: primary MongoDB bisa dijangkau dalam batas waktu; 503 agar worker dikeluarkan dari load balancer."""
+    status = client.health(timeout=float(os.environ.get("HEALTH_TIMEOUT", "2")))
+    if route_graph and status['ok']:
+        # Graf transit mulai dibangun di latar belakang begitu worker siap, sebelum pencarian pertama masuk
+        route_graph.warm()
+        status['route_graph_ready'] = route_graph.ready
+    return status, 200 if status['ok'] else 503
+
+@app.route('/admin/metrics')
+def admin_metrics():
+    token_ok = METRICS_TOKEN and request.headers.get('Authorization') == f'Bearer {METRICS_TOKEN}'
+    if not token_ok and not (current_user.is_authenticated and current_user.is_admin()):
+        abort(403)
+    return Response(request_metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
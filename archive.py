@@ -0,0 +1,163 @@
+# archive.py
+"""Arsip penerbangan yang sudah lewat beserta booking-nya ke koleksi per tahun.
+
+Penerbangan dengan `arrival_time` lebih lama dari horizon (default 90 hari) dipindahkan ke
+`flights_archive_<tahun>` dan booking-nya ke `bookings_archive_<tahun>` (tahun keberangkatan),
+sehingga koleksi `flights` dan `bookings` yang dipakai rute sehari-hari tetap kecil. Daftar
+bucket yang sudah ada disimpan di koleksi `archive_buckets`.
+
+Contoh:
+    python archive.py --horizon-days 90
+    python archive.py --dry-run
+"""
+import argparse
+import heapq
+import os
+from datetime import datetime, timedelta
+from pymongo import ReplaceOne
+from pymongo.errors import PyMongoError
+from indexes import INDEXES
+
+FLIGHTS_PREFIX = 'flights_archive_'
+BOOKINGS_PREFIX = 'bookings_archive_'
+
+
+class FlightArchive:
+    """Memindahkan data lama ke bucket arsip dan membacanya kembali bila diminta.
+
+    Pemindahan bersifat idempoten: salinan ditulis dengan upsert per _id dan data di koleksi aktif
+    baru dihapus setelah salinannya tersimpan, jadi proses yang terhenti cukup dijalankan ulang.
+    """
+
+    def __init__(self, db, horizon_days=90, batch_size=500):
+        self.db = db
+        self.flights_collection = db['flights']
+        self.bookings_collection = db['bookings']
+        self.registry = db['archive_buckets']
+        self.horizon = timedelta(days=horizon_days)
+        self.batch_size = batch_size
+
+    # --- Bucket ---
+    def cutoff(self, now=None):
+        return (now or datetime.now()) - self.horizon
+
+    def years(self):
+        """Tahun bucket arsip yang ada, terbaru dulu."""
+        return sorted((doc['_id'] for doc in self.registry.find({}, {'_id': 1})), reverse=True)
+
+    def flights(self, year):
+        return self.db[f'{FLIGHTS_PREFIX}{int(year)}']
+
+    def bookings(self, year):
+        return self.db[f'{BOOKINGS_PREFIX}{int(year)}']
+
+    def _ensure_bucket(self, year):
+        """Membuat index bucket baru dengan spesifikasi yang sama seperti koleksi aktif."""
+        if self.registry.find_one({'_id': year}, {'_id': 1}):
+            return
+        for collection, specs in ((self.flights(year), INDEXES['flights']), (self.bookings(year), INDEXES['bookings'])):
+            for keys, options in specs:
+                try:
+                    collection.create_index(keys, **options)
+                except PyMongoError as e:
+                    print(f"❌ Gagal membuat index {options['name']} pada {collection.name}: {e}")
+        self.registry.update_one({'_id': year}, {'$setOnInsert': {'flights': 0, 'bookings': 0,
+                                                                  'created_at': datetime.now()}}, upsert=True)
+
+    # --- Pemindahan ---
+    def pending(self, now=None):
+        """Jumlah penerbangan yang akan diarsipkan (untuk --dry-run)."""
+        return self.flights_collection.count_documents({'arrival_time': {'$lt': self.cutoff(now)}})
+
+    def archive_batch(self, cutoff):
+        """Memindahkan satu batch penerbangan. Mengembalikan (penerbangan yang dipindah, jumlah booking)."""
+        flights = list(self.flights_collection.find({'arrival_time': {'$lt': cutoff}})
+                       .sort([('arrival_time', 1), ('_id', 1)]).limit(self.batch_size))
+        by_year = {}
+        for flight in flights:
+            by_year.setdefault(flight['departure_time'].year, []).append(flight)
+
+        moved_bookings = 0
+        for year, group in by_year.items():
+            self._ensure_bucket(year)
+            flight_ids = [flight['_id'] for flight in group]
+            new_flights = self.flights(year).bulk_write(
+                [ReplaceOne({'_id': flight['_id']}, flight, upsert=True) for flight in group], ordered=False
+            ).upserted_count
+
+            new_bookings, booking_ids, ops = 0, [], []
+            for booking in self.bookings_collection.find({'flight_id': {'$in': flight_ids}}).batch_size(1000):
+                ops.append(ReplaceOne({'_id': booking['_id']}, booking, upsert=True))
+                booking_ids.append(booking['_id'])
+                if len(ops) >= 1000:
+                    new_bookings += self.bookings(year).bulk_write(ops, ordered=False).upserted_count
+                    ops = []
+            if ops:
+                new_bookings += self.bookings(year).bulk_write(ops, ordered=False).upserted_count
+
+            # Hapus dari koleksi aktif hanya setelah salinan arsip tersimpan; booking dulu, lalu penerbangan
+            for start in range(0, len(booking_ids), 1000):
+                self.bookings_collection.delete_many({'_id': {'$in': booking_ids[start:start + 1000]}})
+            self.flights_collection.delete_many({'_id': {'$in': flight_ids}})
+            self.registry.update_one({'_id': year}, {'$inc': {'flights': new_flights, 'bookings': new_bookings},
+                                                     '$set': {'updated_at': datetime.now()}})
+            moved_bookings += len(booking_ids)
+        return flights, moved_bookings
+
+    def run(self, now=None, on_batch=None):
+        """Mengarsipkan semua penerbangan yang melewati horizon. Mengembalikan (penerbangan, booking).
+
+        on_batch(flights) dipanggil setelah tiap batch, misalnya untuk memperbarui katalog bandara.
+        """
+        cutoff = self.cutoff(now)
+        total_flights = total_bookings = 0
+        while True:
+            flights, bookings = self.archive_batch(cutoff)
+            if not flights:
+                break
+            total_flights += len(flights)
+            total_bookings += bookings
+            if on_batch:
+                on_batch(flights)
+        return total_flights, total_bookings
+
+    # --- Pembacaan ---
+    def user_bookings(self, user_id):
+        """Booking arsip milik pengguna dari semua bucket, terbaru dulu."""
+        cursors = [self.bookings(year).find({'user_id': user_id}).sort('booking_date', -1) for year in self.years()]
+        return heapq.merge(*cursors, key=lambda booking: booking['booking_date'], reverse=True)
+
+    def clear_username(self, user_id):
+        """Mengosongkan snapshot username di booking arsip (saat pengguna dihapus)."""
+        for year in self.years():
+            self.bookings(year).update_many({'user_id': user_id}, {'$set': {'username': None}})
+
+
+if __name__ == '__main__':
+    from airports import AirportCatalog
+    from http_cache import CollectionVersion
+    from indexes import ensure_indexes
+    from mongo_session import connect
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--horizon-days', type=int, default=int(os.environ.get('ARCHIVE_HORIZON_DAYS', 90)))
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--dry-run', action='store_true', help='Hanya hitung penerbangan yang akan diarsipkan')
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    ensure_indexes(db)
+    archive = FlightArchive(db, horizon_days=args.horizon_days, batch_size=args.batch_size)
+    if args.dry_run:
+        print(f"ℹ️  {archive.pending()} penerbangan tiba sebelum {archive.cutoff():%Y-%m-%d %H:%M} dan akan diarsipkan.")
+    else:
+        catalog = AirportCatalog(db['flights'], db['airports'])
+        flights, bookings = archive.run(
+            on_batch=lambda batch: catalog.flights_changed([(flight, None) for flight in batch])
+        )
+        if flights:
+            # ETag API penerbangan ikut berubah
+            CollectionVersion(db['versions'], 'flights').bump()
+        print(f"✔️ {flights} penerbangan dan {bookings} booking dipindahkan ke arsip.")
+    client.close()
@@ -0,0 +1,2 @@
+# benchmarks/__init__.py
+"""Benchmark dan load test aplikasi booking tiket. Jalankan dari root repo, misalnya `python -m benchmarks.routes`."""
@@ -0,0 +1,97 @@
+# benchmarks/booking_coalescer.py
+"""Membandingkan booking terkonfirmasi/detik pada satu penerbangan populer:
+reservasi per request (lama) vs BookingCoalescer (batch per penerbangan).
+
+Contoh:
+    python benchmarks/booking_coalescer.py --threads 64 --requests 5000
+    python benchmarks/booking_coalescer.py --in-memory --requests 1000   # uji cepat, bukan angka produksi
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reservation  # noqa: E402
+from booking_coalescer import BookingCoalescer  # noqa: E402
+
+
+def reset(db, seats):
+    db.bookings.drop()
+    db.flights.drop()
+    departure = datetime.now() + timedelta(days=7)
+    return db.flights.insert_one({
+        'flight_number': 'GA999', 'origin': 'CGK', 'destination': 'DPS',
+        'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+        'price': 1000000.0, 'total_seats': seats, 'available_seats': seats
+    }).inserted_id
+
+
+def run(db, mode, args):
+    flight_id = reset(db, args.seats)
+    user_ids = [ObjectId() for _ in range(args.requests)]
+    if mode == 'coalesced':
+        coalescer = BookingCoalescer(db.flights, db.bookings, max_wait=args.max_wait_ms / 1000,
+                                     max_batch=args.max_batch)
+        book = lambda user_id: coalescer.submit(flight_id, user_id, 1, username='bench')  # noqa: E731
+    else:
+        coalescer = None
+        book = lambda user_id: reservation.reserve_seats(  # noqa: E731
+            db.flights, db.bookings, flight_id, user_id, 1, username='bench')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        statuses = [status for status, _, _ in executor.map(book, user_ids)]
+    elapsed = time.perf_counter() - start
+
+    confirmed = statuses.count(reservation.RESERVED)
+    # Invarian: kursi terjual harus sama persis dengan jumlah booking yang tersimpan
+    remaining = db.flights.find_one({'_id': flight_id})['available_seats']
+    stored = db.bookings.count_documents({'flight_id': flight_id})
+    assert args.seats - remaining == confirmed == stored, (args.seats, remaining, confirmed, stored)
+    if remaining < 0:
+        # Hanya mungkin di --in-memory: mongomock tidak menjamin update atomik antar thread
+        print(f"⚠️  {mode}: overbooking {-remaining} kursi")
+    return {'confirmed': confirmed, 'rejected': len(statuses) - confirmed, 'seconds': elapsed,
+            'per_second': confirmed / elapsed,
+            'avg_batch': coalescer.stats()['avg_batch'] if coalescer else 1.0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_bench')
+    parser.add_argument('--in-memory', action='store_true', help='Pakai mongomock alih-alih MongoDB sungguhan')
+    parser.add_argument('--threads', type=int, default=64, help='Jumlah request serentak')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--seats', type=int, default=None, help='Kursi penerbangan (default: 80%% dari --requests)')
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--max-batch', type=int, default=100)
+    args = parser.parse_args()
+    if args.seats is None:
+        args.seats = args.requests * 4 // 5
+
+    if args.in_memory:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit('Mode --in-memory membutuhkan paket mongomock (pip install mongomock).')
+        db = mongomock.MongoClient()[args.database]
+    else:
+        db = MongoClient(args.mongo_uri, maxPoolSize=args.threads + 10)[args.database]
+
+    print(f"{'mode':<12}{'terkonfirmasi':>14}{'ditolak':>10}{'detik':>9}{'booking/detik':>15}{'batch rata2':>13}")
+    for mode in ('per-request', 'coalesced'):
+        result = run(db, mode, args)
+        print(f"{mode:<12}{result['confirmed']:>14}{result['rejected']:>10}{result['seconds']:>9.2f}"
+              f"{result['per_second']:>15.1f}{result['avg_batch']:>13.1f}")
+    db.flights.drop()
+    db.bookings.drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# benchmarks/booking_views.py
+"""Membandingkan latensi tampilan pemesanan: $lookup (lama) vs snapshot terdenormalisasi (baru).
+
+Contoh: python benchmarks/booking_views.py --bookings 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from indexes import ensure_indexes  # noqa: E402
+from reservation import flight_snapshot  # noqa: E402
+
+
+def seed(db, num_users, num_flights, num_bookings, batch_size=10000):
+    for name in ('users', 'flights', 'bookings'):
+        db[name].drop()
+    ensure_indexes(db)
+    now = datetime.now()
+    users = [{'username': f'user{i}', 'email': f'user{i}@bench.local', 'password': '-', 'role': 'user',
+              'created_at': now} for i in range(num_users)]
+    user_ids = db.users.insert_many(users).inserted_ids
+    airports = ['CGK', 'DPS', 'SUB', 'UPG', 'KNO', 'BPN', 'JOG', 'PLM', 'BTH', 'MDC']
+    flights = []
+    for i in range(num_flights):
+        origin, destination = random.sample(airports, 2)
+        departure = now + timedelta(hours=random.randint(-720, 2160))
+        flights.append({'flight_number': f'GA{i}', 'origin': origin, 'destination': destination,
+                        'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+                        'price': 1000000.0, 'total_seats': 180, 'available_seats': 180})
+    flight_ids = db.flights.insert_many(flights).inserted_ids
+    for flight, flight_id in zip(flights, flight_ids):
+        flight['_id'] = flight_id
+
+    batch = []
+    for i in range(num_bookings):
+        flight = random.choice(flights)
+        user_index = random.randrange(num_users)
+        batch.append({'user_id': user_ids[user_index], 'username': f'user{user_index}',
+                      'flight_id': flight['_id'], 'flight_details': flight_snapshot(flight),
+                      'num_passengers': 1, 'total_price': flight['price'],
+                      'booking_date': now - timedelta(minutes=i), 'status': 'confirmed'})
+        if len(batch) >= batch_size:
+            db.bookings.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.bookings.insert_many(batch, ordered=False)
+    return user_ids
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_bench')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--flights', type=int, default=5000)
+    parser.add_argument('--bookings', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--skip-seed', action='store_true')
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_uri)[args.database]
+    if args.skip_seed:
+        user_ids = [doc['_id'] for doc in db.users.find({}, {'_id': 1}).limit(args.users)]
+    else:
+        print(f"Seeding {args.bookings} booking...")
+        user_ids = seed(db, args.users, args.flights, args.bookings)
+
+    def my_bookings_lookup():
+        list(db.bookings.aggregate([
+            {'$match': {'user_id': random.choice(user_ids)}},
+            {'$lookup': {'from': 'flights', 'localField': 'flight_id', 'foreignField': '_id', 'as': 'flight_details'}},
+            {'$unwind': '$flight_details'},
+            {'$sort': {'booking_date': -1}}
+        ]))
+
+    def my_bookings_snapshot():
+        list(db.bookings.find({'user_id': random.choice(user_ids)}).sort('booking_date', -1))
+
+    def all_bookings_lookup():
+        list(db.bookings.aggregate([
+            {'$sort': {'booking_date': -1, '_id': -1}},
+            {'$limit': args.page_size + 1},
+            {'$lookup': {'from': 'flights', 'localField': 'flight_id', 'foreignField': '_id', 'as': 'flight_details'}},
+            {'$unwind': '$flight_details'},
+            {'$lookup': {'from': 'users', 'localField': 'user_id', 'foreignField': '_id', 'as': 'user_details'}},
+            {'$unwind': '$user_details'}
+        ]))
+
+    def all_bookings_snapshot():
+        list(db.bookings.find().sort([('booking_date', -1), ('_id', -1)]).limit(args.page_size + 1))
+
+    print(f"{'tampilan':<28}{'p50 (ms)':>12}{'p95 (ms)':>12}")
+    for name, fn in [('my_bookings $lookup', my_bookings_lookup), ('my_bookings snapshot', my_bookings_snapshot),
+                     ('admin bookings $lookup', all_bookings_lookup),
+                     ('admin bookings snapshot', all_bookings_snapshot)]:
+        p50, p95 = timed(fn, args.repeat)
+        print(f"{name:<28}{p50:>12.2f}{p95:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/exports.py
+"""Mengukur throughput dan puncak memori ekspor booking untuk beberapa ukuran data.
+
+Puncak memori (tracemalloc) seharusnya hampir sama untuk semua ukuran karena ekspor
+ditulis langsung dari cursor per batch.
+
+Contoh: python benchmarks/exports.py --bookings 100000,1000000 --format csv
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import exports  # noqa: E402
+import seed_large  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_bench')
+    parser.add_argument('--bookings', default='100000,1000000', help='Daftar jumlah booking, dipisah koma')
+    parser.add_argument('--format', choices=exports.EXPORT_FORMATS, default='csv')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--gzip', action='store_true')
+    args = parser.parse_args()
+
+    db = MongoClient(args.mongo_uri)[args.database]
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    print(f"{'booking':>10}{'detik':>9}{'baris/detik':>13}{'MB keluar':>11}{'puncak memori MB':>18}")
+    for count in [int(value) for value in args.bookings.split(',')]:
+        seed_large.seed_in_process(db, {
+            'users': 1000, 'flights': max(count // 100, 10), 'bookings': count, 'seed': 42,
+            'start_date': today - timedelta(days=30), 'end_date': today + timedelta(days=90), 'batch_size': 5000
+        })
+        rows = db.bookings.estimated_document_count()
+        chunks = exports.export_chunks(db, 'bookings', args.format, {}, args.batch_size)
+        if args.gzip:
+            chunks = exports.gzip_chunks(chunks)
+        tracemalloc.start()
+        start = time.perf_counter()
+        size = sum(len(chunk) for chunk in chunks)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{rows:>10}{elapsed:>9.1f}{rows / elapsed:>13,.0f}{size / 1e6:>11.1f}{peak / 1e6:>18.1f}")
+    for name in ('users', 'flights', 'bookings'):
+        db[name].drop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/flight_cancellation.py
+"""Membandingkan pembatalan semua booking satu penerbangan: release_booking per booking (lama)
+vs job FlightCancellationJobs (update_many per batch + satu rekonsiliasi kursi).
+
+Contoh:
+    python benchmarks/flight_cancellation.py --bookings 10000
+    python benchmarks/flight_cancellation.py --in-memory --bookings 2000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import reservation  # noqa: E402
+from flight_cancellation import FlightCancellationJobs  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+
+def seed(db, num_bookings):
+    for name in ('flights', 'bookings', 'jobs'):
+        db[name].drop()
+    ensure_indexes(db)
+    departure = datetime.now() + timedelta(days=7)
+    flight = {'flight_number': 'GA999', 'origin': 'CGK', 'destination': 'DPS',
+              'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+              'price': 1000000.0, 'total_seats': num_bookings, 'available_seats': 0}
+    flight['_id'] = db.flights.insert_one(flight).inserted_id
+    bookings = [{'user_id': ObjectId(), 'username': 'bench', 'flight_id': flight['_id'],
+                 'flight_details': reservation.flight_snapshot(flight), 'num_passengers': 1,
+                 'total_price': flight['price'], 'booking_date': datetime.now(), 'status': 'confirmed'}
+                for _ in range(num_bookings)]
+    for start in range(0, num_bookings, 10000):
+        db.bookings.insert_many(bookings[start:start + 10000], ordered=False)
+    return flight['_id']
+
+
+def per_booking(db, flight_id):
+    ids = [doc['_id'] for doc in db.bookings.find({'flight_id': flight_id, 'status': 'confirmed'}, {'_id': 1})]
+    for booking_id in ids:
+        reservation.release_booking(db.flights, db.bookings, booking_id)
+
+
+def as_job(db, flight_id, batch_size):
+    jobs = FlightCancellationJobs(db, batch_size=batch_size)
+    job, _ = jobs.start(flight_id)
+    assert jobs.run(job['_id'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_bench')
+    parser.add_argument('--in-memory', action='store_true', help='Pakai mongomock alih-alih MongoDB sungguhan')
+    parser.add_argument('--bookings', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    if args.in_memory:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit('Mode --in-memory membutuhkan paket mongomock (pip install mongomock).')
+        db = mongomock.MongoClient()[args.database]
+    else:
+        db = MongoClient(args.mongo_uri)[args.database]
+
+    print(f"{'mode':<14}{'booking':>9}{'detik':>9}{'booking/detik':>15}")
+    for mode in ('per-booking', 'job'):
+        flight_id = seed(db, args.bookings)
+        start = time.perf_counter()
+        if mode == 'job':
+            as_job(db, flight_id, args.batch_size)
+        else:
+            per_booking(db, flight_id)
+        elapsed = time.perf_counter() - start
+        flight = db.flights.find_one({'_id': flight_id})
+        assert db.bookings.count_documents({'flight_id': flight_id, 'status': 'confirmed'}) == 0
+        assert flight['available_seats'] == flight['total_seats']
+        print(f"{mode:<14}{args.bookings:>9}{elapsed:>9.2f}{args.bookings / elapsed:>15,.0f}")
+    for name in ('flights', 'bookings', 'jobs'):
+        db[name].drop()
+
+
+if __name__ == '__main__':
+    main()
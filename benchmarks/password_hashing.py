@@ -0,0 +1,38 @@
+# benchmarks/password_hashing.py
+"""Mengukur login/detik (verifikasi password) untuk beberapa ukuran process pool.
+
+Contoh: python benchmarks/password_hashing.py --pool-sizes 0,1,2,4 --logins 200
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from passwords import PasswordHasher  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--method', default=os.environ.get('PASSWORD_HASH_METHOD', 'scrypt'))
+    parser.add_argument('--pool-sizes', default='0,1,2,4')
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--threads', type=int, default=16, help='Jumlah thread request simulasi')
+    args = parser.parse_args()
+
+    print(f"{'pool':>6}{'login/detik':>14}")
+    for pool_size in [int(size) for size in args.pool_sizes.split(',')]:
+        hasher = PasswordHasher(method=args.method, workers=pool_size)
+        stored_hash = hasher.hash('rahasia123')
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            results = list(executor.map(lambda _: hasher.verify(stored_hash, 'rahasia123'), range(args.logins)))
+        elapsed = time.perf_counter() - start
+        hasher.shutdown()
+        assert all(results)
+        print(f"{pool_size:>6}{args.logins / elapsed:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/route_graph.py
+"""Mengukur waktu pembangunan graf rute dan latensi pencarian transit terhadap ukuran graf.
+
+Jadwal sintetis dibangkitkan langsung di memori (tanpa MongoDB), jadi yang diukur murni
+struktur graf: bisect per bandara/rute dan penelusuran 1–2 kali transit.
+
+Contoh:
+    python benchmarks/route_graph.py --flights 10000,100000,500000 --airports 60
+    python benchmarks/route_graph.py --flights 200000 --budget-ms 20 --max-stops 1
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from route_graph import RouteGraph, SORT_KEYS  # noqa: E402
+
+
+class StaticVersion:
+    """Pengganti CollectionVersion: graf benchmark tidak pernah dibangun ulang."""
+
+    def get(self):
+        return 0
+
+    def bump(self):
+        return 0
+
+
+def generate_flights(count, airports, days, seed):
+    rng = random.Random(seed)
+    codes = [f'A{index:02d}' for index in range(airports)]
+    # Sebagian kecil bandara menjadi hub dengan lalu lintas jauh lebih padat, seperti jaringan sungguhan
+    weights = [8 if index < max(1, airports // 10) else 1 for index in range(airports)]
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(hours=1)
+    flights = []
+    for index in range(count):
+        origin, destination = rng.choices(codes, weights, k=2)
+        while destination == origin:
+            destination = rng.choices(codes, weights)[0]
+        departure = start + timedelta(minutes=rng.randrange(days * 24 * 60))
+        flights.append({'_id': ObjectId(), 'flight_number': f'XX{index % 10000:04d}', 'origin': origin,
+                        'destination': destination, 'departure_time': departure,
+                        'arrival_time': departure + timedelta(minutes=rng.randint(60, 300)),
+                        'price': float(rng.randrange(300, 3000) * 1000)})
+    flights.sort(key=lambda flight: (flight['departure_time'], flight['_id']))
+    return codes, start, flights
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--flights', default='10000,100000,500000', help='Daftar ukuran graf, dipisah koma')
+    parser.add_argument('--airports', type=int, default=60)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--queries', type=int, default=500)
+    parser.add_argument('--max-stops', type=int, default=2)
+    parser.add_argument('--budget-ms', type=int, default=50)
+    parser.add_argument('--sort', choices=SORT_KEYS, default='duration')
+    parser.add_argument('--keep', type=int, default=30, help='Jumlah kandidat terbaik per pencarian')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'penerbangan':>12}{'bangun s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'hasil':>11}{'terpotong':>11}")
+    for count in [int(value) for value in args.flights.split(',')]:
+        codes, start, flights = generate_flights(count, args.airports, args.days, args.seed)
+        graph = RouteGraph(None, StaticVersion(), horizon_days=args.days + 1, max_stops=args.max_stops,
+                           budget_ms=args.budget_ms)
+        began = time.perf_counter()
+        graph.load(flights, 0)
+        build = time.perf_counter() - began
+
+        rng = random.Random(args.seed)
+        latencies, results, truncated = [], 0, 0
+        for _ in range(args.queries):
+            origin, destination = rng.sample(codes, 2)
+            day = start + timedelta(days=rng.randrange(args.days - 1))
+            began = time.perf_counter()
+            found, cut = graph.itineraries(origin, destination, day, day + timedelta(days=1),
+                                           sort=args.sort, keep=args.keep)
+            latencies.append((time.perf_counter() - began) * 1000)
+            results += len(found)
+            truncated += cut
+        latencies.sort()
+        print(f"{count:>12}{build:>10.2f}{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+              f"{percentile(latencies, 0.99):>9.2f}{results / args.queries:>11.1f}"
+              f"{100.0 * truncated / args.queries:>10.1f}%")
+
+
+if __name__ == '__main__':
+    main()
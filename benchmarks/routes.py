@@ -0,0 +1,293 @@
+# benchmarks/routes.py
+"""Load test HTTP untuk semua rute app.py dengan pengguna simulasi konkuren.
+
+Contoh:
+    python -m benchmarks.routes --in-memory --duration 30 --concurrency 16 --output run.json
+    python -m benchmarks.routes --base-url http://localhost:5000 --mongo-uri mongodb://localhost:27017/ --output run.json
+    python -m benchmarks.routes --compare baseline.json run.json --threshold 0.10
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta
+
+FLIGHT_LINK = re.compile(r'/flight/([0-9a-f]{24})')
+CANCEL_LINK = re.compile(r'/cancel_booking/([0-9a-f]{24})')
+NEXT_LINK = re.compile(r'href="(/\?[^"]*after=[^"]*)"')
+
+
+# --- Transport ---
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpTransport:
+    """Klien HTTP sungguhan (urllib) dengan cookie per pengguna simulasi; redirect tidak diikuti."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect()
+        )
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+
+
+class TestClientTransport:
+    """Menjalankan request langsung ke aplikasi Flask di proses ini."""
+
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        return response.status_code, response.get_data(as_text=True)
+
+
+# --- Pengguna Simulasi ---
+class VirtualUser(threading.Thread):
+    def __init__(self, transport, username, password, deadline, scenario, search_dates, seed):
+        super().__init__(daemon=True)
+        self.transport = transport
+        self.username = username
+        self.password = password
+        self.deadline = deadline
+        self.scenario = scenario
+        self.search_dates = search_dates
+        self.rng = random.Random(seed)
+        self.samples = {}
+        self.errors = {}
+        self.flight_ids = []
+
+    def call(self, route, method, path, data=None, expected=(200, 302)):
+        start = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, data)
+        except Exception:
+            status, body = None, ''
+        self.samples.setdefault(route, []).append((time.perf_counter() - start) * 1000)
+        if status not in expected:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return body
+
+    def run(self):
+        self.call('login', 'POST', '/login', {'username': self.username, 'password': self.password})
+        while time.time() < self.deadline:
+            getattr(self, self.scenario)()
+
+    def customer(self):
+        action = self.rng.choices(
+            ['search', 'search_filtered', 'search_page2', 'details', 'book', 'my_bookings', 'cancel'],
+            weights=[25, 20, 5, 20, 10, 15, 5]
+        )[0]
+        if action == 'search' or not self.flight_ids:
+            self.flight_ids = FLIGHT_LINK.findall(self.call('index', 'GET', '/')) or self.flight_ids
+        elif action == 'search_filtered':
+            origin, destination = self.rng.sample(['CGK', 'DPS', 'SUB', 'UPG', 'KNO', 'BPN', 'JOG'], 2)
+            params = self.rng.choice([
+                {'origin': origin},
+                {'origin': origin, 'destination': destination},
+                {'departure_date': self.rng.choice(self.search_dates)},
+                {'origin': origin, 'destination': destination, 'departure_date': self.rng.choice(self.search_dates)},
+            ])
+            body = self.call('index (filter)', 'GET', '/?' + urllib.parse.urlencode(params))
+            self.flight_ids = FLIGHT_LINK.findall(body) or self.flight_ids
+        elif action == 'search_page2':
+            match = NEXT_LINK.search(self.call('index', 'GET', '/'))
+            if match:
+                self.call('index (halaman 2)', 'GET', match.group(1).replace('&amp;', '&'))
+        elif action == 'details':
+            self.call('flight_details', 'GET', f'/flight/{self.rng.choice(self.flight_ids)}')
+        elif action == 'book':
+            self.call('book_flight', 'POST', f'/book_flight/{self.rng.choice(self.flight_ids)}',
+                      {'num_passengers': self.rng.randint(1, 3)})
+        elif action == 'my_bookings':
+            self.call('my_bookings', 'GET', '/my_bookings')
+        else:
+            booking_ids = CANCEL_LINK.findall(self.call('my_bookings', 'GET', '/my_bookings'))
+            if booking_ids:
+                self.call('cancel_booking', 'POST', f'/cancel_booking/{self.rng.choice(booking_ids)}')
+
+    def admin(self):
+        route, path = self.rng.choice([
+            ('admin_dashboard', '/admin/dashboard'),
+            ('manage_users', '/admin/users'),
+            ('manage_flights', '/admin/flights'),
+            ('manage_flights (filter)', '/admin/flights?origin=CGK'),
+            ('manage_all_bookings', '/admin/bookings'),
+            ('manage_all_bookings (filter)', '/admin/bookings?status=confirmed&origin=CGK'),
+        ])
+        self.call(route, 'GET', path)
+
+
+# --- Laporan ---
+def percentile(sorted_samples, fraction):
+    return sorted_samples[min(len(sorted_samples) - 1, int(len(sorted_samples) * fraction))]
+
+
+def summarize(users, elapsed):
+    merged, errors = {}, {}
+    for user in users:
+        for route, samples in user.samples.items():
+            merged.setdefault(route, []).extend(samples)
+        for route, count in user.errors.items():
+            errors[route] = errors.get(route, 0) + count
+    report = {}
+    for route, samples in sorted(merged.items()):
+        samples.sort()
+        report[route] = {
+            'count': len(samples),
+            'errors': errors.get(route, 0),
+            'throughput': len(samples) / elapsed,
+            'mean': statistics.fmean(samples),
+            'p50': percentile(samples, 0.50),
+            'p95': percentile(samples, 0.95),
+            'p99': percentile(samples, 0.99),
+        }
+    return report
+
+
+def print_report(report):
+    print(f"{'rute':<32}{'req':>8}{'err':>6}{'req/s':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, row in report.items():
+        print(f"{route:<32}{row['count']:>8}{row['errors']:>6}{row['throughput']:>9.1f}"
+              f"{row['p50']:>9.1f}{row['p95']:>9.1f}{row['p99']:>9.1f}")
+
+
+def compare(baseline_path, candidate_path, threshold):
+    """Membandingkan dua hasil run. Mengembalikan daftar rute yang mengalami regresi."""
+    with open(baseline_path) as f:
+        baseline = json.load(f)['routes']
+    with open(candidate_path) as f:
+        candidate = json.load(f)['routes']
+    regressions = []
+    print(f"{'rute':<32}{'p50 Δ':>9}{'p95 Δ':>9}{'p99 Δ':>9}{'req/s Δ':>10}")
+    for route in sorted(set(baseline) & set(candidate)):
+        old, new = baseline[route], candidate[route]
+        deltas = {key: (new[key] - old[key]) / old[key] if old[key] else 0.0
+                  for key in ('p50', 'p95', 'p99', 'throughput')}
+        regressed = deltas['p95'] > threshold or deltas['throughput'] < -threshold
+        if regressed:
+            regressions.append(route)
+        print(f"{route:<32}{deltas['p50']:>+9.0%}{deltas['p95']:>+9.0%}{deltas['p99']:>+9.0%}"
+              f"{deltas['throughput']:>+10.0%}{'  ❌' if regressed else ''}")
+    for route in sorted(set(baseline) ^ set(candidate)):
+        print(f"{route:<32}  hanya ada di salah satu run")
+    return regressions
+
+
+# --- Persiapan Target ---
+def _seed_options(args):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        'users': args.seed_users, 'flights': args.seed_flights, 'bookings': args.seed_bookings,
+        'seed': args.seed, 'start_date': today, 'end_date': today + timedelta(days=args.days),
+        'batch_size': 5000, 'workers': os.cpu_count() or 1, 'mongo_uri': args.mongo_uri,
+        'output_dir': None, 'format': 'jsonl'
+    }
+
+
+def prepare_in_memory(args):
+    try:
+        import mongomock
+    except ImportError:
+        sys.exit('Mode --in-memory membutuhkan paket mongomock (pip install mongomock).')
+    import mongo_session
+    # MongoSession membuat client lewat nama ini (from pymongo import MongoClient), bukan pymongo.MongoClient
+    mongo_session.MongoClient = mongomock.MongoClient
+    os.environ.setdefault('PASSWORD_HASH_WORKERS', '0')
+    import app as app_module
+    import seed_large
+    seed_large.seed_in_process(app_module.db, _seed_options(args))
+    return lambda: TestClientTransport(app_module.app)
+
+
+def prepare_live(args):
+    if not args.skip_seed:
+        import seed_large
+        seed_large.seed_data(_seed_options(args))
+    return lambda: HttpTransport(args.base_url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--in-memory', action='store_true', help='Jalankan app di proses ini dengan MongoDB in-memory')
+    target.add_argument('--base-url', help='URL server yang sedang berjalan, misalnya http://localhost:5000')
+    target.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'))
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--skip-seed', action='store_true', help='Gunakan data yang sudah ada di --mongo-uri')
+    parser.add_argument('--seed-users', type=int, default=1000)
+    parser.add_argument('--seed-flights', type=int, default=2000)
+    parser.add_argument('--seed-bookings', type=int, default=20000)
+    parser.add_argument('--days', type=int, default=30, help='Rentang tanggal keberangkatan data seed')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--concurrency', type=int, default=16, help='Jumlah pengguna simulasi (pelanggan)')
+    parser.add_argument('--admins', type=int, default=1, help='Jumlah admin simulasi')
+    parser.add_argument('--duration', type=float, default=30, help='Durasi load test dalam detik')
+    parser.add_argument('--output', help='Simpan hasil sebagai JSON')
+    parser.add_argument('--threshold', type=float, default=0.10, help='Batas regresi untuk --compare')
+    args = parser.parse_args()
+
+    if args.compare:
+        regressions = compare(args.compare[0], args.compare[1], args.threshold)
+        if regressions:
+            print(f"\n❌ Regresi pada: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ Tidak ada regresi.")
+        return
+    if not args.in_memory and not args.base_url:
+        parser.error('Pilih salah satu: --in-memory, --base-url atau --compare.')
+    if args.seed_users < 2:
+        # Pengguna pertama adalah admin; pelanggan simulasi memakai user1..user(N-1)
+        parser.error('--seed-users minimal 2.')
+
+    make_transport = prepare_in_memory(args) if args.in_memory else prepare_live(args)
+    today = datetime.now()
+    search_dates = [(today + timedelta(days=d)).strftime('%Y-%m-%d') for d in range(args.days)]
+    deadline = time.time() + args.duration
+    users = [VirtualUser(make_transport(), f'user{1 + i % (args.seed_users - 1)}', 'user123', deadline,
+                         'customer', search_dates, args.seed + i) for i in range(args.concurrency)]
+    users += [VirtualUser(make_transport(), 'admin', 'admin123', deadline, 'admin', search_dates, -i)
+              for i in range(args.admins)]
+
+    started = time.perf_counter()
+    for user in users:
+        user.start()
+    for user in users:
+        user.join()
+    elapsed = time.perf_counter() - started
+
+    report = summarize(users, elapsed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created_at': datetime.now().isoformat(),
+                'config': {key: value for key, value in vars(args).items() if key != 'compare'},
+                'elapsed': elapsed,
+                'routes': report
+            }, f, indent=2)
+        print(f"\nHasil disimpan ke {args.output}")
+
+
+if __name__ == '__main__':
+    main()
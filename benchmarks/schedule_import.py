@@ -0,0 +1,92 @@
+# benchmarks/schedule_import.py
+"""Mengukur throughput impor jadwal (baris/detik) untuk file CSV dan JSONL.
+
+Contoh:
+    python benchmarks/schedule_import.py --rows 500000
+    python benchmarks/schedule_import.py --in-memory --rows 20000 --batch-sizes 500,2000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pymongo import MongoClient
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import schedule_import  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+AIRPORTS = ['CGK', 'DPS', 'SUB', 'UPG', 'KNO', 'BPN', 'JOG', 'PLM', 'BTH', 'MDC']
+
+
+def generate_rows(count, seed):
+    rng = random.Random(seed)
+    start = datetime.now().replace(second=0, microsecond=0) + timedelta(days=1)
+    for index in range(count):
+        origin, destination = rng.sample(AIRPORTS, 2)
+        # flight_number + jam unik per baris agar setiap baris menjadi penerbangan baru
+        departure = start + timedelta(minutes=15 * (index // 1000))
+        yield {
+            'flight_number': f'XX{index % 1000:03d}', 'origin': origin, 'destination': destination,
+            'departure_time': departure.strftime('%Y-%m-%dT%H:%M'),
+            'arrival_time': (departure + timedelta(hours=rng.randint(1, 5))).strftime('%Y-%m-%dT%H:%M'),
+            'price': rng.randrange(500, 3000) * 1000, 'total_seats': rng.choice([100, 120, 150, 180])
+        }
+
+
+def write_file(path, fmt, count, seed):
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        if fmt == 'csv':
+            writer = csv.DictWriter(handle, fieldnames=schedule_import.FIELDS)
+            writer.writeheader()
+            writer.writerows(generate_rows(count, seed))
+        else:
+            for row in generate_rows(count, seed):
+                handle.write(json.dumps(row) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_bench')
+    parser.add_argument('--in-memory', action='store_true', help='Pakai mongomock alih-alih MongoDB sungguhan')
+    parser.add_argument('--rows', type=int, default=500000)
+    parser.add_argument('--formats', default='csv,jsonl')
+    parser.add_argument('--batch-sizes', default='1000')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    if args.in_memory:
+        try:
+            import mongomock
+        except ImportError:
+            sys.exit('Mode --in-memory membutuhkan paket mongomock (pip install mongomock).')
+        db = mongomock.MongoClient()[args.database]
+    else:
+        db = MongoClient(args.mongo_uri)[args.database]
+
+    print(f"{'format':<8}{'batch':>7}{'baris':>10}{'baru':>10}{'sudah ada':>12}{'detik':>9}{'baris/detik':>13}")
+    with tempfile.TemporaryDirectory() as directory:
+        for fmt in args.formats.split(','):
+            path = os.path.join(directory, f'jadwal.{fmt}')
+            write_file(path, fmt, args.rows, args.seed)
+            for batch_size in [int(size) for size in args.batch_sizes.split(',')]:
+                db.flights.drop()
+                db.bookings.drop()
+                ensure_indexes(db)
+                # Putaran kedua atas file yang sama mengukur jalur update (semua baris sudah ada)
+                for _ in range(2):
+                    with open(path, 'rb') as raw:
+                        report = schedule_import.import_schedule(
+                            db.flights, db.bookings, schedule_import.read_rows(raw, fmt), batch_size=batch_size)
+                    print(f"{fmt:<8}{batch_size:>7}{report.processed:>10}{report.inserted:>10}"
+                          f"{report.updated + report.unchanged:>12}{report.elapsed:>9.1f}{report.rows_per_second:>13,.0f}")
+    db.flights.drop()
+    db.bookings.drop()
+
+
+if __name__ == '__main__':
+    main()
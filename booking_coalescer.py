@@ -0,0 +1,131 @@
+# booking_coalescer.py
+import os
+import threading
+import time
+from collections import deque
+from bson.objectid import ObjectId
+import reservation
+
+
+class _PendingBooking:
+    __slots__ = ('user_id', 'num_passengers', 'username', 'queued_at', 'done', 'result', 'error')
+
+    def __init__(self, user_id, num_passengers, username):
+        self.user_id = user_id
+        self.num_passengers = num_passengers
+        self.username = username
+        self.queued_at = time.monotonic()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class BookingCoalescer:
+    """Menggabungkan pemesanan serentak pada satu penerbangan menjadi satu batch tulis.
+
+    Setiap penerbangan punya antrean sendiri dengan satu thread penulis. Penulis menunggu paling lama
+    `max_wait` detik sejak permintaan tertua masuk (atau sampai `max_batch` permintaan terkumpul), lalu
+    memproses batch dengan satu $inc bersyarat dan satu insert_many. Batas kursi tetap dijaga oleh
+    MongoDB, sehingga aman dipakai bersamaan oleh beberapa worker.
+
+    `on_batch` (opsional) dipanggil sekali per batch dengan list hasil (status, booking, flight),
+    sebelum request dibangunkan; dipakai untuk statistik dan versi data agar tidak ditulis per booking.
+    """
+
+    def __init__(self, flights_collection, bookings_collection, max_wait=0.005, max_batch=100,
+                 timeout=10, client=None, use_transaction=False, on_batch=None, logger=None):
+        self.flights_collection = flights_collection
+        self.bookings_collection = bookings_collection
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.client = client
+        self.use_transaction = use_transaction
+        self.on_batch = on_batch
+        self.logger = logger
+        self._lock = threading.Lock()
+        self._queues = {}
+        self._pid = os.getpid()
+        self.batches = 0
+        self.requests = 0
+        self.bookings = 0
+        self.timeouts = 0
+
+    def submit(self, flight_id, user_id, num_passengers, username=None):
+        """Sama seperti reservation.reserve_seats: mengembalikan tuple (status, booking, flight)."""
+        key = ObjectId(flight_id)
+        pending = _PendingBooking(user_id, num_passengers, username)
+        with self._lock:
+            if self._pid != os.getpid():
+                # Thread penulis tidak ikut ter-fork; antrean warisan proses induk dibuang
+                self._queues, self._pid = {}, os.getpid()
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = self._queues[key] = deque()
+                threading.Thread(target=self._drain, args=(key, queue), daemon=True).start()
+            queue.append(pending)
+
+        if not pending.done.wait(self.max_wait + self.timeout):
+            with self._lock:
+                if pending in queue:
+                    queue.remove(pending)
+                    self.timeouts += 1
+                    raise TimeoutError('Antrean pemesanan penuh, silakan coba lagi.')
+            # Sudah diambil penulis: tunggu hasil tulis ke database agar status kursi tidak ambigu
+            pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _drain(self, key, queue):
+        while True:
+            with self._lock:
+                if not queue:
+                    if self._queues.get(key) is queue:
+                        del self._queues[key]
+                    return
+                wait = queue[0].queued_at + self.max_wait - time.monotonic()
+                if wait > 0 and len(queue) < self.max_batch:
+                    batch = None
+                else:
+                    batch = [queue.popleft() for _ in range(min(len(queue), self.max_batch))]
+            if batch is None:
+                time.sleep(min(wait, self.max_wait))
+                continue
+            self._process(key, batch)
+
+    def _process(self, key, batch):
+        try:
+            results = reservation.reserve_seats_batch(
+                self.flights_collection, self.bookings_collection, key,
+                [(p.user_id, p.num_passengers, p.username) for p in batch],
+                client=self.client, use_transaction=self.use_transaction
+            )
+        except Exception as e:
+            results, error = None, e
+        if results and self.on_batch:
+            try:
+                self.on_batch(results)
+            except Exception as e:
+                # Booking sudah tersimpan; counter yang tertinggal diperbaiki oleh rekonsiliasi stats.py
+                if self.logger:
+                    self.logger.error(f"Error recording booking batch: {e}")
+        with self._lock:
+            self.batches += 1
+            self.requests += len(batch)
+            if results:
+                self.bookings += sum(1 for status, _, _ in results if status == reservation.RESERVED)
+        for index, pending in enumerate(batch):
+            if results is None:
+                pending.error = error
+            else:
+                pending.result = results[index]
+            pending.done.set()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches, 'bookings': self.bookings, 'timeouts': self.timeouts,
+                'avg_batch': self.requests / self.batches if self.batches else 0.0,
+                'queued': sum(len(queue) for queue in self._queues.values())
+            }
@@ -0,0 +1,195 @@
+# exports.py
+"""Ekspor booking dan penerbangan ke CSV/JSONL secara streaming (untuk tim finance).
+
+Data dibaca dari cursor server-side per batch dan langsung ditulis, sehingga memori tetap
+konstan berapa pun jumlah barisnya.
+
+Contoh:
+    python exports.py bookings --date-from 2024-01-01 --date-to 2024-01-31 --status confirmed -o januari.csv.gz
+    python exports.py flights --format jsonl > flights.jsonl
+    python exports.py bookings --date-from 2023-01-01 --include-history -o sejak-2023.csv
+"""
+import argparse
+import csv
+import heapq
+import io
+import json
+import os
+import sys
+import zlib
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from admin_queries import bookings_query, flights_query
+from mongo_session import connect
+
+EXPORT_KINDS = ('bookings', 'flights')
+EXPORT_FORMATS = ('csv', 'jsonl')
+BOOKING_COLUMNS = ('booking_id', 'booking_date', 'status', 'num_passengers', 'total_price',
+                   'user_id', 'username', 'email',
+                   'flight_id', 'flight_number', 'origin', 'destination', 'departure_time', 'arrival_time')
+FLIGHT_COLUMNS = ('flight_id', 'flight_number', 'origin', 'destination', 'departure_time', 'arrival_time',
+                  'price', 'total_seats', 'available_seats')
+# Hanya field yang diekspor yang dibaca dari MongoDB; snapshot flight_details menggantikan $lookup
+BOOKING_PROJECTION = {'booking_date': 1, 'status': 1, 'num_passengers': 1, 'total_price': 1,
+                      'user_id': 1, 'username': 1, 'flight_id': 1, 'flight_details': 1}
+FLIGHT_PROJECTION = {column: 1 for column in FLIGHT_COLUMNS if column != 'flight_id'}
+CHUNK_SIZE = 64 * 1024
+
+
+# --- Baris ---
+def iter_bookings(bookings_collection, users_collection, query, batch_size=2000):
+    """Baris booking datar. Email pengguna diambil dengan satu query $in per batch cursor."""
+    cursor = bookings_collection.find(query, BOOKING_PROJECTION).sort('booking_date', 1).batch_size(batch_size)
+    batch = []
+    for booking in cursor:
+        batch.append(booking)
+        if len(batch) >= batch_size:
+            yield from _booking_rows(batch, users_collection)
+            batch = []
+    if batch:
+        yield from _booking_rows(batch, users_collection)
+
+
+def _booking_rows(batch, users_collection):
+    user_ids = list({booking['user_id'] for booking in batch if booking.get('user_id')})
+    emails = {user['_id']: user.get('email') for user in
+              users_collection.find({'_id': {'$in': user_ids}}, {'email': 1})}
+    for booking in batch:
+        flight = booking.get('flight_details') or {}
+        yield {
+            'booking_id': booking['_id'], 'booking_date': booking.get('booking_date'),
+            'status': booking.get('status'), 'num_passengers': booking.get('num_passengers'),
+            'total_price': booking.get('total_price'),
+            'user_id': booking.get('user_id'), 'username': booking.get('username'),
+            'email': emails.get(booking.get('user_id')),
+            'flight_id': booking.get('flight_id'), 'flight_number': flight.get('flight_number'),
+            'origin': flight.get('origin'), 'destination': flight.get('destination'),
+            'departure_time': flight.get('departure_time'), 'arrival_time': flight.get('arrival_time')
+        }
+
+
+def iter_flights(flights_collection, query, batch_size=2000):
+    cursor = flights_collection.find(query, FLIGHT_PROJECTION).sort('departure_time', 1).batch_size(batch_size)
+    for flight in cursor:
+        row = {column: flight.get(column) for column in FLIGHT_COLUMNS}
+        row['flight_id'] = flight['_id']
+        yield row
+
+
+# --- Serialisasi ---
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat(sep=' ')
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+def serialize(rows, columns, fmt):
+    """Mengubah baris menjadi potongan teks CSV/JSONL berukuran sekitar CHUNK_SIZE."""
+    buffer = io.StringIO()
+    if fmt == 'csv':
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+    for row in rows:
+        if fmt == 'csv':
+            writer.writerow(['' if row[column] is None else _value(row[column]) for column in columns])
+        else:
+            buffer.write(json.dumps({column: _value(row[column]) for column in columns}, ensure_ascii=False))
+            buffer.write('\n')
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def gzip_chunks(chunks, level=6):
+    """Kompresi gzip inkremental atas potongan teks."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# --- Arsip ---
+def archive_years(years, kind, query):
+    """Tahun bucket arsip (archive.py) yang bisa berisi baris untuk filter tanggal `query`.
+
+    Bucket dinamai menurut tahun keberangkatan. Untuk penerbangan rentang departure_time langsung
+    membatasi tahunnya; untuk booking hanya batas bawah yang berlaku karena penerbangannya berangkat
+    setelah booking_date.
+    """
+    condition = query.get('booking_date' if kind == 'bookings' else 'departure_time', {})
+    first = condition['$gte'].year if '$gte' in condition else None
+    # $lt adalah hari setelah date_to, jadi tahun terakhir dihitung dari satu mikrodetik sebelumnya
+    last = (condition['$lt'] - timedelta(microseconds=1)).year if '$lt' in condition and kind == 'flights' else None
+    return [year for year in years if (first is None or year >= first) and (last is None or year <= last)]
+
+
+def _merge_rows(row_iterators, sort_column):
+    # Setiap koleksi sudah terurut menaik, jadi cukup digabung tanpa memuat semuanya ke memori
+    return heapq.merge(*row_iterators, key=lambda row: row[sort_column])
+
+
+def export_chunks(db, kind, fmt, query, batch_size=2000, archive=None):
+    """Generator potongan teks untuk satu ekspor ('bookings' atau 'flights').
+
+    Dengan `archive` (FlightArchive), bucket arsip yang beririsan dengan rentang tanggal ikut
+    diekspor dan digabung berurutan dengan data aktif.
+    """
+    years = archive_years(archive.years(), kind, query) if archive is not None else []
+    if kind == 'bookings':
+        collections = [db['bookings']] + [archive.bookings(year) for year in years]
+        rows = _merge_rows([iter_bookings(collection, db['users'], query, batch_size)
+                            for collection in collections], 'booking_date')
+        return serialize(rows, BOOKING_COLUMNS, fmt)
+    collections = [db['flights']] + [archive.flights(year) for year in years]
+    rows = _merge_rows([iter_flights(collection, query, batch_size) for collection in collections], 'departure_time')
+    return serialize(rows, FLIGHT_COLUMNS, fmt)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('kind', choices=EXPORT_KINDS)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+    parser.add_argument('--date-from', help='YYYY-MM-DD (booking_date untuk bookings, departure_time untuk flights)')
+    parser.add_argument('--date-to', help='YYYY-MM-DD, inklusif')
+    parser.add_argument('--status', choices=['confirmed', 'cancelled'], help='Hanya untuk bookings')
+    parser.add_argument('--origin')
+    parser.add_argument('--destination')
+    parser.add_argument('--batch-size', type=int, default=2000)
+    parser.add_argument('--include-history', action='store_true',
+                        help='Sertakan bucket arsip (archive.py) yang beririsan dengan rentang tanggal')
+    parser.add_argument('-o', '--output', help='File tujuan (akhiran .gz = dikompres); default stdout')
+    args = parser.parse_args()
+
+    try:
+        if args.kind == 'bookings':
+            query = bookings_query(args.date_from, args.date_to, args.status, args.origin, args.destination)
+        else:
+            query = flights_query(args.date_from, args.date_to, args.origin, args.destination)
+    except ValueError:
+        parser.error('Format tanggal harus YYYY-MM-DD.')
+
+    client, db = connect(args.mongo_uri)
+    archive = None
+    if args.include_history:
+        from archive import FlightArchive
+        archive = FlightArchive(db)
+    chunks = export_chunks(db, args.kind, args.format, query, args.batch_size, archive=archive)
+    if not args.output:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+    elif args.output.endswith('.gz'):
+        with open(args.output, 'wb') as handle:
+            for data in gzip_chunks(chunks):
+                handle.write(data)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as handle:
+            for chunk in chunks:
+                handle.write(chunk)
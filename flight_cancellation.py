@@ -0,0 +1,233 @@
+# flight_cancellation.py
+"""Pembatalan penerbangan oleh maskapai: semua booking terkonfirmasi ikut dibatalkan dan kursinya dikembalikan.
+
+Pembatalan berjalan sebagai job di koleksi `jobs` yang bisa dilanjutkan: jika proses mati di tengah
+jalan, job diambil alih setelah lease-nya habis dan meneruskan booking yang masih confirmed.
+
+Contoh:
+    python flight_cancellation.py cancel 65f0c0ffee0123456789abcd --reason "Cuaca buruk"
+    python flight_cancellation.py resume
+"""
+import argparse
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+JOB_TYPE = 'cancel_flight'
+RUNNING = 'running'
+DONE = 'done'
+
+
+class FlightCancellationJobs:
+    """Membuat, menjalankan dan melanjutkan job pembatalan penerbangan.
+
+    Booking dibatalkan per batch dengan satu update_many; setiap booking ditandai `cancellation_job`
+    sehingga ringkasan akhir (jumlah booking, kursi, refund) dihitung dari data, bukan dari counter
+    progres. `available_seats` dikembalikan sekali di akhir, bukan satu $inc per booking.
+    """
+
+    def __init__(self, db, batch_size=2000, lease_seconds=60, stats_recorder=None, on_finished=None):
+        self.flights_collection = db['flights']
+        self.bookings_collection = db['bookings']
+        self.jobs_collection = db['jobs']
+        self.batch_size = batch_size
+        self.lease = timedelta(seconds=lease_seconds)
+        self.stats_recorder = stats_recorder
+        self.on_finished = on_finished
+
+    # --- Membuat Job ---
+    def start(self, flight_id, requested_by=None, reason=None):
+        """Menandai penerbangan batal (booking baru langsung ditolak) dan membuat job-nya.
+
+        Mengembalikan (job, dibuat_baru). LookupError jika penerbangan tidak ada.
+        """
+        flight_id = ObjectId(flight_id)
+        existing = self.jobs_collection.find_one({'type': JOB_TYPE, 'flight_id': flight_id})
+        if existing:
+            return existing, False
+        now = datetime.now()
+        flight = self.flights_collection.find_one_and_update(
+            {'_id': flight_id},
+            {'$set': {'status': 'cancelled', 'cancelled_at': now, 'cancel_reason': reason}},
+            projection={'_id': 1}
+        )
+        if not flight:
+            raise LookupError('Penerbangan tidak ditemukan.')
+        job = {
+            '_id': ObjectId(), 'type': JOB_TYPE, 'flight_id': flight_id, 'state': RUNNING,
+            'total': self.bookings_collection.count_documents({'flight_id': flight_id, 'status': 'confirmed'}),
+            'processed': 0, 'requested_by': requested_by, 'reason': reason,
+            'created_at': now, 'updated_at': now, 'finished_at': None,
+            'owner': None, 'lease_until': now, 'error': None
+        }
+        try:
+            self.jobs_collection.insert_one(job)
+        except DuplicateKeyError:
+            # Admin lain memulai pembatalan yang sama pada saat bersamaan
+            return self.jobs_collection.find_one({'type': JOB_TYPE, 'flight_id': flight_id}), False
+        return job, True
+
+    def submit(self, flight_id, requested_by=None, reason=None):
+        """start() lalu menjalankan job di thread latar belakang."""
+        job, created = self.start(flight_id, requested_by, reason)
+        if job['state'] == RUNNING:
+            self.run_in_background(job['_id'])
+        return job, created
+
+    def run_in_background(self, job_id):
+        threading.Thread(target=self.run, args=(job_id,), daemon=True).start()
+
+    def resume_stale(self):
+        """Melanjutkan job yang lease-nya habis (prosesnya mati). Mengembalikan jumlah job yang dilanjutkan."""
+        stale = self.jobs_collection.find(
+            {'type': JOB_TYPE, 'state': RUNNING, 'lease_until': {'$lte': datetime.now()}}, {'_id': 1}
+        )
+        count = 0
+        for job in stale:
+            self.run_in_background(job['_id'])
+            count += 1
+        return count
+
+    # --- Menjalankan Job ---
+    def _claim(self, job_id, owner):
+        now = datetime.now()
+        return self.jobs_collection.find_one_and_update(
+            {'_id': job_id, 'state': RUNNING, 'lease_until': {'$lte': now}},
+            {'$set': {'owner': owner, 'lease_until': now + self.lease, 'updated_at': now}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def _progress(self, job_id, owner, processed):
+        now = datetime.now()
+        return self.jobs_collection.update_one(
+            {'_id': job_id, 'owner': owner, 'state': RUNNING},
+            {'$inc': {'processed': processed}, '$set': {'lease_until': now + self.lease, 'updated_at': now}}
+        ).matched_count
+
+    def run(self, job_id):
+        """Menjalankan job sampai selesai. False jika job sedang dipegang proses lain atau sudah selesai."""
+        job_id = ObjectId(job_id)
+        # Identitas unik per eksekusi: dua thread/worker tidak pernah memegang job yang sama
+        owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+        job = self._claim(job_id, owner)
+        if not job:
+            return False
+        try:
+            while True:
+                ids = [doc['_id'] for doc in self.bookings_collection.find(
+                    {'flight_id': job['flight_id'], 'status': 'confirmed'}, {'_id': 1}
+                ).limit(self.batch_size)]
+                if not ids:
+                    break
+                result = self.bookings_collection.update_many(
+                    {'_id': {'$in': ids}, 'status': 'confirmed'},
+                    {'$set': {'status': 'cancelled', 'cancelled_at': datetime.now(), 'cancellation_job': job_id}}
+                )
+                if not self._progress(job_id, owner, result.modified_count):
+                    return False  # Lease diambil alih proses lain
+            return self._finish(job, owner)
+        except Exception as e:
+            # Lease dilepas agar job bisa segera dilanjutkan (resume) setelah penyebabnya diperbaiki
+            self.jobs_collection.update_one(
+                {'_id': job_id, 'owner': owner},
+                {'$set': {'error': str(e), 'lease_until': datetime.now(), 'updated_at': datetime.now()}}
+            )
+            raise
+
+    def _finish(self, job, owner):
+        flight = self.flights_collection.find_one(
+            {'_id': job['flight_id']},
+            {'origin': 1, 'destination': 1, 'departure_time': 1, 'total_seats': 1, 'available_seats': 1}
+        )
+        # Rekonsiliasi kursi sekali untuk seluruh booking yang dibatalkan; penerbangan bisa sudah dihapus
+        # admin selama job berjalan (semua booking-nya sudah batal), maka flight bernilai None
+        if flight is not None:
+            self.flights_collection.update_one({'_id': flight['_id']},
+                                               {'$set': {'available_seats': flight['total_seats']}})
+        totals = next(self.bookings_collection.aggregate([
+            {'$match': {'flight_id': job['flight_id'], 'cancellation_job': job['_id']}},
+            {'$group': {'_id': None, 'bookings': {'$sum': 1}, 'passengers': {'$sum': '$num_passengers'},
+                        'revenue': {'$sum': '$total_price'}}}
+        ]), {'bookings': 0, 'passengers': 0, 'revenue': 0})
+
+        finished = self.jobs_collection.find_one_and_update(
+            {'_id': job['_id'], 'owner': owner, 'state': RUNNING},
+            {'$set': {'state': DONE, 'finished_at': datetime.now(), 'updated_at': datetime.now(),
+                      'cancelled_bookings': totals['bookings'], 'released_seats': totals['passengers'],
+                      'refund_total': totals['revenue'], 'lease_until': None, 'error': None}}
+        )
+        if not finished:
+            return False
+        if self.stats_recorder:
+            self.stats_recorder.flight_cancelled(flight, totals['bookings'], totals['passengers'], totals['revenue'])
+        if self.on_finished:
+            self.on_finished(flight)
+        return True
+
+    # --- Progres ---
+    def get(self, job_id):
+        job = self.jobs_collection.find_one({'_id': ObjectId(job_id), 'type': JOB_TYPE})
+        if job:
+            job['percent'] = 100.0 if job['state'] == DONE else (
+                min(100.0, 100.0 * job['processed'] / job['total']) if job['total'] else 0.0)
+        return job
+
+    def for_flight(self, flight_id):
+        return self.jobs_collection.find_one({'type': JOB_TYPE, 'flight_id': ObjectId(flight_id)})
+
+
+if __name__ == '__main__':
+    from http_cache import CollectionVersion
+    from indexes import ensure_indexes
+    from mongo_session import connect
+    from search_cache import SEARCH_VERSION
+    from stats import StatsRecorder
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--batch-size', type=int, default=2000)
+    commands = parser.add_subparsers(dest='command', required=True)
+    cancel = commands.add_parser('cancel', help='Batalkan penerbangan beserta semua booking-nya')
+    cancel.add_argument('flight_id')
+    cancel.add_argument('--reason')
+    commands.add_parser('resume', help='Lanjutkan job yang terhenti')
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    ensure_indexes(db)
+    # Worker aplikasi menyimpan ETag/respons berdasarkan versi 'flights': dinaikkan saat penerbangan ditandai
+    # batal dan lagi saat kursinya dikembalikan di akhir job
+    flights_version = CollectionVersion(db['versions'], 'flights')
+    # Cache hasil pencarian di worker aplikasi dikosongkan lewat versi 'search'
+    search_version = CollectionVersion(db['versions'], SEARCH_VERSION)
+
+    def finished(flight):
+        flights_version.bump()
+        search_version.bump()
+
+    jobs = FlightCancellationJobs(db, batch_size=args.batch_size, stats_recorder=StatsRecorder(db),
+                                  on_finished=finished)
+    if args.command == 'cancel':
+        job, created = jobs.start(args.flight_id, requested_by='cli', reason=args.reason)
+        if created:
+            flights_version.bump()
+            search_version.bump()
+            # Penerbangan hilang dari graf rute transit di worker aplikasi
+            CollectionVersion(db['versions'], 'schedule').bump()
+        job_ids = [job['_id']] if job['state'] == RUNNING else []
+        if not created:
+            print(f"ℹ️  Penerbangan sudah memiliki job pembatalan {job['_id']} ({job['state']}).")
+    else:
+        job_ids = [job['_id'] for job in db['jobs'].find({'type': JOB_TYPE, 'state': RUNNING}, {'_id': 1})]
+    for job_id in job_ids:
+        if jobs.run(job_id):
+            job = jobs.get(job_id)
+            print(f"✔️ Job {job_id}: {job['cancelled_bookings']} booking dibatalkan, "
+                  f"{job['released_seats']} kursi dikembalikan, refund Rp{job['refund_total']:,.0f}")
+        else:
+            print(f"⚠️  Job {job_id} sedang dijalankan proses lain atau sudah selesai.")
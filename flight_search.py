@@ -0,0 +1,19 @@
+# flight_search.py
+"""Query pencarian penerbangan yang dipakai halaman utama, API, dan pemeriksaan index (indexes.py)."""
+from datetime import datetime, timedelta
+
+
+def build_flight_search_query(origin, destination, departure_date, now=None):
+    """Query pencarian penerbangan untuk halaman utama dan API. ValueError jika format tanggal salah."""
+    query = {}
+    if origin: query['origin'] = origin
+    if destination: query['destination'] = destination
+    if departure_date:
+        start_date = datetime.strptime(departure_date, '%Y-%m-%d')
+        end_date = start_date + timedelta(days=1)
+        query['departure_time'] = {'$gte': start_date, '$lt': end_date}
+    else:
+        query['departure_time'] = {'$gte': now or datetime.now()}
+    query['available_seats'] = {'$gt': 0}
+    query['status'] = {'$ne': 'cancelled'}
+    return query
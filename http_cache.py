@@ -0,0 +1,73 @@
+# http_cache.py
+import gzip
+import hashlib
+import threading
+import time
+from pymongo import ReturnDocument
+
+try:
+    import brotli
+except ImportError:  # brotli opsional; tanpa paket ini hanya gzip yang didukung
+    brotli = None
+
+MIN_COMPRESS_SIZE = 500
+
+
+class CollectionVersion:
+    """Counter versi sebuah koleksi yang disimpan di MongoDB dan di-cache sebentar di memori.
+
+    Setiap perubahan data (di worker mana pun) menaikkan versi; ETag diturunkan dari versi ini
+    sehingga request kondisional bisa dijawab 304 tanpa query ke MongoDB selama cache masih berlaku.
+    """
+
+    def __init__(self, versions_collection, name, ttl=1.0):
+        self.versions_collection = versions_collection
+        self.name = name
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._value = None
+        self._expires_at = 0
+
+    def get(self):
+        with self._lock:
+            if self._value is not None and time.monotonic() < self._expires_at:
+                return self._value
+        doc = self.versions_collection.find_one({'_id': self.name})
+        value = doc['value'] if doc else 0
+        self._store(value)
+        return value
+
+    def bump(self):
+        doc = self.versions_collection.find_one_and_update(
+            {'_id': self.name}, {'$inc': {'value': 1}}, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        self._store(doc['value'])
+        return doc['value']
+
+    def _store(self, value):
+        with self._lock:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+
+
+def choose_encoding(accept_encoding):
+    accepted = {part.split(';')[0].strip().lower() for part in (accept_encoding or '').split(',')}
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+
+def make_etag(version, *parts):
+    """ETag kuat dari versi koleksi dan bagian lain yang menentukan isi respons (argumen, encoding)."""
+    digest = hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()[:16]
+    return f'{version}-{digest}'
+
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
@@ -0,0 +1,167 @@
+# indexes.py
+import argparse
+import os
+import sys
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+from admin_queries import bookings_query, flights_query
+from flight_search import build_flight_search_query
+from mongo_session import connect
+from pagination import encode_token, keyset_filter
+
+# --- Deklarasi Index ---
+# Urutan field mengikuti aturan Equality -> Sort -> Range agar query rute tidak perlu SORT di memori.
+INDEXES = {
+    'flights': [
+        ([('origin', ASCENDING), ('destination', ASCENDING), ('departure_time', ASCENDING), ('_id', ASCENDING),
+          ('available_seats', ASCENDING)],
+         {'name': 'origin_destination_departure'}),
+        # Pencarian dengan asal saja: tanpa index ini index rute di atas butuh SORT di memori
+        ([('origin', ASCENDING), ('departure_time', ASCENDING), ('_id', ASCENDING), ('available_seats', ASCENDING)],
+         {'name': 'origin_departure'}),
+        ([('destination', ASCENDING), ('departure_time', ASCENDING), ('_id', ASCENDING), ('available_seats', ASCENDING)],
+         {'name': 'destination_departure'}),
+        ([('departure_time', ASCENDING), ('_id', ASCENDING), ('available_seats', ASCENDING)],
+         {'name': 'departure_seats'}),
+        # Key upsert impor jadwal (schedule_import.py); unik agar impor bersamaan tidak membuat duplikat
+        ([('flight_number', ASCENDING), ('departure_time', ASCENDING)],
+         {'name': 'flight_number_departure_unique', 'unique': True}),
+        # Pemilihan penerbangan yang diarsipkan (archive.py)
+        ([('arrival_time', ASCENDING), ('_id', ASCENDING)], {'name': 'arrival_time'}),
+    ],
+    'bookings': [
+        ([('user_id', ASCENDING), ('booking_date', DESCENDING)], {'name': 'user_booking_date'}),
+        ([('flight_id', ASCENDING), ('status', ASCENDING)], {'name': 'flight_status'}),
+        ([('booking_date', DESCENDING), ('_id', DESCENDING)], {'name': 'booking_date_id'}),
+        ([('flight_details.origin', ASCENDING), ('flight_details.destination', ASCENDING),
+          ('booking_date', DESCENDING), ('_id', DESCENDING)], {'name': 'route_booking_date_id'}),
+        # Filter asal saja / tujuan saja di daftar admin: index rute di atas butuh SORT di memori untuk keduanya
+        ([('flight_details.origin', ASCENDING), ('booking_date', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'origin_booking_date_id'}),
+        ([('flight_details.destination', ASCENDING), ('booking_date', DESCENDING), ('_id', DESCENDING)],
+         {'name': 'destination_booking_date_id'}),
+        ([('status', ASCENDING), ('booking_date', DESCENDING), ('_id', DESCENDING)], {'name': 'status_booking_date_id'}),
+    ],
+    'jobs': [
+        # Satu job pembatalan per penerbangan (flight_cancellation.py)
+        ([('type', ASCENDING), ('flight_id', ASCENDING)], {'name': 'type_flight_unique', 'unique': True}),
+        ([('type', ASCENDING), ('state', ASCENDING), ('lease_until', ASCENDING)], {'name': 'type_state_lease'}),
+    ],
+    'route_stats': [
+        ([('day', ASCENDING)], {'name': 'day'}),
+    ],
+    'users': [
+        ([('username', ASCENDING)], {'name': 'username_unique', 'unique': True}),
+        ([('email', ASCENDING)], {'name': 'email_unique', 'unique': True}),
+        ([('created_at', DESCENDING), ('_id', DESCENDING)], {'name': 'created_at_id'}),
+    ],
+}
+
+
+# Index lama yang diganti (key sama, opsi berbeda); harus dibuang dulu agar penggantinya bisa dibuat
+RETIRED_INDEXES = {
+    'flights': ['flight_number_departure'],
+}
+
+
+def ensure_indexes(db, logger=None):
+    """Membuat semua index yang dibutuhkan rute. Aman dipanggil berulang kali."""
+    created = []
+    for collection_name, names in RETIRED_INDEXES.items():
+        existing = db[collection_name].index_information()
+        for name in names:
+            if name in existing:
+                db[collection_name].drop_index(name)
+    for collection_name, specs in INDEXES.items():
+        for keys, options in specs:
+            try:
+                created.append((collection_name, db[collection_name].create_index(keys, **options)))
+            except PyMongoError as e:
+                # Misalnya data lama melanggar index unik; index lain tetap dibuat
+                if logger:
+                    logger.error(f"Gagal membuat index {options['name']} pada {collection_name}: {e}")
+                else:
+                    print(f"❌ Gagal membuat index {options['name']} pada {collection_name}: {e}")
+    return created
+
+
+# --- Pemeriksaan Rencana Query ---
+def route_queries(now=None):
+    """Query dari tiap rute di app.py beserta sort-nya, dibangun dengan builder yang sama dengan rute."""
+    now = now or datetime.now()
+    queries = []
+    # Pencarian (halaman utama dan /api/flights): setiap kombinasi filter, halaman pertama dan berikutnya
+    after = encode_token({'departure_time': now, '_id': ObjectId()}, 'departure_time')
+    for label, origin, destination in (('', '', ''), (' (asal+tujuan)', 'CGK', 'DPS'), (' (asal)', 'CGK', ''),
+                                       (' (tujuan)', '', 'DPS')):
+        for date_label, departure_date in (('', ''), (' +tanggal', now.strftime('%Y-%m-%d'))):
+            query = build_flight_search_query(origin, destination, departure_date, now=now)
+            for page_label, token in (('', None), (' +after', after)):
+                final_query, sort = keyset_filter(query, 'departure_time', after=token)
+                queries.append((f'index{label}{date_label}{page_label}', 'flights', final_query, sort))
+    # Daftar admin memakai filter yang sama dengan ekspor
+    date_from = now.strftime('%Y-%m-%d')
+    for label, query in (('', {}), (' (asal)', flights_query(origin='CGK')),
+                         (' (tujuan)', flights_query(destination='DPS')),
+                         (' (asal+tanggal)', flights_query(date_from, origin='CGK'))):
+        queries.append((f'manage_flights{label}', 'flights', *keyset_filter(query, 'departure_time', 1)))
+    for label, query in (('', {}), (' (status)', bookings_query(status='confirmed')),
+                         (' (rute)', bookings_query(origin='CGK', destination='DPS')),
+                         (' (asal)', bookings_query(origin='CGK')),
+                         (' (tujuan)', bookings_query(destination='DPS'))):
+        queries.append((f'manage_all_bookings{label}', 'bookings', *keyset_filter(query, 'booking_date', -1)))
+    queries.append(('manage_users', 'users', *keyset_filter({}, 'created_at', -1)))
+    return queries + [
+        ('my_bookings', 'bookings', {'user_id': ObjectId()}, [('booking_date', -1)]),
+        ('login', 'users', {'username': 'admin'}, None),
+        ('register', 'users', {'$or': [{'username': 'admin'}, {'email': 'admin@tiketku.com'}]}, None),
+        ('delete_flight', 'bookings', {'flight_id': ObjectId(), 'status': 'confirmed'}, None),
+        ('import_flights', 'flights', {'flight_number': 'GA100', 'departure_time': now}, None),
+        ('archive', 'flights', {'arrival_time': {'$lt': now}}, [('arrival_time', 1), ('_id', 1)]),
+    ]
+
+
+def _plan_stages(plan):
+    stages = [plan.get('stage')]
+    for key in ('inputStage', 'queryPlan'):
+        if key in plan:
+            stages.extend(_plan_stages(plan[key]))
+    for child in plan.get('inputStages', []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+def check_query_plans(db):
+    """Menjalankan explain() untuk tiap query rute. Mengembalikan daftar (rute, stage bermasalah)."""
+    problems = []
+    for route, collection_name, query, sort in route_queries():
+        cursor = db[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain()['queryPlanner']['winningPlan']
+        bad = [s for s in _plan_stages(winning_plan) if s in ('COLLSCAN', 'SORT')]
+        if bad:
+            problems.append((route, bad))
+    return problems
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Kelola index MongoDB untuk aplikasi booking tiket.')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--check', action='store_true', help='Periksa rencana query rute dengan explain()')
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    for collection_name, name in ensure_indexes(db):
+        print(f"✔️ {collection_name}.{name}")
+
+    if args.check:
+        problems = check_query_plans(db)
+        for route, stages in problems:
+            print(f"❌ {route}: {', '.join(stages)}")
+        if problems:
+            sys.exit(1)
+        print("✅ Semua query rute menggunakan index.")
+    client.close()
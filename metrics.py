@@ -0,0 +1,208 @@
+# metrics.py
+import logging
+import threading
+import time
+from pymongo import monitoring
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Field perintah MongoDB yang berisi filter, untuk log slow query
+_FILTER_FIELDS = ('filter', 'query', 'q')
+
+_local = threading.local()
+
+
+def filter_shape(value):
+    """Mengganti nilai pada filter dengan nama tipenya, supaya log tidak memuat data pengguna."""
+    if isinstance(value, dict):
+        return {key: filter_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [filter_shape(item) for item in value[:3]]
+    return type(value).__name__
+
+
+def _command_filter(command_name, command):
+    if command_name == 'aggregate':
+        for stage in command.get('pipeline', []):
+            if '$match' in stage:
+                return stage['$match']
+        return None
+    if command_name in ('update', 'delete'):
+        statements = command.get('updates') or command.get('deletes') or []
+        return statements[0].get('q') if statements else None
+    for field in _FILTER_FIELDS:
+        if field in command:
+            return command[field]
+    return None
+
+
+class MetricsRegistry:
+    """Mengumpulkan waktu perintah MongoDB dan waktu request per endpoint Flask."""
+
+    def __init__(self, slow_query_ms=0, logger=None):
+        self.slow_query_ms = slow_query_ms
+        self.logger = logger or logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self.commands = {}   # (endpoint, command) -> [count, seconds, failures]
+        self.requests = {}   # endpoint -> [bucket counts..., count, seconds]
+        self.phases = {}     # (endpoint, phase) -> seconds
+        self.gauges = {}     # nama -> callable yang mengembalikan dict label -> nilai
+
+    # --- Konteks Request ---
+    def start_request(self, endpoint):
+        _local.endpoint = endpoint or 'unknown'
+        _local.started = time.perf_counter()
+        _local.phases = {}
+
+    def add_phase(self, phase, seconds):
+        phases = getattr(_local, 'phases', None)
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def finish_request(self):
+        started = getattr(_local, 'started', None)
+        if started is None:
+            return
+        endpoint, phases = _local.endpoint, _local.phases
+        elapsed = time.perf_counter() - started
+        _local.started = None
+        _local.endpoint = None
+        _local.phases = None
+        with self._lock:
+            row = self.requests.setdefault(endpoint, [0] * (len(REQUEST_BUCKETS) + 2))
+            for index, bound in enumerate(REQUEST_BUCKETS):
+                if elapsed <= bound:
+                    row[index] += 1
+            row[-2] += 1
+            row[-1] += elapsed
+            for phase, seconds in phases.items():
+                self.phases[(endpoint, phase)] = self.phases.get((endpoint, phase), 0.0) + seconds
+            other = elapsed - sum(phases.values())
+            self.phases[(endpoint, 'other')] = self.phases.get((endpoint, 'other'), 0.0) + max(other, 0.0)
+
+    def current_endpoint(self):
+        return getattr(_local, 'endpoint', None) or 'none'
+
+    # --- Perintah MongoDB ---
+    def record_command(self, endpoint, command_name, seconds, failed=False):
+        with self._lock:
+            row = self.commands.setdefault((endpoint, command_name), [0, 0.0, 0])
+            row[0] += 1
+            row[1] += seconds
+            if failed:
+                row[2] += 1
+
+    def timed(self, phase):
+        """Callback untuk mencatat durasi sebuah fase (misalnya 'hash') pada request saat ini."""
+        return lambda seconds: self.add_phase(phase, seconds)
+
+    def register_gauge(self, name, collect):
+        self.gauges[name] = collect
+
+    # --- Format Prometheus ---
+    def render_prometheus(self):
+        lines = []
+        with self._lock:
+            lines += ['# HELP tiket_mongo_commands_total Jumlah perintah MongoDB per endpoint.',
+                      '# TYPE tiket_mongo_commands_total counter']
+            for (endpoint, command), (count, _, _) in sorted(self.commands.items()):
+                lines.append(f'tiket_mongo_commands_total{{endpoint="{endpoint}",command="{command}"}} {count}')
+            lines += ['# HELP tiket_mongo_command_failures_total Jumlah perintah MongoDB yang gagal.',
+                      '# TYPE tiket_mongo_command_failures_total counter']
+            for (endpoint, command), (_, _, failures) in sorted(self.commands.items()):
+                lines.append(f'tiket_mongo_command_failures_total{{endpoint="{endpoint}",command="{command}"}} {failures}')
+            lines += ['# HELP tiket_mongo_command_seconds_total Total waktu perintah MongoDB.',
+                      '# TYPE tiket_mongo_command_seconds_total counter']
+            for (endpoint, command), (_, seconds, _) in sorted(self.commands.items()):
+                lines.append(f'tiket_mongo_command_seconds_total{{endpoint="{endpoint}",command="{command}"}} {seconds:.6f}')
+
+            lines += ['# HELP tiket_request_seconds Durasi request per endpoint.',
+                      '# TYPE tiket_request_seconds histogram']
+            for endpoint, row in sorted(self.requests.items()):
+                for index, bound in enumerate(REQUEST_BUCKETS):
+                    lines.append(f'tiket_request_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {row[index]}')
+                lines.append(f'tiket_request_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {row[-2]}')
+                lines.append(f'tiket_request_seconds_count{{endpoint="{endpoint}"}} {row[-2]}')
+                lines.append(f'tiket_request_seconds_sum{{endpoint="{endpoint}"}} {row[-1]:.6f}')
+
+            lines += ['# HELP tiket_request_phase_seconds_total Waktu request per fase (db, render, hash, other).',
+                      '# TYPE tiket_request_phase_seconds_total counter']
+            for (endpoint, phase), seconds in sorted(self.phases.items()):
+                lines.append(f'tiket_request_phase_seconds_total{{endpoint="{endpoint}",phase="{phase}"}} {seconds:.6f}')
+
+        for name, collect in sorted(self.gauges.items()):
+            lines.append(f'# TYPE tiket_{name} gauge')
+            for label, value in sorted(collect().items()):
+                # Prometheus hanya menerima angka: bool menjadi 0/1, nilai lain (teks, None) dilewati
+                if isinstance(value, bool):
+                    value = int(value)
+                elif not isinstance(value, (int, float)):
+                    continue
+                lines.append(f'tiket_{name}{{key="{label}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class CommandTimer(monitoring.CommandListener):
+    """CommandListener pymongo yang mengatribusikan setiap perintah ke endpoint Flask pemanggilnya."""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def started(self, event):
+        # Callback dijalankan di thread yang mengirim perintah, jadi endpoint thread-local masih benar
+        shape = None
+        if self.registry.slow_query_ms:
+            command_filter = _command_filter(event.command_name, event.command)
+            shape = filter_shape(command_filter) if command_filter is not None else None
+        with self._lock:
+            self._pending[(event.connection_id, event.request_id)] = (
+                self.registry.current_endpoint(), event.database_name,
+                event.command.get(event.command_name), shape
+            )
+
+    def _finish(self, event, failed):
+        with self._lock:
+            pending = self._pending.pop((event.connection_id, event.request_id), None)
+        if pending is None:
+            return
+        endpoint, database, collection, shape = pending
+        seconds = event.duration_micros / 1_000_000
+        self.registry.record_command(endpoint, event.command_name, seconds, failed=failed)
+        self.registry.add_phase('db', seconds)
+        if self.registry.slow_query_ms and seconds * 1000 >= self.registry.slow_query_ms:
+            self.registry.logger.warning(
+                f"Slow query {seconds * 1000:.1f}ms endpoint={endpoint} "
+                f"{event.command_name} {database}.{collection} filter={shape}"
+            )
+
+    def succeeded(self, event):
+        self._finish(event, failed=False)
+
+    def failed(self, event):
+        self._finish(event, failed=True)
+
+
+def instrument(app, registry):
+    """Memasang pengukur waktu request dan waktu render template pada aplikasi Flask."""
+    from flask import request, before_render_template, template_rendered
+
+    @app.before_request
+    def _start_request_timer():
+        registry.start_request(request.endpoint)
+
+    @app.teardown_request
+    def _finish_request_timer(exc):
+        registry.finish_request()
+
+    def _render_started(sender, **extra):
+        _local.render_started = time.perf_counter()
+
+    def _render_finished(sender, **extra):
+        started = getattr(_local, 'render_started', None)
+        if started is not None:
+            registry.add_phase('render', time.perf_counter() - started)
+            _local.render_started = None
+
+    before_render_template.connect(_render_started, app, weak=False)
+    template_rendered.connect(_render_finished, app, weak=False)
@@ -0,0 +1,58 @@
+# migrate_booking_snapshots.py
+import argparse
+import os
+import time
+from pymongo import UpdateOne
+from mongo_session import connect
+from reservation import FLIGHT_PROJECTION, flight_snapshot
+
+
+def backfill_snapshots(db, batch_size=1000):
+    """Mengisi flight_details dan username pada booking lama, per batch berdasarkan urutan _id."""
+    updated = 0
+    last_id = None
+    while True:
+        query = {'flight_details': {'$exists': False}}
+        if last_id is not None:
+            query['_id'] = {'$gt': last_id}
+        batch = list(db.bookings.find(query, {'flight_id': 1, 'user_id': 1, 'total_price': 1, 'num_passengers': 1}).sort('_id', 1).limit(batch_size))
+        if not batch:
+            break
+        last_id = batch[-1]['_id']
+
+        flight_ids = list({b['flight_id'] for b in batch})
+        user_ids = list({b['user_id'] for b in batch})
+        flights = {f['_id']: f for f in db.flights.find({'_id': {'$in': flight_ids}}, FLIGHT_PROJECTION)}
+        usernames = {u['_id']: u['username'] for u in db.users.find({'_id': {'$in': user_ids}}, {'username': 1})}
+
+        ops = []
+        for booking in batch:
+            flight = flights.get(booking['flight_id'])
+            if not flight:
+                # Penerbangan sudah dihapus; tidak ada data untuk disalin
+                continue
+            snapshot = flight_snapshot(flight)
+            # Harga saat dipesan, bukan harga penerbangan sekarang (bisa sudah diubah admin)
+            if booking.get('total_price') is not None and booking.get('num_passengers'):
+                snapshot['price'] = booking['total_price'] / booking['num_passengers']
+            ops.append(UpdateOne({'_id': booking['_id']}, {'$set': {
+                'flight_details': snapshot,
+                'username': usernames.get(booking['user_id'])
+            }}))
+        if ops:
+            updated += db.bookings.bulk_write(ops, ordered=False).modified_count
+        print(f"  ... {updated} booking diperbarui")
+    return updated
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backfill snapshot penerbangan dan username pada koleksi bookings.')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    start = time.perf_counter()
+    total = backfill_snapshots(db, batch_size=args.batch_size)
+    print(f"✅ {total} booking dimigrasikan dalam {time.perf_counter() - start:.1f} detik.")
+    client.close()
@@ -0,0 +1,275 @@
+# mongo_session.py
+"""Siklus hidup MongoClient yang aman untuk worker hasil fork, plus perutean baca per rute.
+
+MongoClient tidak boleh dipakai lintas fork (gunicorn --preload): pool koneksi dan thread
+monitornya milik proses induk. MongoSession membuat client secara malas per PID, sehingga objek
+`db`/koleksi di level modul tetap bisa dipakai di setiap worker dan masing-masing worker
+mendapat pool sendiri.
+
+Perutean baca: rute menandai dirinya dengan @session.read_route('search') dan semua query baca
+pada rute tersebut memakai read preference 'search' (secondary dengan batas keterlambatan);
+rute tanpa tanda, thread latar belakang, dan transaksi tetap membaca dari primary.
+
+Contoh pemeriksaan terhadap replica set lokal:
+    mongod --replSet rs0 --port 27017 --dbpath /tmp/rs0-0
+    mongod --replSet rs0 --port 27018 --dbpath /tmp/rs0-1
+    mongosh --eval 'rs.initiate({_id: "rs0", members: [{_id: 0, host: "localhost:27017"},
+                                                         {_id: 1, host: "localhost:27018"}]})'
+    python mongo_session.py --mongo-uri "mongodb://localhost:27017,localhost:27018/?replicaSet=rs0"
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from functools import wraps
+import pymongo
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+from pymongo.read_preferences import Primary, SecondaryPreferred
+from pymongo.topology_description import TopologyDescription
+
+PRIMARY = 'primary'
+DEFAULT_DATABASE = 'booking_tiket_db'
+# Nilai minimum maxStalenessSeconds yang diterima driver
+MIN_MAX_STALENESS = 90
+
+_local = threading.local()
+
+
+def client_options_from_env(environ=None):
+    """Opsi MongoClient dari variabel lingkungan MONGO_*; yang tidak diisi memakai default driver."""
+    environ = os.environ if environ is None else environ
+    options = {}
+    for env, option in (('MONGO_MAX_POOL_SIZE', 'maxPoolSize'), ('MONGO_MIN_POOL_SIZE', 'minPoolSize'),
+                        ('MONGO_MAX_IDLE_TIME_MS', 'maxIdleTimeMS'),
+                        ('MONGO_WAIT_QUEUE_TIMEOUT_MS', 'waitQueueTimeoutMS'),
+                        ('MONGO_CONNECT_TIMEOUT_MS', 'connectTimeoutMS'),
+                        ('MONGO_SOCKET_TIMEOUT_MS', 'socketTimeoutMS'),
+                        ('MONGO_SERVER_SELECTION_TIMEOUT_MS', 'serverSelectionTimeoutMS')):
+        if environ.get(env):
+            options[option] = int(environ[env])
+    # Misalnya "zstd,snappy,zlib"; server memilih yang pertama yang didukung kedua pihak
+    if environ.get('MONGO_COMPRESSORS'):
+        options['compressors'] = environ['MONGO_COMPRESSORS']
+    if environ.get('MONGO_APP_NAME'):
+        options['appname'] = environ['MONGO_APP_NAME']
+    return options
+
+
+def connect(uri, database=None, environ=None, **client_options):
+    """Client untuk skrip CLI dengan database (MONGO_DB) dan opsi MONGO_* yang sama seperti aplikasi.
+
+    Mengembalikan tuple (client, db); skrip menutup client sendiri setelah selesai.
+    """
+    environ = os.environ if environ is None else environ
+    client = MongoClient(uri, **dict(client_options_from_env(environ), **client_options))
+    return client, client[database or environ.get('MONGO_DB', DEFAULT_DATABASE)]
+
+
+def read_routes_from_env(environ=None):
+    """Read preference per nama rute. MONGO_SECONDARY_READS=0 mengembalikan semua bacaan ke primary."""
+    environ = os.environ if environ is None else environ
+    if environ.get('MONGO_SECONDARY_READS', '1') != '1':
+        return {PRIMARY: Primary()}
+    staleness = max(int(environ.get('MONGO_READ_MAX_STALENESS', str(MIN_MAX_STALENESS))), MIN_MAX_STALENESS)
+    return {
+        PRIMARY: Primary(),
+        'search': SecondaryPreferred(max_staleness=staleness),
+        'reports': SecondaryPreferred(max_staleness=staleness),
+    }
+
+
+class MongoSession:
+    """MongoClient per proses yang dibuat saat pertama dipakai.
+
+    Atribut yang tidak dikenal diteruskan ke client milik proses saat ini, jadi objek ini bisa
+    dipakai di tempat MongoClient (misalnya start_session() untuk transaksi reservasi).
+    """
+
+    def __init__(self, uri, database, read_routes=None, **client_options):
+        self.uri = uri
+        self.database_name = database
+        self.read_routes = read_routes or {PRIMARY: Primary()}
+        self.client_options = client_options
+        self._lock = threading.Lock()
+        self._pid = None
+        self._client = None
+        self._collections = {}
+        self.clients_created = 0
+
+    # --- Client ---
+    @property
+    def client(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    # Client warisan proses induk (jika ada) ditinggalkan tanpa close(): socket-nya milik induk
+                    self._client = MongoClient(self.uri, **self.client_options)
+                    self._collections = {}
+                    self.clients_created += 1
+                    self._pid = pid
+        return self._client
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    def close(self):
+        with self._lock:
+            if self._client is not None and self._pid == os.getpid():
+                self._client.close()
+            self._client = None
+            self._pid = None
+            self._collections = {}
+
+    # --- Koleksi dan Perutean Baca ---
+    def database(self, route=None):
+        """Database proxy; dengan `route`, semua koleksinya selalu memakai read preference itu."""
+        return DatabaseProxy(self, route)
+
+    def primary(self, name):
+        """Koleksi yang selalu dibaca dari primary, juga di dalam rute bertanda read_route."""
+        return CollectionProxy(self, name, PRIMARY)
+
+    def collection(self, name, route=None):
+        """Koleksi milik client proses ini dengan read preference rute aktif (atau `route`)."""
+        route = route or getattr(_local, 'route', None) or PRIMARY
+        client = self.client
+        key = (name, route)
+        collection = self._collections.get(key)
+        if collection is None:
+            collection = client[self.database_name][name]
+            if route != PRIMARY and route in self.read_routes:
+                collection = collection.with_options(read_preference=self.read_routes[route])
+            self._collections[key] = collection
+        return collection
+
+    def read_route(self, route):
+        """Decorator view Flask: query baca di dalam view memakai read preference `route`."""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                previous = getattr(_local, 'route', None)
+                _local.route = route
+                try:
+                    return view(*args, **kwargs)
+                finally:
+                    _local.route = previous
+            return wrapper
+        return decorator
+
+    # --- Kesehatan ---
+    def health(self, timeout=2.0):
+        """Ping ke primary dengan batas waktu. Mengembalikan dict status untuk endpoint readiness."""
+        started = time.perf_counter()
+        status = {'pid': os.getpid(), 'ok': True}
+        try:
+            with pymongo.timeout(timeout):
+                self.client.admin.command('ping')
+            status['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        except PyMongoError as e:
+            status.update(ok=False, error=str(e))
+        description = getattr(self.client, 'topology_description', None)
+        if isinstance(description, TopologyDescription):
+            status['topology'] = description.topology_type_name
+            status['servers'] = {f'{host}:{port}': server.server_type_name
+                                 for (host, port), server in description.server_descriptions().items()}
+        return status
+
+    def stats(self):
+        return {'clients_created': self.clients_created,
+                'max_pool_size': self.client_options.get('maxPoolSize', 100)}
+
+
+class DatabaseProxy:
+    """Pengganti Database di level modul: db['x'] dan db.x menghasilkan CollectionProxy."""
+
+    def __init__(self, session, route=None):
+        self._session = session
+        self._route = route
+
+    def __getitem__(self, name):
+        return CollectionProxy(self._session, name, self._route)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        database = self._session.client[self._session.database_name]
+        # Method/properti Database diteruskan apa adanya; nama lain berarti koleksi (db.flights)
+        if hasattr(type(database), name):
+            return getattr(database, name)
+        return CollectionProxy(self._session, name, self._route)
+
+    @property
+    def name(self):
+        return self._session.database_name
+
+
+class CollectionProxy:
+    """Koleksi yang diselesaikan ulang pada setiap akses: client milik proses ini, read preference rute aktif."""
+
+    def __init__(self, session, name, route=None):
+        self._session = session
+        self._name = name
+        self._route = route
+
+    def __getattr__(self, attr):
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self._session.collection(self._name, self._route), attr)
+
+    @property
+    def name(self):
+        return self._name
+
+    def __repr__(self):
+        return f'CollectionProxy({self._session.database_name!r}, {self._name!r})'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--database', default='booking_tiket_check')
+    args = parser.parse_args()
+
+    session = MongoSession(args.mongo_uri, args.database, read_routes=read_routes_from_env(),
+                           **client_options_from_env())
+    status = session.health()
+    print(f"{'✔️' if status['ok'] else '❌'} {status}")
+    if not status['ok']:
+        sys.exit(1)
+    collection = session.database()['routing_check']
+    collection.insert_one({'checked_at': time.time()})
+
+    def read_address():
+        cursor = collection.find({}).limit(1)
+        list(cursor)
+        return cursor.address
+
+    failed = False
+    for route in session.read_routes:
+        host, port = session.read_route(route)(read_address)()
+        server_type = status.get('servers', {}).get(f'{host}:{port}')
+        expected = 'RSPrimary' if route == PRIMARY else 'RSSecondary'
+        # Tanpa replica set (atau tanpa secondary yang sehat) bacaan sekunder memang jatuh ke primary
+        ok = (status.get('topology') != 'ReplicaSetWithPrimary' or server_type == expected
+              or 'RSSecondary' not in status['servers'].values())
+        failed |= not ok
+        print(f"{'✔️' if ok else '❌'} rute {route}: dibaca dari {host}:{port} ({server_type})")
+
+    # Fork: anak harus membuat client sendiri, bukan memakai client induk
+    if hasattr(os, 'fork'):
+        parent_client = session.client
+        pid = os.fork()
+        if pid == 0:
+            child_ok = session.client is not parent_client and session.health()['ok']
+            os._exit(0 if child_ok else 1)
+        _, code = os.waitpid(pid, 0)
+        failed |= code != 0
+        print(f"{'✔️' if code == 0 else '❌'} worker hasil fork membuat client sendiri")
+    collection.drop()
+    session.close()
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,86 @@
+# pagination.py
+import base64
+from datetime import datetime
+from bson import json_util
+from bson.objectid import ObjectId
+
+
+class InvalidPageToken(ValueError):
+    pass
+
+
+# Tipe nilai field sort yang boleh datang dari token; dokumen/list (misalnya {"$gt": ...}) akan ikut masuk ke query
+TOKEN_VALUE_TYPES = (datetime, int, float, str)
+
+
+def encode_token(doc, sort_field):
+    """Membuat token kursor dari (nilai field sort, _id) dokumen."""
+    raw = json_util.dumps([doc[sort_field], doc['_id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_token(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        value, doc_id = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except Exception:
+        raise InvalidPageToken('Token halaman tidak valid.')
+    if isinstance(value, bool) or not isinstance(value, TOKEN_VALUE_TYPES) or not isinstance(doc_id, ObjectId):
+        raise InvalidPageToken('Token halaman tidak valid.')
+    return value, doc_id
+
+
+def _keyset_condition(sort_field, value, doc_id, op):
+    return {'$or': [
+        {sort_field: {op: value}},
+        {sort_field: value, '_id': {op: doc_id}}
+    ]}
+
+
+def keyset_filter(query, sort_field, direction=1, after=None, before=None):
+    """Menggabungkan query dengan kondisi keyset. Mengembalikan tuple (query, sort)."""
+    forward_op, backward_op = ('$gt', '$lt') if direction == 1 else ('$lt', '$gt')
+    conditions = [query] if query else []
+
+    if before:
+        value, doc_id = decode_token(before)
+        conditions.append(_keyset_condition(sort_field, value, doc_id, backward_op))
+        sort = [(sort_field, -direction), ('_id', -direction)]
+    else:
+        if after:
+            value, doc_id = decode_token(after)
+            conditions.append(_keyset_condition(sort_field, value, doc_id, forward_op))
+        sort = [(sort_field, direction), ('_id', direction)]
+
+    final_query = {'$and': conditions} if len(conditions) > 1 else (conditions[0] if conditions else {})
+    return final_query, sort
+
+
+def _finish_page(docs, page_size, sort_field, after=None, before=None):
+    has_more = len(docs) > page_size
+    items = docs[:page_size]
+
+    if before:
+        items.reverse()
+        next_token = encode_token(items[-1], sort_field) if items else None
+        prev_token = encode_token(items[0], sort_field) if items and has_more else None
+    else:
+        next_token = encode_token(items[-1], sort_field) if items and has_more else None
+        prev_token = encode_token(items[0], sort_field) if items and after else None
+    return items, next_token, prev_token
+
+
+def keyset_page(collection, query, sort_field, page_size, direction=1,
+                after=None, before=None, projection=None):
+    """Mengambil satu halaman dengan paginasi keyset pada (sort_field, _id).
+
+    Mengembalikan tuple (items, next_token, prev_token). Token hanya bergantung pada
+    nilai sort dan _id, jadi tetap stabil walaupun field lain (misalnya kursi) berubah.
+    """
+    if projection:
+        projection = dict(projection)
+        if sort_field not in projection and any(projection.values()):
+            projection[sort_field] = 1
+    final_query, sort = keyset_filter(query, sort_field, direction, after, before)
+    docs = list(collection.find(final_query, projection).sort(sort).limit(page_size + 1))
+    return _finish_page(docs, page_size, sort_field, after, before)
@@ -0,0 +1,107 @@
+# passwords.py
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from werkzeug.security import generate_password_hash, check_password_hash
+
+# Proses hash tidak di-fork dari worker web: fork dari proses yang punya thread (client MongoDB, coalescer)
+# bisa mewarisi lock yang sedang dipegang thread lain dan macet selamanya
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class PasswordHashTimeout(Exception):
+    """Pool hash tidak menyelesaikan operasi dalam batas waktu (server sedang sibuk)."""
+
+
+class PasswordHasher:
+    """Hash dan verifikasi password di process pool terbatas agar thread request tidak tertahan CPU.
+
+    `method` mengikuti format werkzeug, misalnya 'scrypt:32768:8:1' atau 'pbkdf2:sha256:600000'.
+    Dengan workers=0 semua operasi dijalankan langsung di thread pemanggil. `observer` (opsional)
+    dipanggil dengan durasi setiap operasi dalam detik.
+    """
+
+    def __init__(self, method='scrypt', workers=2, timeout=30, observer=None):
+        self.method = method
+        self.observer = observer
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pool_pid = None
+        # Prefix lengkap (dengan parameter default) untuk mendeteksi hash yang perlu di-upgrade
+        self.method_prefix = generate_password_hash('', method).split('$', 1)[0]
+
+    def _executor(self):
+        # Pool dibuat saat pertama dipakai dan dibuat ulang setelah fork (misalnya worker gunicorn)
+        with self._lock:
+            if self._pool is None or self._pool_pid != os.getpid():
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context(POOL_START_METHOD))
+                self._pool_pid = os.getpid()
+            return self._pool
+
+    def _run(self, fn, *args):
+        started = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                return fn(*args)
+            future = self._executor().submit(fn, *args)
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise PasswordHashTimeout(f'Hash password melebihi {self.timeout} detik') from None
+        finally:
+            if self.observer:
+                self.observer(time.perf_counter() - started)
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def verify(self, stored_hash, password):
+        return self._run(check_password_hash, stored_hash, password)
+
+    def needs_rehash(self, stored_hash):
+        return stored_hash.split('$', 1)[0] != self.method_prefix
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None and self._pool_pid == os.getpid():
+                self._pool.shutdown(wait=False)
+            self._pool = None
+
+
+class LoginThrottle:
+    """Membatasi jumlah percobaan login per username dalam jendela waktu geser."""
+
+    def __init__(self, max_attempts=5, window=60, max_tracked=10000):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.max_tracked = max_tracked
+        self._lock = threading.Lock()
+        self._attempts = OrderedDict()
+        self.rejected = 0
+
+    def allow(self, username):
+        """Mencatat satu percobaan; False jika username sudah melewati batas."""
+        now = time.monotonic()
+        with self._lock:
+            attempts = self._attempts.setdefault(username, deque())
+            self._attempts.move_to_end(username)
+            while attempts and attempts[0] <= now - self.window:
+                attempts.popleft()
+            if len(attempts) >= self.max_attempts:
+                self.rejected += 1
+                return False
+            attempts.append(now)
+            while len(self._attempts) > self.max_tracked:
+                self._attempts.popitem(last=False)
+            return True
+
+    def reset(self, username):
+        with self._lock:
+            self._attempts.pop(username, None)
@@ -0,0 +1,200 @@
+# reservation.py
+from datetime import datetime
+from bson.objectid import ObjectId
+from pymongo import ReturnDocument
+
+# Field penerbangan yang disalin ke setiap booking agar daftar pemesanan tidak perlu $lookup
+SNAPSHOT_FIELDS = ('flight_number', 'origin', 'destination', 'departure_time', 'arrival_time', 'price')
+# Field penerbangan yang dikembalikan bersama hasil reservasi (untuk snapshot dan statistik rute)
+FLIGHT_PROJECTION = dict({field: 1 for field in SNAPSHOT_FIELDS}, available_seats=1)
+
+# --- Status Hasil Reservasi ---
+RESERVED = 'reserved'
+CANCELLED = 'cancelled'
+NOT_FOUND = 'not_found'
+INSUFFICIENT_SEATS = 'insufficient_seats'
+ALREADY_CANCELLED = 'already_cancelled'
+FLIGHT_CANCELLED = 'flight_cancelled'
+
+
+def flight_snapshot(flight):
+    """Salinan ringkas penerbangan yang disimpan di dalam booking (`flight_details`)."""
+    return {field: flight.get(field) for field in SNAPSHOT_FIELDS}
+
+
+def _build_booking(flight, user_id, num_passengers, username=None):
+    return {
+        'user_id': ObjectId(user_id),
+        'username': username,
+        'flight_id': flight['_id'],
+        'flight_details': flight_snapshot(flight),
+        'num_passengers': num_passengers,
+        'total_price': flight['price'] * num_passengers,
+        'booking_date': datetime.now(),
+        'status': 'confirmed'
+    }
+
+
+def _claim_seats(flights_collection, flight_id, num_passengers, session=None):
+    # Kursi hanya dikurangi jika masih cukup; cek dan update terjadi dalam satu operasi atomik
+    return flights_collection.find_one_and_update(
+        {'_id': ObjectId(flight_id), 'available_seats': {'$gte': num_passengers}, 'status': {'$ne': 'cancelled'}},
+        {'$inc': {'available_seats': -num_passengers}},
+        projection=dict(FLIGHT_PROJECTION),
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
+
+
+def _reservation_failure(flights_collection, flight_id, session=None):
+    # Hanya dipanggil saat update bersyarat gagal, untuk membedakan penyebabnya
+    flight = flights_collection.find_one({'_id': ObjectId(flight_id)}, {'status': 1}, session=session)
+    if not flight:
+        return NOT_FOUND
+    return FLIGHT_CANCELLED if flight.get('status') == 'cancelled' else INSUFFICIENT_SEATS
+
+
+def reserve_seats(flights_collection, bookings_collection, flight_id, user_id, num_passengers,
+                  username=None, client=None, use_transaction=False):
+    """Memesan kursi secara atomik. Mengembalikan tuple (status, booking, flight)."""
+    if use_transaction and client is not None:
+        result = {}
+
+        def _txn(session):
+            flight = _claim_seats(flights_collection, flight_id, num_passengers, session=session)
+            if not flight:
+                result['status'] = _reservation_failure(flights_collection, flight_id, session=session)
+                return
+            booking = _build_booking(flight, user_id, num_passengers, username)
+            bookings_collection.insert_one(booking, session=session)
+            result['status'], result['booking'], result['flight'] = RESERVED, booking, flight
+
+        with client.start_session() as session:
+            session.with_transaction(_txn)
+        return result['status'], result.get('booking'), result.get('flight')
+
+    flight = _claim_seats(flights_collection, flight_id, num_passengers)
+    if not flight:
+        return _reservation_failure(flights_collection, flight_id), None, None
+
+    booking = _build_booking(flight, user_id, num_passengers, username)
+    try:
+        bookings_collection.insert_one(booking)
+    except Exception:
+        # Kembalikan kursi yang sudah diklaim jika booking gagal disimpan
+        flights_collection.update_one(
+            {'_id': flight['_id']},
+            {'$inc': {'available_seats': num_passengers}}
+        )
+        raise
+    return RESERVED, booking, flight
+
+
+def _claim_batch(flights_collection, flight_id, requested, session=None):
+    """Mengklaim kursi untuk sebanyak mungkin permintaan (urut FIFO) dengan satu $inc bersyarat.
+
+    Mengembalikan (indeks yang diterima, flight, status gagal untuk sisanya).
+    """
+    accepted = list(range(len(requested)))
+    while accepted:
+        flight = _claim_seats(flights_collection, flight_id, sum(requested[i] for i in accepted), session=session)
+        if flight:
+            return accepted, flight, INSUFFICIENT_SEATS
+        current = flights_collection.find_one({'_id': ObjectId(flight_id)}, {'available_seats': 1, 'status': 1},
+                                              session=session)
+        if not current:
+            return [], None, NOT_FOUND
+        if current.get('status') == 'cancelled':
+            return [], None, FLIGHT_CANCELLED
+        # Sisa kursi tidak cukup untuk semua: ambil permintaan yang masih muat, lalu coba lagi
+        remaining, fitting = current['available_seats'], []
+        for i in accepted:
+            if requested[i] <= remaining:
+                fitting.append(i)
+                remaining -= requested[i]
+        if fitting == accepted:
+            continue  # Kursi berubah di antara dua query (worker lain); ulangi dengan angka terbaru
+        accepted = fitting
+    return [], None, INSUFFICIENT_SEATS
+
+
+def reserve_seats_batch(flights_collection, bookings_collection, flight_id, requests,
+                        client=None, use_transaction=False):
+    """Memesan kursi untuk beberapa permintaan pada satu penerbangan sekaligus.
+
+    `requests` berisi tuple (user_id, num_passengers, username). Mengembalikan list tuple
+    (status, booking, flight) dengan urutan yang sama seperti `requests`.
+    """
+    def _reserve(session=None):
+        accepted, flight, failure = _claim_batch(flights_collection, flight_id, [r[1] for r in requests],
+                                                 session=session)
+        results = [(failure, None, None)] * len(requests)
+        if not accepted:
+            return results
+        bookings = [_build_booking(flight, requests[i][0], requests[i][1], requests[i][2]) for i in accepted]
+        try:
+            bookings_collection.insert_many(bookings, session=session)
+        except Exception:
+            if session is None:
+                flights_collection.update_one(
+                    {'_id': flight['_id']},
+                    {'$inc': {'available_seats': sum(b['num_passengers'] for b in bookings)}}
+                )
+            raise
+        for i, booking in zip(accepted, bookings):
+            results[i] = (RESERVED, booking, flight)
+        return results
+
+    if use_transaction and client is not None:
+        result = {}
+
+        def _txn(session):
+            result['value'] = _reserve(session)
+
+        with client.start_session() as session:
+            session.with_transaction(_txn)
+        return result['value']
+
+    return _reserve()
+
+
+def release_booking(flights_collection, bookings_collection, booking_id, user_id=None,
+                    client=None, use_transaction=False):
+    """Membatalkan booking dan mengembalikan kursinya. Mengembalikan tuple (status, booking, flight)."""
+    booking_filter = {'_id': ObjectId(booking_id), 'status': 'confirmed'}
+    if user_id is not None:
+        booking_filter['user_id'] = ObjectId(user_id)
+
+    def _release(session=None):
+        # Transisi status confirmed -> cancelled hanya bisa dimenangkan satu request
+        booking = bookings_collection.find_one_and_update(
+            booking_filter,
+            {'$set': {'status': 'cancelled'}},
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        if not booking:
+            lookup = {k: v for k, v in booking_filter.items() if k != 'status'}
+            if bookings_collection.find_one(lookup, {'_id': 1}, session=session):
+                return ALREADY_CANCELLED, None, None
+            return NOT_FOUND, None, None
+        flight = flights_collection.find_one_and_update(
+            {'_id': booking['flight_id']},
+            {'$inc': {'available_seats': booking['num_passengers']}},
+            projection=dict(FLIGHT_PROJECTION),
+            return_document=ReturnDocument.AFTER,
+            session=session
+        )
+        return CANCELLED, booking, flight
+
+    if use_transaction and client is not None:
+        result = {}
+
+        def _txn(session):
+            result['value'] = _release(session)
+
+        with client.start_session() as session:
+            session.with_transaction(_txn)
+        return result['value']
+
+    return _release()
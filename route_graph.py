@@ -0,0 +1,259 @@
+# route_graph.py
+"""Pencarian penerbangan transit (1–2 kali transit) di atas graf rute di memori.
+
+Graf berisi jadwal penerbangan mendatang (tanpa kursi): untuk setiap bandara asal dan setiap
+pasangan rute disimpan daftar keberangkatan terurut waktu, sehingga mencari sambungan di bandara
+transit cukup bisect pada jendela [tiba + waktu transit minimum, tiba + waktu transit maksimum].
+Kursi dibaca langsung dari MongoDB hanya untuk itinerary teratas.
+
+Setiap worker memegang grafnya sendiri. Perubahan jadwal menaikkan versi `schedule` di MongoDB:
+worker yang melakukan perubahan memperbarui grafnya secara inkremental, worker lain membangun
+ulang grafnya di latar belakang begitu melihat versi berubah. Build pertama juga berjalan di
+latar belakang (dipicu warm() saat worker siap atau pencarian pertama).
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+SORT_KEYS = ('duration', 'price')
+LEG_PROJECTION = {'flight_number': 1, 'origin': 1, 'destination': 1, 'departure_time': 1, 'arrival_time': 1,
+                  'price': 1}
+
+Leg = namedtuple('Leg', 'id flight_number origin destination departure_time arrival_time price')
+
+
+class Itinerary:
+    """Rangkaian penerbangan dari asal ke tujuan beserta total durasi dan harga."""
+
+    __slots__ = ('legs', 'duration', 'price')
+
+    def __init__(self, legs):
+        self.legs = legs
+        self.duration = legs[-1].arrival_time - legs[0].departure_time
+        self.price = sum(leg.price for leg in legs)
+
+    @property
+    def stops(self):
+        return len(self.legs) - 1
+
+    @property
+    def layovers(self):
+        return [later.departure_time - earlier.arrival_time for earlier, later in zip(self.legs, self.legs[1:])]
+
+    def to_dict(self):
+        return {'legs': [leg._asdict() for leg in self.legs], 'stops': self.stops,
+                'duration_minutes': int(self.duration.total_seconds() // 60), 'price': self.price}
+
+
+class RouteGraph:
+    """Graf jadwal per worker dengan pembaruan inkremental dan pencarian berbatas waktu."""
+
+    def __init__(self, flights_collection, version, horizon_days=90, min_connection=timedelta(minutes=45),
+                 max_connection=timedelta(hours=12), max_stops=2, budget_ms=50, max_age_seconds=3600):
+        self.flights_collection = flights_collection
+        self.version = version  # CollectionVersion 'schedule'
+        self.horizon = timedelta(days=horizon_days)
+        self.min_connection = min_connection
+        self.max_connection = max_connection
+        self.max_stops = max_stops
+        self.budget = budget_ms / 1000
+        # Jendela horizon dihitung saat build; tanpa perubahan jadwal pun graf dibangun ulang
+        # setelah umur ini agar penerbangan di ujung horizon ikut masuk
+        self.max_age = max_age_seconds
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()  # Dipegang selama rebuild: paling banyak satu rebuild per worker
+        self._loaded_version = None
+        self._loaded_at = None
+        self._legs = {}
+        self._departures = {}  # bandara asal -> [(departure_time, id)]
+        self._routes = {}      # (asal, tujuan) -> [(departure_time, id)]
+        self.rebuilds = 0
+        self.searches = 0
+        self.truncated = 0
+
+    # --- Membangun Graf ---
+    def rebuild(self):
+        now = datetime.now()
+        query = {'departure_time': {'$gte': now, '$lt': now + self.horizon}, 'status': {'$ne': 'cancelled'}}
+        # Versi dibaca sebelum data: perubahan di tengah pembacaan memicu rebuild berikutnya
+        version = self.version.get()
+        cursor = self.flights_collection.find(query, LEG_PROJECTION).sort([('departure_time', 1), ('_id', 1)])
+        self.load(cursor.batch_size(5000), version)
+
+    def load(self, flights, version):
+        """Mengganti isi graf dengan `flights` (dokumen terurut departure_time lalu _id)."""
+        legs, departures, routes = {}, {}, {}
+        for flight in flights:
+            leg = _leg(flight)
+            legs[leg.id] = leg
+            # Diambil berurutan dari cursor, jadi cukup append
+            departures.setdefault(leg.origin, []).append((leg.departure_time, leg.id))
+            routes.setdefault((leg.origin, leg.destination), []).append((leg.departure_time, leg.id))
+        with self._lock:
+            self._legs, self._departures, self._routes = legs, departures, routes
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+            self.rebuilds += 1
+
+    @property
+    def ready(self):
+        return self._loaded_version is not None
+
+    @property
+    def loaded_version(self):
+        """Versi 'schedule' yang sedang dipakai graf (None sebelum build pertama), untuk ETag API."""
+        return self._loaded_version
+
+    @property
+    def age(self):
+        return time.monotonic() - self._loaded_at if self._loaded_at is not None else None
+
+    def stale(self):
+        return (self._loaded_version is None or self.version.get() != self._loaded_version
+                or (self.max_age is not None and self.age > self.max_age))
+
+    def warm(self):
+        """Memulai (re)build di latar belakang jika graf belum ada, versinya berubah, atau sudah terlalu tua.
+
+        Tidak pernah menunggu: selama rebuild graf lama tetap dipakai. Sebelum build pertama selesai, pencarian langsung
+        mengembalikan hasil kosong yang ditandai terpotong, jadi request tidak pernah membangun graf.
+        """
+        if self.stale() and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        finally:
+            self._rebuild_lock.release()
+
+    # --- Pembaruan Inkremental ---
+    def flights_changed(self, changes):
+        """Mencatat perubahan jadwal: list tuple (lama atau None, baru atau None).
+
+        Versi `schedule` dinaikkan agar worker lain membangun ulang grafnya; graf worker ini
+        diperbarui langsung selama tidak ada perubahan lain yang terlewat.
+        """
+        version = self.version.bump()
+        with self._lock:
+            if self._loaded_version is None or version != self._loaded_version + 1:
+                return  # Graf belum dibangun atau sudah tertinggal: dibangun ulang di latar belakang
+            for old_flight, new_flight in changes:
+                if old_flight is not None:
+                    self._remove(old_flight['_id'])
+                if new_flight is not None and new_flight.get('status') != 'cancelled':
+                    self._add(_leg(new_flight))
+            self._loaded_version = version
+
+    def _add(self, leg):
+        now = datetime.now()
+        if not now <= leg.departure_time < now + self.horizon:
+            return
+        self._legs[leg.id] = leg
+        insort(self._departures.setdefault(leg.origin, []), (leg.departure_time, leg.id))
+        insort(self._routes.setdefault((leg.origin, leg.destination), []), (leg.departure_time, leg.id))
+
+    def _remove(self, flight_id):
+        leg = self._legs.pop(flight_id, None)
+        if leg is None:
+            return
+        for index, key in ((self._departures, leg.origin), (self._routes, (leg.origin, leg.destination))):
+            entries = index.get(key, [])
+            position = bisect_left(entries, (leg.departure_time, leg.id))
+            if position < len(entries) and entries[position][1] == leg.id:
+                del entries[position]
+
+    # --- Pencarian ---
+    def _window(self, entries, start, end):
+        position = bisect_left(entries, (start,))
+        while position < len(entries) and entries[position][0] < end:
+            yield self._legs[entries[position][1]]
+            position += 1
+
+    def _connections(self, entries, leg):
+        return self._window(entries, leg.arrival_time + self.min_connection, leg.arrival_time + self.max_connection)
+
+    def itineraries(self, origin, destination, start, end, max_stops=None, sort='duration', keep=30):
+        """`keep` itinerary transit (1..max_stops) terbaik menurut `sort` yang berangkat pada [start, end).
+
+        Hanya kandidat terbaik yang disimpan (heap berukuran tetap), jadi memori tidak tumbuh dengan
+        jumlah kombinasi. Mengembalikan (itinerary terurut, terpotong); terpotong=True jika batas
+        waktu pencarian habis sebelum semua kombinasi diperiksa.
+        """
+        max_stops = self.max_stops if max_stops is None else min(max_stops, self.max_stops)
+        by_price = sort == 'price'
+        deadline = time.perf_counter() + self.budget
+        worst = []  # max-heap (kunci dinegasikan) berisi `keep` kandidat terbaik
+        counter = 0
+        truncated = False
+
+        def offer(legs):
+            nonlocal counter
+            duration = (legs[-1].arrival_time - legs[0].departure_time).total_seconds()
+            price = sum(leg.price for leg in legs)
+            key = (-price, -duration) if by_price else (-duration, -price)
+            counter += 1
+            if len(worst) < keep:
+                heapq.heappush(worst, (key, counter, legs))
+            elif key > worst[0][0]:
+                heapq.heapreplace(worst, (key, counter, legs))
+
+        with self._lock:
+            routes, departures = self._routes, self._departures
+            for first in self._window(departures.get(origin, []), start, end):
+                if time.perf_counter() > deadline:
+                    truncated = True
+                    break
+                hub = first.destination
+                if hub == destination:
+                    continue  # Penerbangan langsung sudah ditampilkan oleh pencarian biasa
+                for last in self._connections(routes.get((hub, destination), []), first):
+                    offer((first, last))
+                if max_stops < 2:
+                    continue
+                for second in self._connections(departures.get(hub, []), first):
+                    if time.perf_counter() > deadline:
+                        truncated = True
+                        break
+                    final = routes.get((second.destination, destination))
+                    if not final or second.destination in (origin, destination):
+                        continue
+                    for last in self._connections(final, second):
+                        offer((first, second, last))
+                if truncated:
+                    break
+        return [Itinerary(legs) for _, _, legs in sorted(worst, reverse=True)], truncated
+
+    def search(self, origin, destination, start, end, sort='duration', limit=10, passengers=1, max_stops=None):
+        """Itinerary transit terbaik menurut `sort` yang semua penerbangannya masih punya kursi.
+
+        Mengembalikan (daftar Itinerary, terpotong); ([], True) selama graf pertama masih dibangun.
+        """
+        self.warm()
+        self.searches += 1
+        if not self.ready:
+            self.truncated += 1
+            return [], True
+        # Kandidat lebih banyak dari limit karena sebagian bisa gugur saat kursi diperiksa
+        candidates, truncated = self.itineraries(origin, destination, start, end, max_stops, sort, keep=limit * 3)
+        if truncated:
+            self.truncated += 1
+        leg_ids = list({leg.id for item in candidates for leg in item.legs})
+        available = {flight['_id'] for flight in self.flights_collection.find(
+            {'_id': {'$in': leg_ids}, 'available_seats': {'$gte': passengers}, 'status': {'$ne': 'cancelled'}},
+            {'_id': 1}
+        )} if leg_ids else set()
+        return [item for item in candidates if all(leg.id in available for leg in item.legs)][:limit], truncated
+
+    def stats(self):
+        with self._lock:
+            return {'ready': int(self.ready), 'age_seconds': round(self.age or 0.0, 1), 'flights': len(self._legs), 'airports': len(self._departures), 'routes': len(self._routes),
+                    'rebuilds': self.rebuilds, 'searches': self.searches, 'truncated': self.truncated}
+
+
+def _leg(flight):
+    return Leg(flight['_id'], flight['flight_number'], flight['origin'], flight['destination'],
+               flight['departure_time'], flight['arrival_time'], flight['price'])
@@ -0,0 +1,318 @@
+# schedule_import.py
+"""Impor jadwal penerbangan massal dari file CSV atau JSONL (boleh .gz).
+
+Baris dibaca satu per satu, divalidasi dengan aturan yang sama seperti form tambah/edit
+penerbangan, lalu di-upsert per batch berdasarkan (flight_number, departure_time).
+
+Contoh:
+    python schedule_import.py jadwal.csv
+    python schedule_import.py jadwal.jsonl.gz --batch-size 2000 --errors error_impor.csv
+"""
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import time
+from datetime import datetime
+from pymongo import UpdateOne, UpdateMany
+from pymongo.errors import BulkWriteError
+
+FIELDS = ('flight_number', 'origin', 'destination', 'departure_time', 'arrival_time', 'price', 'total_seats')
+# Field yang boleh berubah saat baris jadwal menimpa penerbangan yang sudah ada
+UPDATE_FIELDS = ('origin', 'destination', 'arrival_time', 'price', 'total_seats')
+DATETIME_FORMATS = ('%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M:%S')
+EXISTING_PROJECTION = dict({field: 1 for field in FIELDS}, available_seats=1)
+SEATS_ERROR = 'Total kursi baru tidak boleh kurang dari jumlah yang sudah dipesan.'
+DUPLICATE_ERROR = 'Penerbangan sudah dibuat oleh proses lain; baris dilewati.'
+
+
+# --- Validasi ---
+def parse_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    for fmt in DATETIME_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt)
+        except ValueError:
+            continue
+    raise ValueError(f'Format waktu tidak valid: {value!r}')
+
+
+def parse_flight(fields):
+    """Memvalidasi data penerbangan dari form atau baris jadwal. ValueError jika ada yang salah."""
+    missing = [field for field in FIELDS if fields.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Field wajib kosong: {', '.join(missing)}")
+    flight = {
+        'flight_number': str(fields['flight_number']).strip().upper(),
+        'origin': str(fields['origin']).strip().upper(),
+        'destination': str(fields['destination']).strip().upper(),
+        'departure_time': parse_datetime(fields['departure_time']),
+        'arrival_time': parse_datetime(fields['arrival_time']),
+    }
+    try:
+        flight['price'] = float(fields['price'])
+    except (TypeError, ValueError):
+        raise ValueError(f"Harga tidak valid: {fields['price']!r}")
+    try:
+        flight['total_seats'] = int(fields['total_seats'])
+    except (TypeError, ValueError):
+        raise ValueError(f"Total kursi tidak valid: {fields['total_seats']!r}")
+
+    if flight['origin'] == flight['destination']:
+        raise ValueError('Bandara asal dan tujuan tidak boleh sama.')
+    if flight['arrival_time'] <= flight['departure_time']:
+        raise ValueError('Waktu kedatangan harus setelah waktu keberangkatan.')
+    if flight['price'] < 0:
+        raise ValueError('Harga tidak boleh negatif.')
+    if flight['total_seats'] < 1:
+        raise ValueError('Total kursi minimal 1.')
+    return flight
+
+
+# --- Pembacaan File ---
+def detect_format(filename):
+    name = filename.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return 'jsonl' if name.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def open_stream(stream, filename):
+    """Membungkus stream biner dengan dekompresi gzip jika nama file berakhiran .gz."""
+    return gzip.GzipFile(fileobj=stream) if filename.lower().endswith('.gz') else stream
+
+
+def read_rows(stream, fmt):
+    """Membaca stream biner baris demi baris. Menghasilkan tuple (nomor baris, field atau None, pesan error)."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        missing = [field for field in FIELDS if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"Kolom wajib tidak ada di header CSV: {', '.join(missing)}")
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_no, line in enumerate(text, 1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield line_no, None, f'JSON tidak valid: {e}'
+            continue
+        if not isinstance(row, dict):
+            yield line_no, None, 'Baris JSONL harus berupa object.'
+            continue
+        yield line_no, row, None
+
+
+# --- Impor ---
+class ImportReport:
+    """Ringkasan hasil impor. Hanya `max_errors` error pertama yang disimpan; sisanya cukup dihitung."""
+
+    def __init__(self, max_errors=1000, on_error=None):
+        self.max_errors = max_errors
+        self.on_error = on_error
+        self.processed = 0
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    def add_error(self, line, message):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': message})
+        if self.on_error:
+            self.on_error(line, message)
+
+    @property
+    def rows_per_second(self):
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self):
+        return {
+            'processed': self.processed, 'inserted': self.inserted, 'updated': self.updated,
+            'unchanged': self.unchanged, 'duplicates': self.duplicates, 'error_count': self.error_count,
+            'errors': self.errors, 'seconds': round(self.elapsed, 3),
+            'rows_per_second': round(self.rows_per_second, 1)
+        }
+
+
+def _write_batch(flights_collection, bookings_collection, batch, report):
+    """Upsert satu batch (key -> (baris, flight)). Mengembalikan list (lama atau None, baru) yang tersimpan."""
+    existing = {}
+    query = {'$or': [{'flight_number': number, 'departure_time': departure} for number, departure in batch]}
+    for doc in flights_collection.find(query, EXISTING_PROJECTION):
+        existing.setdefault((doc['flight_number'], doc['departure_time']), doc)
+
+    # Upsert penerbangan baru ditaruh di depan, update penerbangan lama di belakang
+    inserts, updates = [], []
+    for (number, departure), (line, flight) in batch.items():
+        old = existing.get((number, departure))
+        if old is None:
+            new = dict(flight, available_seats=flight['total_seats'])
+            inserts.append((line, old, new, UpdateOne(
+                {'flight_number': number, 'departure_time': departure},
+                {'$setOnInsert': {k: v for k, v in new.items() if k not in ('flight_number', 'departure_time')}},
+                upsert=True
+            )))
+            continue
+        if all(old.get(field) == flight[field] for field in UPDATE_FIELDS):
+            report.unchanged += 1
+            continue
+        delta = flight['total_seats'] - old['total_seats']
+        if old['available_seats'] + delta < 0:
+            report.add_error(line, SEATS_ERROR)
+            continue
+        new = dict(old, **flight, available_seats=old['available_seats'] + delta)
+        # Selisih kursi diterapkan dengan $inc agar tidak menimpa booking yang terjadi bersamaan; filter yang
+        # sama dengan edit_flight menolak update jika kursi sudah terjual di antara pembacaan dan penulisan
+        updates.append((line, old, new, UpdateOne(
+            {'_id': old['_id'], 'total_seats': old['total_seats'], 'available_seats': {'$gte': -delta}},
+            {'$set': {field: flight[field] for field in UPDATE_FIELDS if field != 'total_seats'},
+             '$inc': {'total_seats': delta, 'available_seats': delta}}
+        )))
+    pending = inserts + updates
+    if not pending:
+        return []
+    ops = [op for _, _, _, op in pending]
+
+    failed = {}
+    try:
+        details = flights_collection.bulk_write(ops, ordered=False).bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        # 11000: upsert kalah balapan dengan impor lain pada key yang sama (index unik)
+        failed = {error['index']: DUPLICATE_ERROR if error.get('code') == 11000 else error['errmsg']
+                  for error in details.get('writeErrors', [])}
+    upserted = {item['index']: item['_id'] for item in details.get('upserted', [])}
+    # Update yang tidak lolos filter bukan write error; hasilnya dibaca ulang untuk mengetahui mana yang
+    # tersimpan dan berapa kursi sebenarnya (booking bersamaan sudah dicatat statistik sendiri)
+    stored = {doc['_id']: doc for doc in flights_collection.find(
+        {'_id': {'$in': [old['_id'] for _, old, _, _ in updates]}}, {'total_seats': 1, 'available_seats': 1}
+    )} if updates else {}
+
+    changes, snapshot_ops = [], []
+    for index, (line, old, new, _) in enumerate(pending):
+        if index in failed:
+            report.add_error(line, failed[index])
+            continue
+        if old is None:
+            if index not in upserted:
+                # Penerbangan yang sama dibuat proses lain di antara pengecekan dan penulisan
+                report.add_error(line, DUPLICATE_ERROR)
+                continue
+            new['_id'] = upserted[index]
+            report.inserted += 1
+        else:
+            doc = stored.get(old['_id'])
+            if doc is None or doc['total_seats'] != new['total_seats']:
+                report.add_error(line, SEATS_ERROR + ' (atau penerbangan baru saja berubah)')
+                continue
+            delta = new['total_seats'] - old['total_seats']
+            old = dict(old, available_seats=doc['available_seats'] - delta)
+            new['available_seats'] = doc['available_seats']
+            report.updated += 1
+            if any(old[field] != new[field] for field in ('origin', 'destination', 'arrival_time')):
+                snapshot_ops.append(UpdateMany(
+                    {'flight_id': old['_id']},
+                    {'$set': {f'flight_details.{field}': new[field]
+                              for field in ('origin', 'destination', 'departure_time', 'arrival_time')}}
+                ))
+        changes.append((old, new))
+    if snapshot_ops:
+        bookings_collection.bulk_write(snapshot_ops, ordered=False)
+    return changes
+
+
+def import_schedule(flights_collection, bookings_collection, rows, batch_size=1000, max_errors=1000,
+                    on_error=None, on_batch=None):
+    """Mengimpor baris dari `read_rows`. `on_batch(changes)` dipanggil setelah setiap batch tersimpan."""
+    report = ImportReport(max_errors, on_error)
+    started = time.perf_counter()
+    batch = {}
+
+    def flush():
+        changes = _write_batch(flights_collection, bookings_collection, batch, report)
+        batch.clear()
+        if changes and on_batch:
+            on_batch(changes)
+
+    for line, fields, error in rows:
+        report.processed += 1
+        if error is None:
+            try:
+                flight = parse_flight(fields)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            report.add_error(line, error)
+            continue
+        key = (flight['flight_number'], flight['departure_time'])
+        if key in batch:
+            report.duplicates += 1  # Baris terakhir untuk key yang sama yang dipakai
+        batch[key] = (line, flight)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    report.elapsed = time.perf_counter() - started
+    return report
+
+
+if __name__ == '__main__':
+    from airports import AirportCatalog
+    from http_cache import CollectionVersion
+    from indexes import ensure_indexes
+    from mongo_session import connect
+    from search_cache import SEARCH_VERSION
+    from stats import StatsRecorder
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('path', help='File jadwal (.csv, .jsonl, boleh diakhiri .gz)')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='Default: ditebak dari nama file')
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--errors', help='Tulis semua error per baris ke file CSV ini')
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    ensure_indexes(db)
+    stats_recorder = StatsRecorder(db)
+    airport_catalog = AirportCatalog(db['flights'], db['airports'])
+
+    def apply_changes(changes):
+        airport_catalog.flights_changed(changes)
+        stats_recorder.flights_upserted(changes)
+
+    error_file = open(args.errors, 'w', newline='', encoding='utf-8') if args.errors else None
+    error_writer = csv.writer(error_file) if error_file else None
+    if error_writer:
+        error_writer.writerow(['line', 'error'])
+    with open(args.path, 'rb') as raw:
+        rows = read_rows(open_stream(raw, args.path), args.format or detect_format(args.path))
+        report = import_schedule(db['flights'], db['bookings'], rows, batch_size=args.batch_size,
+                                 on_error=(lambda line, message: error_writer.writerow([line, message])) if error_writer else None,
+                                 on_batch=apply_changes)
+    if error_file:
+        error_file.close()
+    CollectionVersion(db['versions'], 'flights').bump()
+    CollectionVersion(db['versions'], SEARCH_VERSION).bump()
+    # Worker aplikasi membangun ulang graf rute transit begitu melihat versi jadwal berubah
+    CollectionVersion(db['versions'], 'schedule').bump()
+
+    print(f"✔️ {report.processed} baris diproses dalam {report.elapsed:.1f} detik "
+          f"({report.rows_per_second:,.0f} baris/detik)")
+    print(f"   baru: {report.inserted}, diperbarui: {report.updated}, tidak berubah: {report.unchanged}, "
+          f"duplikat: {report.duplicates}, error: {report.error_count}")
+    for item in report.errors[:10]:
+        print(f"⚠️  baris {item['line']}: {item['error']}")
@@ -0,0 +1,191 @@
+# search_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from bson.objectid import ObjectId
+from pagination import encode_token
+
+# Nama CollectionVersion yang dinaikkan setiap kali cache pencarian perlu dikosongkan di semua worker
+SEARCH_VERSION = 'search'
+
+
+# --- Backend Penyimpanan ---
+class MemorySearchBackend:
+    """Cache LRU di memori proses (tiap worker gunicorn punya salinan sendiri).
+
+    invalidate_route() hanya menghapus entri di proses ini; worker lain mengetahuinya dari versi
+    bersama yang diperiksa SearchResultCache saat membaca.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, _, _, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl, origin, destination):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, origin, destination, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_route(self, origin, destination):
+        with self._lock:
+            for key in [k for k, (_, o, d, _) in self._entries.items()
+                        if o in (origin, '') and d in (destination, '')]:
+                del self._entries[key]
+
+
+class SqliteSearchBackend:
+    """Cache di file SQLite yang bisa dipakai bersama oleh beberapa worker di host yang sama."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    def _connection(self):
+        # Koneksi dibuat per proses karena koneksi SQLite tidak aman dipakai setelah fork
+        if self._conn is None or self._pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS search_cache ('
+                               'key TEXT PRIMARY KEY, origin TEXT, destination TEXT, expires_at REAL, value TEXT)')
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, key):
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT value FROM search_cache WHERE key = ? AND expires_at > ?', (key, time.time())
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key, value, ttl, origin, destination):
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO search_cache VALUES (?, ?, ?, ?, ?)',
+                         (key, origin, destination, time.time() + ttl, json.dumps(value)))
+            conn.execute('DELETE FROM search_cache WHERE expires_at <= ?', (time.time(),))
+
+    def invalidate_route(self, origin, destination):
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM search_cache WHERE origin IN (?, '') AND destination IN (?, '')", (origin, destination)
+            )
+
+
+# --- Cache Hasil Pencarian ---
+class SearchResultCache:
+    """Menyimpan daftar _id hasil pencarian halaman pertama per (asal, tujuan, tanggal).
+
+    Kursi tidak ikut di-cache: setiap hit membaca dokumen terkini berdasarkan _id, sehingga
+    penerbangan yang baru saja penuh langsung hilang dari hasil.
+
+    Dengan `version` (CollectionVersion bersama), setiap entri menyimpan versi saat diisi dan
+    dianggap miss jika versinya sudah naik, jadi invalidasi dari satu worker (atau CLI) berlaku di
+    semua worker paling lambat setelah TTL cache versi.
+    """
+
+    def __init__(self, backend, ttl=30, depth=100, version=None):
+        self.backend = backend
+        self.version = version
+        self.ttl = ttl
+        self.depth = depth
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(origin, destination, departure_date):
+        return f'{origin}|{destination}|{departure_date}'
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def first_page(self, collection, query, origin, destination, departure_date, page_size, projection):
+        """Halaman pertama hasil pencarian, atau None jika cache tidak cukup dan harus query biasa."""
+        if page_size > self.depth:
+            return None
+        key = self.make_key(origin, destination, departure_date)
+        projection = dict(projection, available_seats=1, departure_time=1, status=1)
+        # Versi dibaca sebelum query: perubahan di tengah pengisian membuat entri ini langsung usang
+        version = self.version.get() if self.version else None
+        entry = self.backend.get(key)
+        if entry is not None and entry.get('version') != version:
+            entry = None
+
+        if entry is None:
+            self._count(hit=False)
+            sort = [('departure_time', 1), ('_id', 1)]
+            docs = list(collection.find(query, projection).sort(sort).limit(self.depth))
+            entry = {'ids': [str(doc['_id']) for doc in docs], 'complete': len(docs) < self.depth,
+                     'version': version}
+            self.backend.set(key, entry, self.ttl, origin, destination)
+        else:
+            self._count(hit=True)
+            ids = [ObjectId(doc_id) for doc_id in entry['ids']]
+            live = {doc['_id']: doc for doc in collection.find({'_id': {'$in': ids}}, projection)}
+            docs = [live[doc_id] for doc_id in ids if doc_id in live]
+
+        window = query.get('departure_time', {})
+        flights = [doc for doc in docs if doc['available_seats'] > 0 and doc.get('status') != 'cancelled'
+                   and doc['departure_time'] >= window.get('$gte', datetime.min)
+                   and doc['departure_time'] < window.get('$lt', datetime.max)]
+        if len(flights) < page_size and not entry['complete']:
+            return None
+
+        page = flights[:page_size]
+        has_more = len(flights) > page_size or not entry['complete']
+        next_token = encode_token(page[-1], 'departure_time') if page and has_more else None
+        return page, next_token
+
+    def invalidate_route(self, origin, destination):
+        self.invalidate_routes([(origin, destination)])
+
+    def invalidate_routes(self, routes):
+        """Menghapus entri rute-rute ini di backend lalu menaikkan versi bersama sekali."""
+        for origin, destination in routes:
+            self.backend.invalidate_route(origin, destination)
+        if self.version:
+            self.version.bump()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hits / total if total else 0.0}
+
+
+def create_search_cache(backend, ttl=30, depth=100, path=None, version=None):
+    """Membuat cache sesuai konfigurasi: 'memory', 'sqlite' atau 'none'.
+
+    `version` (CollectionVersion SEARCH_VERSION) wajib jika ada lebih dari satu worker atau host;
+    tanpanya invalidasi hanya berlaku di proses (memory) atau host (sqlite) yang menulis.
+    """
+    if backend == 'none':
+        return None
+    if backend == 'sqlite':
+        return SearchResultCache(SqliteSearchBackend(path or 'search_cache.sqlite3'), ttl=ttl, depth=depth,
+                                 version=version)
+    return SearchResultCache(MemorySearchBackend(), ttl=ttl, depth=depth, version=version)
@@ -1,131 +1,285 @@
 # seed_large.py
+"""Seeder data dummy dalam jumlah besar untuk load test.
+
+Contoh:
+    python seed_large.py --users 100000 --flights 200000 --bookings 10000000 --workers 8
+    python seed_large.py --bookings 1000000 --output-dir dump/ --format bson
+"""
+import argparse
+import gzip
+import os
 import random
-from pymongo import MongoClient
-from werkzeug.security import generate_password_hash
+import struct
+import time
 from datetime import datetime, timedelta
-from faker import Faker
+from multiprocessing import Pool
+import bson
+from bson import json_util
+from bson.objectid import ObjectId
+from werkzeug.security import generate_password_hash
+from airports import AirportCatalog
+from indexes import ensure_indexes
+from mongo_session import connect
+from reservation import flight_snapshot
+from stats import StatsRecorder
+from archive import FLIGHTS_PREFIX, BOOKINGS_PREFIX
 
-# Inisialisasi Faker untuk data Indonesia
-fake = Faker('id_ID')
+AIRPORTS = ['CGK', 'DPS', 'SUB', 'UPG', 'KNO', 'BPN', 'JOG', 'PLM', 'BTH', 'MDC']
+AIRLINES = ['GA', 'JT', 'QG', 'ID', 'SJ', 'IW']
+# Dibuang sebelum seeding agar dibangun ulang oleh aplikasi dari data baru; job pembatalan lama
+# merujuk penerbangan yang sudah tidak ada
+DERIVED_COLLECTIONS = ('stats', 'route_stats', 'airports', 'jobs', 'archive_buckets')
 
-# --- Konfigurasi ---
-MONGO_URI = "mongodb://localhost:27017/"
-client = MongoClient(MONGO_URI)
-db = client['booking_tiket_db']
+# _id dibuat deterministik dari indeks sehingga booking bisa merujuk pengguna/penerbangan tanpa query
+_USER_EPOCH = 1_600_000_000
+_FLIGHT_EPOCH = 1_600_000_001
 
-def seed_data():
-    """Fungsi utama untuk mengisi database dengan data dummy dalam jumlah besar."""
-    
-    # --- 1. Hapus Data Lama ---
-    print("Mulai proses seeding...")
-    try:
-        db.users.delete_many({})
-        db.flights.delete_many({})
-        db.bookings.delete_many({})
-        print("✔️ Data lama berhasil dihapus.")
-    except Exception as e:
-        print(f"❌ Error saat menghapus data: {e}")
-        return
-
-    # --- 2. Generate Data Pengguna (100 pengguna) ---
-    print("👤 Membuat 100 data pengguna...")
-    users = []
-    # Admin pertama
-    admin_user = {
-        "username": "admin", "email": "admin@tiketku.com",
-        "password": generate_password_hash("admin123"), "role": "admin",
-        "created_at": fake.past_datetime() # <-- DIPERBAIKI
-    }
-    users.append(admin_user)
-
-    # 99 pengguna biasa
-    for _ in range(99):
-        profile = fake.simple_profile()
-        users.append({
-            "username": profile['username'], "email": profile['mail'],
-            "password": generate_password_hash("user123"), "role": "user",
-            "created_at": fake.past_datetime() # <-- DIPERBAIKI
+
+def user_id(index):
+    return ObjectId(struct.pack('>IQ', _USER_EPOCH, index))
+
+
+def flight_id(index):
+    return ObjectId(struct.pack('>IQ', _FLIGHT_EPOCH, index))
+
+
+def username(index):
+    return 'admin' if index == 0 else f'user{index}'
+
+
+# --- Penulis Data ---
+class MongoSink:
+    """Menampung dokumen lalu menulisnya dengan insert_many per batch."""
+
+    def __init__(self, db, batch_size, client=None):
+        self.client = client
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+
+    def add(self, collection, doc):
+        buffer = self.buffers.setdefault(collection, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            self.flush(collection)
+
+    def flush(self, collection):
+        buffer = self.buffers.get(collection)
+        if buffer:
+            self.db[collection].insert_many(buffer, ordered=False)
+            buffer.clear()
+
+    def close(self):
+        for collection in list(self.buffers):
+            self.flush(collection)
+        if self.client is not None:
+            self.client.close()
+
+
+class FileSink:
+    """Menulis dokumen ke file terkompresi (JSONL Extended JSON atau BSON) untuk dimuat offline."""
+
+    def __init__(self, output_dir, worker, fmt):
+        self.output_dir = output_dir
+        self.worker = worker
+        self.fmt = fmt
+        self.files = {}
+
+    def add(self, collection, doc):
+        handle = self.files.get(collection)
+        if handle is None:
+            extension = 'jsonl.gz' if self.fmt == 'jsonl' else 'bson.gz'
+            path = os.path.join(self.output_dir, f'{collection}-{self.worker:03d}.{extension}')
+            handle = self.files[collection] = gzip.open(path, 'wb', compresslevel=6)
+        if self.fmt == 'jsonl':
+            handle.write(json_util.dumps(doc, json_options=json_util.CANONICAL_JSON_OPTIONS).encode() + b'\n')
+        else:
+            handle.write(bson.encode(doc))
+
+    def close(self):
+        for handle in self.files.values():
+            handle.close()
+
+
+def _make_sink(options, worker):
+    if options.get('output_dir'):
+        return FileSink(options['output_dir'], worker, options['format'])
+    if options.get('db') is not None:
+        # Database yang sudah terbuka di proses ini (misalnya stand-in in-memory untuk benchmark)
+        return MongoSink(options['db'], options['batch_size'])
+    client, db = connect(options['mongo_uri'])
+    return MongoSink(db, options['batch_size'], client=client)
+
+
+# --- Generator per Worker ---
+def seed_users(task):
+    worker, start, end, options = task
+    sink = _make_sink(options, worker)
+    created_at = datetime.now() - timedelta(days=365)
+    for index in range(start, end):
+        sink.add('users', {
+            '_id': user_id(index), 'username': username(index), 'email': f'{username(index)}@tiketku.com',
+            'password': options['admin_hash'] if index == 0 else options['user_hash'],
+            'role': 'admin' if index == 0 else 'user',
+            'created_at': created_at + timedelta(minutes=index % 525600)
         })
-    
-    try:
-        user_ids = db.users.insert_many(users).inserted_ids
-        print(f"✔️ Berhasil menambahkan {len(user_ids)} pengguna.")
-    except Exception as e:
-        print(f"❌ Error saat menambahkan pengguna: {e}")
-        return
-
-    # --- 3. Generate Data Penerbangan (150 penerbangan) ---
-    print("✈️ Membuat 150 data penerbangan...")
-    airports = ['CGK', 'DPS', 'SUB', 'UPG', 'KNO', 'BPN', 'JOG', 'PLM', 'BTH', 'MDC']
-    airlines = ['GA', 'JT', 'QG', 'ID', 'SJ', 'IW']
-    flights = []
+    sink.close()
+    return end - start
 
-    for _ in range(150):
-        origin, destination = random.sample(airports, 2)
-        departure = fake.date_time_between(start_date='-30d', end_date='+90d')
-        duration = timedelta(hours=random.randint(1, 5), minutes=random.choice([0, 15, 30, 45]))
-        arrival = departure + duration
-        total_seats = random.choice([100, 120, 150, 180])
 
+def seed_flights_and_bookings(task):
+    """Membuat penerbangan [start, end) dan booking untuk penerbangan tersebut; kursi dilacak di memori."""
+    worker, start, end, num_bookings, options = task
+    rng = random.Random(f"{options['seed']}-{worker}")
+    sink = _make_sink(options, worker)
+    span = (options['end_date'] - options['start_date']).total_seconds()
+
+    flights = []
+    for index in range(start, end):
+        origin, destination = rng.sample(AIRPORTS, 2)
+        departure = options['start_date'] + timedelta(seconds=rng.randrange(int(span)) // 900 * 900)
+        total_seats = rng.choice([100, 120, 150, 180])
         flights.append({
-            'flight_number': f"{random.choice(airlines)}{random.randint(100, 999)}",
+            '_id': flight_id(index),
+            # Unik per indeks: (flight_number, departure_time) dijaga index unik
+            'flight_number': f"{AIRLINES[index % len(AIRLINES)]}{100 + index // len(AIRLINES)}",
             'origin': origin, 'destination': destination,
-            'departure_time': departure, 'arrival_time': arrival,
-            'price': float(random.randrange(500, 3000) * 1000),
+            'departure_time': departure,
+            'arrival_time': departure + timedelta(hours=rng.randint(1, 5), minutes=rng.choice([0, 15, 30, 45])),
+            'price': float(rng.randrange(500, 3000) * 1000),
             'total_seats': total_seats, 'available_seats': total_seats
         })
-    
-    try:
-        flight_ids = db.flights.insert_many(flights).inserted_ids
-        print(f"✔️ Berhasil menambahkan {len(flight_ids)} penerbangan.")
-    except Exception as e:
-        print(f"❌ Error saat menambahkan penerbangan: {e}")
-        return
-        
-    # --- 4. Generate Data Pemesanan (300 pemesanan) ---
-    print("🎟️  Membuat 300 data pemesanan...")
-    bookings = []
-    
-    all_user_ids = [doc['_id'] for doc in db.users.find({}, {'_id': 1})]
-    all_flight_ids = [doc['_id'] for doc in db.flights.find({}, {'_id': 1})]
-
-    if not all_user_ids or not all_flight_ids:
-        print("❌ Tidak ada pengguna atau penerbangan untuk dibuatkan booking. Proses dihentikan.")
-        return
-
-    for _ in range(300):
-        flight_id = random.choice(all_flight_ids)
-        flight = db.flights.find_one({'_id': flight_id})
-        
-        if not flight:
+
+    open_flights = list(flights)
+    created = 0
+    while created < num_bookings and open_flights:
+        position = rng.randrange(len(open_flights))
+        flight = open_flights[position]
+        num_passengers = rng.randint(1, 4)
+        if flight['available_seats'] < num_passengers:
+            if flight['available_seats'] == 0:
+                open_flights[position] = open_flights[-1]
+                open_flights.pop()
             continue
+        status = rng.choice(['confirmed', 'confirmed', 'confirmed', 'cancelled'])
+        if status == 'confirmed':
+            flight['available_seats'] -= num_passengers
+        user_index = rng.randrange(options['users'])
+        sink.add('bookings', {
+            'user_id': user_id(user_index), 'username': username(user_index),
+            'flight_id': flight['_id'], 'flight_details': flight_snapshot(flight),
+            'num_passengers': num_passengers, 'total_price': flight['price'] * num_passengers,
+            'booking_date': flight['departure_time'] - timedelta(minutes=rng.randint(60, 60 * 24 * 60)),
+            'status': status
+        })
+        created += 1
+
+    # Penerbangan ditulis setelah booking sehingga available_seats langsung final, tanpa update per baris
+    for flight in flights:
+        sink.add('flights', flight)
+    sink.close()
+    return len(flights), created
 
-        num_passengers = random.randint(1, 4)
-
-        if flight['available_seats'] >= num_passengers:
-            bookings.append({
-                'user_id': random.choice(all_user_ids),
-                'flight_id': flight_id,
-                'num_passengers': num_passengers,
-                'total_price': flight['price'] * num_passengers,
-                'booking_date': fake.date_time_between(start_date='-60d', end_date='-1d'),
-                'status': random.choice(['confirmed', 'confirmed', 'confirmed', 'cancelled'])
-            })
-            
-            db.flights.update_one(
-                {'_id': flight_id},
-                {'$inc': {'available_seats': -num_passengers}}
-            )
-
-    if bookings:
-        try:
-            booking_ids = db.bookings.insert_many(bookings).inserted_ids
-            print(f"✔️ Berhasil menambahkan {len(booking_ids)} pemesanan.")
-        except Exception as e:
-            print(f"❌ Error saat menambahkan pemesanan: {e}")
 
+def drop_existing(db):
+    """Membuang data lama: koleksi utama, koleksi turunan, dan semua bucket arsip (archive.py)."""
+    archived = [name for name in db.list_collection_names() if name.startswith((FLIGHTS_PREFIX, BOOKINGS_PREFIX))]
+    for name in ('users', 'flights', 'bookings') + DERIVED_COLLECTIONS + tuple(archived):
+        db[name].drop()
+
+
+def _split(total, parts):
+    size, remainder = divmod(total, parts)
+    bounds, start = [], 0
+    for part in range(parts):
+        end = start + size + (1 if part < remainder else 0)
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def seed_data(options):
+    """Fungsi utama untuk mengisi database dengan data dummy dalam jumlah besar."""
+    print("Mulai proses seeding...")
+    if options['output_dir']:
+        os.makedirs(options['output_dir'], exist_ok=True)
+    else:
+        client, db = connect(options['mongo_uri'])
+        drop_existing(db)
+        print("✔️ Data lama berhasil dihapus.")
+
+    # Hash password cukup dihitung sekali lalu dipakai ulang oleh semua worker
+    options['admin_hash'] = generate_password_hash('admin123')
+    options['user_hash'] = generate_password_hash('user123')
+    workers = options['workers']
+    started = time.perf_counter()
+
+    with Pool(workers) as pool:
+        user_tasks = [(w, s, e, options) for w, (s, e) in enumerate(_split(options['users'], workers)) if e > s]
+        total_users = sum(pool.map(seed_users, user_tasks))
+        print(f"👤 {total_users} pengguna")
+
+        flight_bounds = _split(options['flights'], workers)
+        booking_counts = [e - s for s, e in _split(options['bookings'], workers)]
+        flight_tasks = [(w, s, e, booking_counts[w], options) for w, (s, e) in enumerate(flight_bounds) if e > s]
+        results = pool.map(seed_flights_and_bookings, flight_tasks)
+        total_flights = sum(r[0] for r in results)
+        total_bookings = sum(r[1] for r in results)
+        print(f"✈️ {total_flights} penerbangan")
+        print(f"🎟️  {total_bookings} pemesanan")
+        if total_bookings < options['bookings']:
+            print(f"⚠️  Kursi habis: hanya {total_bookings} dari {options['bookings']} pemesanan yang dibuat.")
+
+    elapsed = time.perf_counter() - started
+    rows = total_users + total_flights + total_bookings
+    print(f"⏱️  {rows} baris dalam {elapsed:.1f} detik ({rows / elapsed:,.0f} baris/detik)")
+
+    if not options['output_dir']:
+        ensure_indexes(db)
+        print("✔️ Index dibuat.")
+        # Counter dashboard dan daftar bandara dibangun sekali di sini, bukan oleh request pertama
+        StatsRecorder(db).reconcile()
+        AirportCatalog(db['flights'], db['airports']).rebuild()
+        client.close()
+        print("✔️ Statistik dashboard dan daftar bandara dibangun.")
     print("\n✅ Proses Seeding Selesai!")
-    client.close()
+
+
+def seed_in_process(db, options):
+    """Seeding tanpa process pool ke objek database yang sudah terbuka. Mengembalikan jumlah baris."""
+    drop_existing(db)
+    options = dict(options, db=db, output_dir=None,
+                   admin_hash=generate_password_hash('admin123'), user_hash=generate_password_hash('user123'))
+    total_users = seed_users((0, 0, options['users'], options))
+    total_flights, total_bookings = seed_flights_and_bookings((0, 0, options['flights'], options['bookings'], options))
+    ensure_indexes(db)
+    StatsRecorder(db).reconcile()
+    AirportCatalog(db['flights'], db['airports']).rebuild()
+    return total_users, total_flights, total_bookings
+
+
+def _parse_date(value):
+    return datetime.strptime(value, '%Y-%m-%d')
+
 
 if __name__ == '__main__':
-    seed_data()
\ No newline at end of file
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--flights', type=int, default=150)
+    parser.add_argument('--bookings', type=int, default=300)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--start-date', type=_parse_date, default=today - timedelta(days=30),
+                        help='Awal rentang keberangkatan (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=_parse_date, default=today + timedelta(days=90),
+                        help='Akhir rentang keberangkatan (YYYY-MM-DD)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--output-dir', help='Tulis file terkompresi ke direktori ini alih-alih ke MongoDB')
+    parser.add_argument('--format', choices=['jsonl', 'bson'], default='jsonl')
+    args = parser.parse_args()
+
+    if args.users < 1 or args.end_date <= args.start_date:
+        parser.error('Minimal satu pengguna dan --end-date harus setelah --start-date.')
+    seed_data(vars(args))
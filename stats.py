@@ -0,0 +1,300 @@
+# stats.py
+import argparse
+import os
+from datetime import datetime
+from pymongo import UpdateOne
+from archive import FlightArchive
+from mongo_session import connect
+
+GLOBAL_ID = 'global'
+COUNTER_FIELDS = ('total_users', 'total_flights', 'total_bookings', 'total_revenue')
+ROUTE_FIELDS = ('flights', 'seats_total', 'seats_sold', 'bookings', 'revenue')
+
+
+def _day(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def _route_key(flight):
+    day = _day(flight['departure_time'])
+    return {
+        '_id': f"{flight['origin']}-{flight['destination']}|{day.strftime('%Y-%m-%d')}",
+        'origin': flight['origin'],
+        'destination': flight['destination'],
+        'day': day
+    }
+
+
+def _add_route_deltas(routes, flight, deltas):
+    # Mengakumulasi delta per dokumen route_stats agar satu batch cukup satu bulk_write
+    key = _route_key(flight)
+    totals = routes.setdefault(key['_id'], (key, dict.fromkeys(ROUTE_FIELDS, 0)))[1]
+    for field, delta in deltas.items():
+        totals[field] += delta
+
+
+class StatsRecorder:
+    """Counter dashboard yang diperbarui dengan $inc, plus statistik pendapatan dan load factor per rute per hari.
+
+    Koleksi `stats` berisi satu dokumen global; koleksi `route_stats` berisi satu dokumen per
+    (asal, tujuan, tanggal keberangkatan). Dashboard cukup membaca dokumen-dokumen kecil ini.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.stats_collection = db['stats']
+        self.route_stats_collection = db['route_stats']
+
+    # --- Pembaruan Inkremental ---
+    def _inc_global(self, **deltas):
+        # Upsert: request tidak pernah menghitung ulang. Counter yang belum dibangun (database baru
+        # hasil seeding) dilengkapi oleh reconcile() di akhir seeding atau lewat CLI stats.py.
+        self.stats_collection.update_one({'_id': GLOBAL_ID}, {'$inc': deltas}, upsert=True)
+
+    def _inc_route(self, flight, **deltas):
+        key = _route_key(flight)
+        self.route_stats_collection.update_one(
+            {'_id': key['_id']},
+            {'$inc': deltas, '$setOnInsert': {k: v for k, v in key.items() if k != '_id'}},
+            upsert=True
+        )
+
+    def user_registered(self):
+        self._inc_global(total_users=1)
+
+    def user_deleted(self):
+        self._inc_global(total_users=-1)
+
+    def flight_added(self, flight):
+        self._inc_global(total_flights=1)
+        self._inc_route(flight, flights=1, seats_total=flight['total_seats'])
+
+    def flight_deleted(self, flight):
+        self._inc_global(total_flights=-1)
+        self._inc_route(flight, flights=-1, seats_total=-flight['total_seats'],
+                        seats_sold=-(flight['total_seats'] - flight['available_seats']))
+
+    def flight_changed(self, old_flight, new_flight):
+        """Memindahkan kontribusi penerbangan jika rute/tanggal atau total kursi berubah."""
+        old_sold = old_flight['total_seats'] - old_flight['available_seats']
+        new_sold = new_flight['total_seats'] - new_flight['available_seats']
+        if _route_key(old_flight)['_id'] == _route_key(new_flight)['_id']:
+            if old_flight['total_seats'] != new_flight['total_seats'] or old_sold != new_sold:
+                self._inc_route(new_flight, seats_total=new_flight['total_seats'] - old_flight['total_seats'],
+                                seats_sold=new_sold - old_sold)
+            return
+        bookings, revenue = route_revenue_for_flight(self.db['bookings'], old_flight['_id'])
+        self._inc_route(old_flight, flights=-1, seats_total=-old_flight['total_seats'], seats_sold=-old_sold,
+                        bookings=-bookings, revenue=-revenue)
+        self._inc_route(new_flight, flights=1, seats_total=new_flight['total_seats'], seats_sold=new_sold,
+                        bookings=bookings, revenue=revenue)
+
+    def flights_upserted(self, changes):
+        """Versi batch dari flight_added/flight_changed untuk impor jadwal: list tuple (lama atau None, baru)."""
+        self._inc_global(total_flights=sum(1 for old_flight, _ in changes if old_flight is None))
+        routes = {}
+
+        def add(flight, **deltas):
+            _add_route_deltas(routes, flight, deltas)
+
+        for old_flight, new_flight in changes:
+            new_sold = new_flight['total_seats'] - new_flight['available_seats']
+            if old_flight is None:
+                add(new_flight, flights=1, seats_total=new_flight['total_seats'])
+                continue
+            old_sold = old_flight['total_seats'] - old_flight['available_seats']
+            if _route_key(old_flight)['_id'] == _route_key(new_flight)['_id']:
+                add(new_flight, seats_total=new_flight['total_seats'] - old_flight['total_seats'],
+                    seats_sold=new_sold - old_sold)
+                continue
+            bookings, revenue = route_revenue_for_flight(self.db['bookings'], old_flight['_id'])
+            add(old_flight, flights=-1, seats_total=-old_flight['total_seats'], seats_sold=-old_sold,
+                bookings=-bookings, revenue=-revenue)
+            add(new_flight, flights=1, seats_total=new_flight['total_seats'], seats_sold=new_sold,
+                bookings=bookings, revenue=revenue)
+
+        self._write_routes(routes)
+
+    def _write_routes(self, routes):
+        ops = [UpdateOne({'_id': route_id},
+                         {'$inc': {field: delta for field, delta in totals.items() if delta},
+                          '$setOnInsert': {k: v for k, v in key.items() if k != '_id'}},
+                         upsert=True)
+               for route_id, (key, totals) in routes.items() if any(totals.values())]
+        if ops:
+            self.route_stats_collection.bulk_write(ops, ordered=False)
+
+    def booking_confirmed(self, booking, flight):
+        self.bookings_changed(confirmed=[(booking, flight)])
+
+    def booking_cancelled(self, booking, flight):
+        self.bookings_changed(cancelled=[(booking, flight)])
+
+    def bookings_changed(self, confirmed=(), cancelled=()):
+        """Mencatat banyak booking (list tuple (booking, flight)) dengan satu $inc global dan satu bulk_write rute.
+
+        Dipakai BookingCoalescer sekali per batch agar flash sale tidak menulis counter per booking.
+        """
+        changes = [(booking, flight, 1) for booking, flight in confirmed] + \
+                  [(booking, flight, -1) for booking, flight in cancelled]
+        if not changes:
+            return
+        routes = {}
+        for booking, flight, sign in changes:
+            _add_route_deltas(routes, flight, {'seats_sold': sign * booking['num_passengers'], 'bookings': sign,
+                                               'revenue': sign * booking['total_price']})
+        self._inc_global(total_bookings=sum(sign for _, _, sign in changes),
+                         total_revenue=sum(sign * booking['total_price'] for booking, _, sign in changes))
+        self._write_routes(routes)
+
+    def flight_cancelled(self, flight, bookings, passengers, revenue):
+        """Pembatalan penerbangan oleh maskapai: semua booking batal sekaligus dan kursinya kembali."""
+        self._inc_global(total_bookings=-bookings, total_revenue=-revenue)
+        if flight is not None:  # None: penerbangan sudah dihapus, kontribusi rutenya ikut hilang
+            self._inc_route(flight, seats_sold=-passengers, bookings=-bookings, revenue=-revenue)
+
+    # --- Pembacaan Dashboard ---
+    def is_reconciled(self):
+        """True jika counter pernah dibangun penuh oleh reconcile(); tanpa itu counter hanya berisi delta."""
+        return bool(self.stats_collection.find_one({'_id': GLOBAL_ID, 'reconciled_at': {'$exists': True}},
+                                                   {'_id': 1}))
+
+    def reconcile_if_empty(self):
+        """Menandai counter terekonsiliasi pada database yang belum berisi data (tidak ada yang perlu dihitung).
+
+        Dipanggil saat aplikasi mulai; tanpa ini database baru akan selamanya tampil "belum direkonsiliasi"
+        karena counter hanya berisi delta. Mengembalikan True jika counter (kini) terekonsiliasi.
+        """
+        if self.is_reconciled():
+            return True
+        db = self.db
+        if any(db[name].estimated_document_count() for name in ('users', 'flights', 'bookings')) \
+                or FlightArchive(db).years():
+            return False
+        self.reconcile()
+        return True
+
+    def summary(self):
+        doc = self.stats_collection.find_one({'_id': GLOBAL_ID})
+        return {field: (doc or {}).get(field, 0) for field in COUNTER_FIELDS}
+
+    def route_summary(self, start, end, limit=10):
+        """Pendapatan dan load factor per rute untuk penerbangan yang berangkat pada [start, end)."""
+        pipeline = [
+            {'$match': {'day': {'$gte': _day(start), '$lt': end}}},
+            {'$group': {'_id': {'origin': '$origin', 'destination': '$destination'},
+                        **{field: {'$sum': f'${field}'} for field in ROUTE_FIELDS}}},
+            {'$sort': {'revenue': -1}},
+            {'$limit': limit}
+        ]
+        routes = []
+        for doc in self.route_stats_collection.aggregate(pipeline):
+            doc.update(doc.pop('_id'))
+            doc['load_factor'] = doc['seats_sold'] / doc['seats_total'] if doc['seats_total'] else 0.0
+            routes.append(doc)
+        return routes
+
+    def daily_summary(self, start, end):
+        """Pendapatan dan load factor per hari keberangkatan pada [start, end)."""
+        pipeline = [
+            {'$match': {'day': {'$gte': _day(start), '$lt': end}}},
+            {'$group': {'_id': '$day', **{field: {'$sum': f'${field}'} for field in ROUTE_FIELDS}}},
+            {'$sort': {'_id': 1}}
+        ]
+        days = []
+        for doc in self.route_stats_collection.aggregate(pipeline):
+            doc['day'] = doc.pop('_id')
+            doc['load_factor'] = doc['seats_sold'] / doc['seats_total'] if doc['seats_total'] else 0.0
+            days.append(doc)
+        return days
+
+    # --- Rekonsiliasi ---
+    def compute(self):
+        """Menghitung ulang semua counter dari nol dengan agregasi (termasuk bucket arsip)."""
+        db = self.db
+        archive = FlightArchive(db)
+        years = archive.years()
+        by_flight = {}
+        for bookings_collection in [db.bookings] + [archive.bookings(year) for year in years]:
+            for doc in bookings_collection.aggregate([
+                {'$match': {'status': 'confirmed'}},
+                {'$group': {'_id': '$flight_id', 'bookings': {'$sum': 1}, 'revenue': {'$sum': '$total_price'}}}
+            ]):
+                sold = by_flight.setdefault(doc['_id'], {'bookings': 0, 'revenue': 0})
+                sold['bookings'] += doc['bookings']
+                sold['revenue'] += doc['revenue']
+
+        routes = {}
+        total_flights = 0
+        projection = {'origin': 1, 'destination': 1, 'departure_time': 1, 'total_seats': 1, 'available_seats': 1}
+        for flights_collection in [db.flights] + [archive.flights(year) for year in years]:
+            for flight in flights_collection.find({}, projection).batch_size(1000):
+                total_flights += 1
+                key = _route_key(flight)
+                route = routes.setdefault(key['_id'], dict(key, **{field: 0 for field in ROUTE_FIELDS}))
+                sold = by_flight.get(flight['_id'], {})
+                route['flights'] += 1
+                route['seats_total'] += flight['total_seats']
+                route['seats_sold'] += flight['total_seats'] - flight['available_seats']
+                route['bookings'] += sold.get('bookings', 0)
+                route['revenue'] += sold.get('revenue', 0)
+
+        totals = {
+            'total_users': db.users.count_documents({}),
+            'total_flights': total_flights,
+            'total_bookings': sum(doc['bookings'] for doc in by_flight.values()),
+            'total_revenue': sum(doc['revenue'] for doc in by_flight.values())
+        }
+        return totals, routes
+
+    def reconcile(self, apply=True):
+        """Membandingkan counter tersimpan dengan hasil hitung ulang. Mengembalikan drift per counter."""
+        totals, routes = self.compute()
+        current = self.summary()
+        drift = {field: current[field] - totals[field] for field in COUNTER_FIELDS if current[field] != totals[field]}
+
+        stored_routes = {doc['_id']: doc for doc in self.route_stats_collection.find()}
+        route_drift = 0
+        for route_id in set(stored_routes) | set(routes):
+            stored, fresh = stored_routes.get(route_id, {}), routes.get(route_id, {})
+            if any(stored.get(field, 0) != fresh.get(field, 0) for field in ROUTE_FIELDS):
+                route_drift += 1
+        if route_drift:
+            drift['route_stats'] = route_drift
+
+        if apply:
+            self.stats_collection.replace_one({'_id': GLOBAL_ID},
+                                              dict(totals, _id=GLOBAL_ID, reconciled_at=datetime.now()), upsert=True)
+            self.route_stats_collection.delete_many({'_id': {'$nin': list(routes)}})
+            ops = [UpdateOne({'_id': route_id}, {'$set': {k: v for k, v in doc.items() if k != '_id'}}, upsert=True)
+                   for route_id, doc in routes.items()]
+            if ops:
+                self.route_stats_collection.bulk_write(ops, ordered=False)
+        return drift
+
+
+def route_revenue_for_flight(bookings_collection, flight_id):
+    """Jumlah booking dan pendapatan terkonfirmasi satu penerbangan (dipakai saat rute/tanggal diubah)."""
+    docs = list(bookings_collection.aggregate([
+        {'$match': {'flight_id': flight_id, 'status': 'confirmed'}},
+        {'$group': {'_id': None, 'bookings': {'$sum': 1}, 'revenue': {'$sum': '$total_price'}}}
+    ]))
+    return (docs[0]['bookings'], docs[0]['revenue']) if docs else (0, 0)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rekonsiliasi statistik dashboard admin.')
+    parser.add_argument('--mongo-uri', default=os.environ.get('MONGO_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--dry-run', action='store_true', help='Hanya laporkan drift tanpa menulis ulang counter')
+    args = parser.parse_args()
+
+    client, db = connect(args.mongo_uri)
+    drift = StatsRecorder(db).reconcile(apply=not args.dry_run)
+    if drift:
+        for field, value in drift.items():
+            print(f"⚠️  {field}: drift {value}")
+    else:
+        print("✅ Tidak ada drift pada counter.")
+    if not args.dry_run:
+        print("✔️ Counter telah dibangun ulang.")
+    client.close()
@@ -0,0 +1,69 @@
+# tests/conftest.py
+"""Fixture bersama.
+
+Dengan MONGO_URI, test berjalan terhadap mongod sungguhan di database terpisah (MONGO_TEST_DB).
+Tanpa MONGO_URI, aplikasi memakai mongomock sehingga test yang tidak butuh fitur server
+(explain, transaksi, replica set) tetap berjalan di CI; test semacam itu memakai fixture `real_mongo`.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TEST_DATABASE = os.environ.get('MONGO_TEST_DB', 'booking_tiket_test')
+REAL_MONGO = bool(os.environ.get('MONGO_URI'))
+
+
+@pytest.fixture(scope='session')
+def app_module():
+    if TEST_DATABASE == 'booking_tiket_db':
+        pytest.exit('MONGO_TEST_DB tidak boleh sama dengan database utama.')
+    if not REAL_MONGO:
+        mongomock = pytest.importorskip('mongomock')
+        import mongo_session
+        # MongoSession membuat client lewat nama ini (from pymongo import MongoClient)
+        mongo_session.MongoClient = mongomock.MongoClient
+    # Harus diset sebelum app diimpor: nama database dibaca saat modul dimuat
+    os.environ['MONGO_DB'] = TEST_DATABASE
+    import app
+    app.app.config['TESTING'] = True
+    yield app
+    app.client.drop_database(TEST_DATABASE)
+
+
+@pytest.fixture
+def real_mongo():
+    """Untuk test yang membutuhkan mongod sungguhan (explain, konkurensi, replica set)."""
+    if not REAL_MONGO:
+        pytest.skip('MONGO_URI tidak diset; test ini membutuhkan mongod sungguhan.')
+
+
+@pytest.fixture
+def db(app_module):
+    """Database test yang dikosongkan sebelum setiap test (index tetap dipertahankan)."""
+    for name in app_module.db.list_collection_names():
+        if not name.startswith('system.'):
+            app_module.db[name].delete_many({})
+    app_module.user_cache.clear()
+    return app_module.db
+
+
+@pytest.fixture
+def mock_db():
+    """Database mongomock kosong untuk test modul yang tidak memerlukan aplikasi."""
+    mongomock = pytest.importorskip('mongomock')
+    # Client mongomock dengan host yang sama berbagi data, jadi dipakai nama database sendiri
+    client = mongomock.MongoClient()
+    client.drop_database('booking_tiket_unit')
+    return client['booking_tiket_unit']
+
+
+@pytest.fixture
+def login_as():
+    """Masuk sebagai pengguna tanpa melewati hash password (Flask-Login membaca _user_id dari session)."""
+    def login(test_client, user_id):
+        with test_client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+    return login
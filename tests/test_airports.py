@@ -0,0 +1,49 @@
+# tests/test_airports.py
+"""Daftar bandara: pembaruan inkremental, dan rebuild yang tidak pernah berjalan di dalam request."""
+import threading
+import time
+from airports import AirportCatalog
+
+
+def flight(origin, destination):
+    return {'origin': origin, 'destination': destination}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_unbuilt_collection_is_rebuilt_in_background(mock_db, monkeypatch):
+    mock_db.flights.insert_many([flight('CGK', 'DPS'), flight('CGK', 'SUB')])
+    catalog = AirportCatalog(mock_db.flights, mock_db.airports)
+    release = threading.Event()
+    rebuild = catalog.rebuild
+    monkeypatch.setattr(catalog, 'rebuild', lambda: release.wait(5) and rebuild())
+
+    # Request tidak menunggu rebuild: daftar kosong dan tidak di-cache
+    assert catalog.get() == []
+    release.set()
+    wait_for(lambda: catalog.get() == ['CGK', 'DPS', 'SUB'])
+    assert {doc['_id']: doc['flights'] for doc in mock_db.airports.find()} == {'CGK': 2, 'DPS': 1, 'SUB': 1}
+
+
+def test_rebuild_upserts_in_place_and_drops_unused_codes(mock_db):
+    mock_db.flights.insert_many([flight('CGK', 'DPS')])
+    mock_db.airports.insert_many([{'_id': 'CGK', 'flights': 7}, {'_id': 'KNO', 'flights': 1}])
+    catalog = AirportCatalog(mock_db.flights, mock_db.airports)
+
+    assert catalog.rebuild() == ['CGK', 'DPS']
+    assert {doc['_id']: doc['flights'] for doc in mock_db.airports.find()} == {'CGK': 1, 'DPS': 1}
+
+
+def test_changes_are_applied_incrementally(mock_db):
+    catalog = AirportCatalog(mock_db.flights, mock_db.airports)
+    mock_db.airports.insert_one({'_id': 'CGK', 'flights': 1})
+    catalog.flight_added(flight('CGK', 'DPS'))
+    catalog.flight_changed(flight('CGK', 'DPS'), flight('CGK', 'KNO'))
+    assert catalog.get() == ['CGK', 'KNO']
+    catalog.flight_removed(flight('CGK', 'KNO'))
+    assert catalog.get() == ['CGK']
@@ -0,0 +1,57 @@
+# tests/test_api_etag.py
+"""ETag API: 304 selama data tidak berubah, ETag baru setelah versi naik atau bucket waktu berganti."""
+from datetime import datetime, timedelta
+import pytest
+
+
+def insert_flight(db, hours_ahead=24):
+    departure = datetime.now() + timedelta(hours=hours_ahead)
+    return db.flights.insert_one({
+        'flight_number': 'GA1', 'origin': 'CGK', 'destination': 'DPS', 'departure_time': departure,
+        'arrival_time': departure + timedelta(hours=2), 'price': 1000.0, 'total_seats': 10, 'available_seats': 10
+    }).inserted_id
+
+
+def test_unchanged_search_is_answered_with_304(app_module, db, monkeypatch):
+    insert_flight(db)
+    now = app_module.time.time()
+    monkeypatch.setattr(app_module.time, 'time', lambda: now)
+    test_client = app_module.app.test_client()
+    first = test_client.get('/api/flights?origin=CGK')
+    assert first.status_code == 200 and len(first.get_json()['flights']) == 1
+    again = test_client.get('/api/flights?origin=CGK', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304 and again.headers['ETag'] == first.headers['ETag']
+
+    app_module.flights_version.bump()
+    changed = test_client.get('/api/flights?origin=CGK', headers={'If-None-Match': first.headers['ETag']})
+    assert changed.status_code == 200
+
+
+def test_search_without_date_expires_with_the_time_bucket(app_module, db, monkeypatch):
+    insert_flight(db)
+    now = app_module.time.time()
+    monkeypatch.setattr(app_module.time, 'time', lambda: now)
+    test_client = app_module.app.test_client()
+    etag = test_client.get('/api/flights').headers['ETag']
+    dated = test_client.get(f"/api/flights?departure_date={(datetime.now() + timedelta(days=1)):%Y-%m-%d}")
+
+    monkeypatch.setattr(app_module.time, 'time', lambda: now + app_module.API_TIME_BUCKET_SECONDS)
+    # "Mulai sekarang" sudah bergeser: klien harus menerima isi baru meskipun versi data sama
+    assert test_client.get('/api/flights', headers={'If-None-Match': etag}).status_code == 200
+    # Pencarian bertanggal tidak bergantung pada waktu sekarang
+    again = test_client.get(dated.request.full_path, headers={'If-None-Match': dated.headers['ETag']})
+    assert again.status_code == 304
+
+
+def test_connections_etag_follows_the_graph_build(app_module, db, monkeypatch):
+    if not app_module.route_graph:
+        pytest.skip('CONNECTING_SEARCH=0')
+    now = app_module.time.time()
+    monkeypatch.setattr(app_module.time, 'time', lambda: now)  # Bucket waktu tetap selama test
+    test_client = app_module.app.test_client()
+    url = '/api/connections?origin=CGK&destination=DPS'
+    monkeypatch.setattr(type(app_module.route_graph), 'loaded_version', property(lambda graph: 1))
+    etag = test_client.get(url).headers['ETag']
+    assert test_client.get(url, headers={'If-None-Match': etag}).status_code == 304
+    monkeypatch.setattr(type(app_module.route_graph), 'loaded_version', property(lambda graph: 2))
+    assert test_client.get(url, headers={'If-None-Match': etag}).status_code == 200
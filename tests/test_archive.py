@@ -0,0 +1,69 @@
+# tests/test_archive.py
+"""Arsip per tahun: penerbangan lama beserta booking-nya pindah ke bucket, dan dapat dibaca kembali."""
+from datetime import datetime, timedelta
+from archive import FlightArchive
+
+NOW = datetime(2025, 3, 1, 12, 0)
+
+
+def insert_flight(db, flight_number, departure, user_ids=()):
+    flight_id = db.flights.insert_one({
+        'flight_number': flight_number, 'origin': 'CGK', 'destination': 'DPS',
+        'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+        'price': 1000.0, 'total_seats': 10, 'available_seats': 10
+    }).inserted_id
+    for index, user_id in enumerate(user_ids):
+        db.bookings.insert_one({'user_id': user_id, 'username': f'user-{user_id}', 'flight_id': flight_id,
+                                'booking_date': departure - timedelta(days=10 - index), 'status': 'confirmed',
+                                'num_passengers': 1, 'total_price': 1000.0})
+    return flight_id
+
+
+def test_run_moves_old_flights_and_bookings_into_year_buckets(mock_db):
+    insert_flight(mock_db, 'OLD24', datetime(2024, 6, 1, 8), user_ids=['u1', 'u2'])
+    insert_flight(mock_db, 'OLD25', datetime(2025, 1, 10, 8), user_ids=['u1'])
+    recent = insert_flight(mock_db, 'NEW25', datetime(2025, 2, 20, 8), user_ids=['u2'])
+    archive = FlightArchive(mock_db, horizon_days=30, batch_size=1)
+
+    assert archive.pending(NOW) == 2
+    batches = []
+    assert archive.run(NOW, on_batch=batches.append) == (2, 3)
+    assert [[flight['flight_number'] for flight in batch] for batch in batches] == [['OLD24'], ['OLD25']]
+
+    assert [flight['_id'] for flight in mock_db.flights.find()] == [recent]
+    assert mock_db.bookings.count_documents({}) == 1
+    assert archive.years() == [2025, 2024]
+    assert archive.flights(2024).find_one()['flight_number'] == 'OLD24'
+    assert archive.bookings(2024).count_documents({}) == 2
+    assert {doc['_id']: (doc['flights'], doc['bookings']) for doc in mock_db.archive_buckets.find()} == \
+        {2024: (1, 2), 2025: (1, 1)}
+    assert archive.pending(NOW) == 0
+
+
+def test_rerun_after_interruption_does_not_duplicate(mock_db):
+    insert_flight(mock_db, 'OLD24', datetime(2024, 6, 1, 8), user_ids=['u1'])
+    archive = FlightArchive(mock_db, horizon_days=30)
+    # Salinan sudah tersimpan tetapi penghapusan dari koleksi aktif belum sempat berjalan
+    flight = mock_db.flights.find_one()
+    archive._ensure_bucket(2024)
+    archive.flights(2024).insert_one(dict(flight))
+    archive.bookings(2024).insert_one(mock_db.bookings.find_one())
+
+    assert archive.run(NOW) == (1, 1)
+    assert archive.flights(2024).count_documents({}) == 1
+    assert archive.bookings(2024).count_documents({}) == 1
+    assert mock_db.flights.count_documents({}) == 0 and mock_db.bookings.count_documents({}) == 0
+    assert archive.run(NOW) == (0, 0)
+
+
+def test_user_bookings_merge_buckets_newest_first_and_usernames_can_be_cleared(mock_db):
+    insert_flight(mock_db, 'OLD23', datetime(2023, 12, 30, 8), user_ids=['u1'])
+    insert_flight(mock_db, 'OLD24', datetime(2024, 6, 1, 8), user_ids=['u1', 'u2'])
+    archive = FlightArchive(mock_db, horizon_days=30)
+    archive.run(NOW)
+
+    history = list(archive.user_bookings('u1'))
+    assert [booking['booking_date'].year for booking in history] == [2024, 2023]
+    archive.clear_username('u1')
+    assert all(booking['username'] is None for booking in archive.user_bookings('u1'))
+    assert next(archive.user_bookings('u2'))['username'] == 'user-u2'
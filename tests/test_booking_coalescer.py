@@ -0,0 +1,61 @@
+# tests/test_booking_coalescer.py
+"""BookingCoalescer: batch per penerbangan, batas kursi, dan pencatatan statistik sekali per batch."""
+import threading
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+import reservation
+from booking_coalescer import BookingCoalescer
+from stats import StatsRecorder
+
+
+def insert_flight(db, seats):
+    departure = datetime.now() + timedelta(days=3)
+    return db.flights.insert_one({
+        'flight_number': 'GA900', 'origin': 'CGK', 'destination': 'DPS',
+        'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+        'price': 1000.0, 'total_seats': seats, 'available_seats': seats
+    }).inserted_id
+
+
+def test_concurrent_requests_share_one_batch_and_one_stats_write(mock_db):
+    flight_id = insert_flight(mock_db, seats=5)
+    recorder = StatsRecorder(mock_db)
+    batches = []
+
+    def on_batch(results):
+        batches.append(results)
+        recorder.bookings_changed(confirmed=[(b, f) for status, b, f in results if status == reservation.RESERVED])
+
+    coalescer = BookingCoalescer(mock_db.flights, mock_db.bookings, max_wait=0.2, max_batch=100, on_batch=on_batch)
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def book(passengers):
+        barrier.wait()
+        statuses.append(coalescer.submit(flight_id, ObjectId(), passengers)[0])
+
+    threads = [threading.Thread(target=book, args=(1 + index % 2,)) for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(batches) == 1 and coalescer.stats()['batches'] == 1
+    confirmed = mock_db.bookings.count_documents({'flight_id': flight_id})
+    assert statuses.count(reservation.RESERVED) == confirmed
+    assert mock_db.flights.find_one({'_id': flight_id})['available_seats'] == \
+        5 - sum(b['num_passengers'] for b in mock_db.bookings.find())
+    assert recorder.summary()['total_bookings'] == confirmed
+    route = mock_db.route_stats.find_one()
+    assert (route['bookings'], route['seats_sold']) == (confirmed, 5 - mock_db.flights.find_one()['available_seats'])
+
+
+def test_failed_stats_callback_does_not_fail_bookings(mock_db):
+    flight_id = insert_flight(mock_db, seats=2)
+
+    def on_batch(results):
+        raise RuntimeError('stats down')
+
+    coalescer = BookingCoalescer(mock_db.flights, mock_db.bookings, max_wait=0.001, on_batch=on_batch)
+    assert coalescer.submit(flight_id, ObjectId(), 2)[0] == reservation.RESERVED
+    assert coalescer.submit(flight_id, ObjectId(), 1)[0] == reservation.INSUFFICIENT_SEATS
@@ -0,0 +1,39 @@
+# tests/test_connections.py
+"""Pencarian transit: rentang keberangkatan tanpa tanggal terbatas dan ditampilkan di halaman serta API."""
+from datetime import datetime, timedelta
+
+
+def insert_leg(db, flight_number, origin, destination, departure, hours=2):
+    db.flights.insert_one({
+        'flight_number': flight_number, 'origin': origin, 'destination': destination, 'departure_time': departure,
+        'arrival_time': departure + timedelta(hours=hours), 'price': 500.0, 'total_seats': 10, 'available_seats': 10
+    })
+
+
+def test_search_without_date_reports_its_shorter_window(app_module, db):
+    departure = (datetime.now() + timedelta(days=3)).replace(hour=6, minute=0, second=0, microsecond=0)
+    insert_leg(db, 'K1', 'KNO', 'CGK', departure)
+    insert_leg(db, 'C1', 'CGK', 'DPS', departure + timedelta(hours=3))
+    app_module.route_graph.rebuild()
+    test_client = app_module.app.test_client()
+
+    payload = test_client.get('/api/connections?origin=KNO&destination=DPS').get_json()
+    assert payload['itineraries'] == []
+    window = datetime.fromisoformat(payload['departure_to']) - datetime.fromisoformat(payload['departure_from'])
+    assert window == timedelta(hours=app_module.CONNECTION_WINDOW_HOURS)
+
+    dated = test_client.get(f'/api/connections?origin=KNO&destination=DPS&departure_date={departure:%Y-%m-%d}')
+    assert len(dated.get_json()['itineraries']) == 1
+
+
+def test_index_labels_the_connection_window(app_module, db):
+    departure = datetime.now() + timedelta(hours=2)
+    insert_leg(db, 'K1', 'KNO', 'CGK', departure)
+    insert_leg(db, 'C1', 'CGK', 'DPS', departure + timedelta(hours=3))
+    app_module.route_graph.rebuild()
+    test_client = app_module.app.test_client()
+
+    page = test_client.get('/?origin=KNO&destination=DPS').data.decode()
+    assert 'Penerbangan Transit' in page and 'Menampilkan keberangkatan hingga' in page
+    page = test_client.get(f'/?origin=KNO&destination=DPS&departure_date={departure:%Y-%m-%d}').data.decode()
+    assert 'Penerbangan Transit' in page and 'Menampilkan keberangkatan hingga' not in page
@@ -0,0 +1,92 @@
+# tests/test_exports.py
+"""Ekspor streaming: isi CSV/JSONL, filter admin bersama, gzip, dan penggabungan dengan bucket arsip."""
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from admin_queries import bookings_query, flights_query
+from archive import FlightArchive
+from exports import BOOKING_COLUMNS, FLIGHT_COLUMNS, archive_years, export_chunks, gzip_chunks
+
+
+def insert_flight(db, flight_number, departure, origin='CGK', destination='DPS'):
+    flight = {'flight_number': flight_number, 'origin': origin, 'destination': destination,
+              'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+              'price': 1000.0, 'total_seats': 10, 'available_seats': 9}
+    flight['_id'] = db.flights.insert_one(flight).inserted_id
+    return flight
+
+
+def insert_booking(db, user_id, flight, booking_date, status='confirmed'):
+    details = {key: flight[key] for key in ('flight_number', 'origin', 'destination', 'departure_time', 'arrival_time')}
+    return db.bookings.insert_one({'user_id': user_id, 'username': 'andi', 'flight_id': flight['_id'],
+                                   'flight_details': details, 'booking_date': booking_date, 'status': status,
+                                   'num_passengers': 1, 'total_price': 1000.0}).inserted_id
+
+
+def read_csv(chunks):
+    return list(csv.DictReader(io.StringIO(''.join(chunks))))
+
+
+def test_bookings_csv_includes_email_and_applies_filters(mock_db):
+    user_id = mock_db.users.insert_one({'username': 'andi', 'email': 'andi@test'}).inserted_id
+    to_bali = insert_flight(mock_db, 'GA1', datetime(2025, 2, 1, 8))
+    to_medan = insert_flight(mock_db, 'GA2', datetime(2025, 2, 1, 9), destination='KNO')
+    insert_booking(mock_db, user_id, to_bali, datetime(2025, 1, 15, 10))
+    insert_booking(mock_db, user_id, to_medan, datetime(2025, 1, 15, 9))
+    insert_booking(mock_db, user_id, to_bali, datetime(2025, 1, 16, 9), status='cancelled')
+    insert_booking(mock_db, user_id, to_bali, datetime(2025, 1, 20, 9))
+
+    chunks = list(export_chunks(mock_db, 'bookings', 'csv', bookings_query('2025-01-15', '2025-01-16')))
+    assert chunks[0].splitlines()[0] == ','.join(BOOKING_COLUMNS)
+    rows = read_csv(chunks)
+    assert [row['flight_number'] for row in rows] == ['GA2', 'GA1', 'GA1']
+    assert {row['email'] for row in rows} == {'andi@test'}
+    assert rows[0]['booking_date'] == '2025-01-15 09:00:00' and rows[0]['user_id'] == str(user_id)
+
+    query = bookings_query('2025-01-15', '2025-01-16', status='confirmed', destination='dps')
+    assert [row['booking_date'] for row in read_csv(export_chunks(mock_db, 'bookings', 'csv', query))] == \
+        ['2025-01-15 10:00:00']
+
+
+def test_flights_jsonl_and_gzip(mock_db):
+    first = insert_flight(mock_db, 'GA1', datetime(2025, 2, 1, 8))
+    insert_flight(mock_db, 'GA2', datetime(2025, 2, 2, 8), origin='SUB')
+    insert_flight(mock_db, 'GA3', datetime(2025, 2, 3, 8))
+
+    chunks = list(export_chunks(mock_db, 'flights', 'jsonl', flights_query('2025-02-01', '2025-02-02', origin='cgk')))
+    rows = [json.loads(line) for line in ''.join(chunks).splitlines()]
+    assert rows == [{column: value for column, value in zip(FLIGHT_COLUMNS, (
+        str(first['_id']), 'GA1', 'CGK', 'DPS', '2025-02-01 08:00:00', '2025-02-01 10:00:00', 1000.0, 10, 9))}]
+
+    compressed = b''.join(gzip_chunks(export_chunks(mock_db, 'flights', 'csv', {})))
+    assert gzip.decompress(compressed).decode('utf-8') == ''.join(export_chunks(mock_db, 'flights', 'csv', {}))
+
+
+def test_archive_years_follow_the_date_filter():
+    years = [2025, 2024, 2023]
+    assert archive_years(years, 'flights', flights_query('2024-03-01', '2024-12-31')) == [2024]
+    # Booking tahun 2024 bisa untuk penerbangan 2025, jadi batas atas tidak membatasi bucket
+    assert archive_years(years, 'bookings', bookings_query('2024-03-01', '2024-12-31')) == [2025, 2024]
+    assert archive_years(years, 'bookings', {}) == years
+
+
+def test_history_export_merges_active_and_archived_rows_in_order(mock_db):
+    user_id = mock_db.users.insert_one({'username': 'andi', 'email': 'andi@test'}).inserted_id
+    old = insert_flight(mock_db, 'OLD', datetime(2024, 6, 1, 8))
+    recent = insert_flight(mock_db, 'NEW', datetime(2025, 2, 1, 8))
+    insert_booking(mock_db, user_id, old, datetime(2024, 5, 1, 8))
+    insert_booking(mock_db, user_id, recent, datetime(2024, 5, 2, 8))
+    insert_booking(mock_db, user_id, old, datetime(2024, 5, 3, 8))
+    archive = FlightArchive(mock_db, horizon_days=30)
+    assert archive.run(datetime(2025, 1, 1)) == (1, 2)
+
+    query = bookings_query('2024-01-01')
+    assert [row['flight_number'] for row in read_csv(export_chunks(mock_db, 'bookings', 'csv', query))] == ['NEW']
+    rows = read_csv(export_chunks(mock_db, 'bookings', 'csv', query, archive=archive))
+    assert [row['flight_number'] for row in rows] == ['OLD', 'NEW', 'OLD']
+    assert all(row['email'] == 'andi@test' for row in rows)
+
+    flights = read_csv(export_chunks(mock_db, 'flights', 'csv', {}, archive=archive))
+    assert [row['flight_number'] for row in flights] == ['OLD', 'NEW']
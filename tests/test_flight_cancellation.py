@@ -0,0 +1,83 @@
+# tests/test_flight_cancellation.py
+"""Job pembatalan penerbangan: booking dibatalkan per batch, kursi dikembalikan, API tidak lagi menawarkan penerbangan."""
+from datetime import datetime, timedelta
+from flight_cancellation import FlightCancellationJobs, DONE
+from stats import StatsRecorder
+
+
+def insert_flight(db, seats=10, **fields):
+    departure = datetime.now() + timedelta(days=2)
+    flight = dict({'flight_number': 'GA1', 'origin': 'CGK', 'destination': 'DPS', 'departure_time': departure,
+                   'arrival_time': departure + timedelta(hours=2), 'price': 1000.0,
+                   'total_seats': seats, 'available_seats': seats}, **fields)
+    flight['_id'] = db.flights.insert_one(flight).inserted_id
+    return flight
+
+
+def insert_bookings(db, flight, passengers):
+    db.bookings.insert_many([{'flight_id': flight['_id'], 'status': 'confirmed', 'num_passengers': count,
+                              'total_price': flight['price'] * count, 'booking_date': datetime.now()}
+                             for count in passengers])
+    db.flights.update_one({'_id': flight['_id']}, {'$inc': {'available_seats': -sum(passengers)}})
+
+
+def test_job_cancels_all_bookings_in_batches_and_releases_seats(mock_db):
+    flight = insert_flight(mock_db)
+    insert_bookings(mock_db, flight, [1, 2, 3, 1])
+    finished = []
+    jobs = FlightCancellationJobs(mock_db, batch_size=2, stats_recorder=StatsRecorder(mock_db),
+                                  on_finished=finished.append)
+    job, created = jobs.start(flight['_id'], requested_by='test', reason='Cuaca')
+    assert created and jobs.start(flight['_id'])[1] is False
+    assert jobs.run(job['_id'])
+
+    job = jobs.get(job['_id'])
+    assert (job['state'], job['percent'], job['cancelled_bookings'], job['released_seats']) == (DONE, 100.0, 4, 7)
+    assert mock_db.bookings.count_documents({'status': 'confirmed'}) == 0
+    stored = mock_db.flights.find_one({'_id': flight['_id']})
+    assert stored['status'] == 'cancelled' and stored['available_seats'] == 10
+    assert len(finished) == 1
+    assert jobs.run(job['_id']) is False  # Job selesai tidak dijalankan ulang
+
+
+def test_job_finishes_when_flight_was_deleted_meanwhile(mock_db):
+    flight = insert_flight(mock_db)
+    insert_bookings(mock_db, flight, [2])
+    finished = []
+    jobs = FlightCancellationJobs(mock_db, stats_recorder=StatsRecorder(mock_db), on_finished=finished.append)
+    job, _ = jobs.start(flight['_id'])
+    mock_db.flights.delete_one({'_id': flight['_id']})
+    assert jobs.run(job['_id'])
+    assert jobs.get(job['_id'])['cancelled_bookings'] == 1
+    assert finished == [None]
+
+
+def test_cancelled_flight_is_gone_from_api(app_module, db):
+    flight = insert_flight(db)
+    insert_bookings(db, flight, [2])
+    app_module.cancellation_jobs.run(app_module.cancellation_jobs.start(flight['_id'])[0]['_id'])
+    app_module.flights_version.bump()
+    test_client = app_module.app.test_client()
+
+    response = test_client.get(f"/api/flights/{flight['_id']}")
+    assert response.status_code == 410
+    assert response.get_json()['flight']['status'] == 'cancelled'
+    listed = test_client.get('/api/flights?origin=CGK&destination=DPS').get_json()['flights']
+    assert str(flight['_id']) not in [item['_id'] for item in listed]
+
+
+def test_cancelled_leg_is_excluded_from_connections(app_module, db):
+    departure = (datetime.now() + timedelta(days=3)).replace(hour=6, minute=0, second=0, microsecond=0)
+    first = insert_flight(db, flight_number='K1', origin='KNO', destination='CGK', departure_time=departure,
+                          arrival_time=departure + timedelta(hours=2))
+    insert_flight(db, flight_number='C1', origin='CGK', destination='DPS', departure_time=departure + timedelta(hours=3),
+                  arrival_time=departure + timedelta(hours=5))
+    graph = app_module.route_graph
+    graph.rebuild()
+    url = f"/api/connections?origin=KNO&destination=DPS&departure_date={departure:%Y-%m-%d}"
+    test_client = app_module.app.test_client()
+    assert len(test_client.get(url).get_json()['itineraries']) == 1
+
+    app_module.cancellation_jobs.run(app_module.cancellation_jobs.start(first['_id'])[0]['_id'])
+    app_module.flights_version.bump()
+    assert test_client.get(url).get_json()['itineraries'] == []
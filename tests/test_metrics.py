@@ -0,0 +1,69 @@
+# tests/test_metrics.py
+"""Output /admin/metrics harus bisa di-parse Prometheus, termasuk gauge graf rute."""
+import re
+import time
+from datetime import datetime, timedelta
+from metrics import MetricsRegistry
+from route_graph import RouteGraph
+
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*'
+                    r'(\{[a-zA-Z_][a-zA-Z0-9_]*="[^"]*"(,[a-zA-Z_][a-zA-Z0-9_]*="[^"]*")*\})? (\S+)$')
+
+
+def parse_prometheus(text):
+    """Mengembalikan {baris sampel: nilai}; AssertionError untuk baris yang ditolak Prometheus."""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = SAMPLE.match(line)
+        assert match, f'baris tidak valid: {line!r}'
+        samples[line.rsplit(' ', 1)[0]] = float(match.group(3))
+    return samples
+
+
+class FixedVersion:
+    def get(self):
+        return 1
+
+    def bump(self):
+        return 1
+
+
+def test_gauges_with_bool_and_text_values_render_as_numbers():
+    registry = MetricsRegistry()
+    registry.register_gauge('example', lambda: {'ready': True, 'broken': False, 'name': 'x', 'none': None, 'n': 2.5})
+    samples = parse_prometheus(registry.render_prometheus())
+    assert samples == {'tiket_example{key="broken"}': 0.0, 'tiket_example{key="n"}': 2.5,
+                       'tiket_example{key="ready"}': 1.0}
+
+
+def test_admin_metrics_endpoint_is_valid_prometheus(app_module, db, login_as):
+    admin_id = db.users.insert_one({'username': 'admin', 'email': 'admin@test', 'password': '-', 'role': 'admin',
+                                    'created_at': datetime.now()}).inserted_id
+    test_client = app_module.app.test_client()
+    login_as(test_client, admin_id)
+    test_client.get('/api/connections?origin=CGK&destination=DPS')
+    response = test_client.get('/admin/metrics')
+    assert response.status_code == 200
+    samples = parse_prometheus(response.get_data(as_text=True))
+    if app_module.route_graph:
+        assert 'tiket_route_graph{key="ready"}' in samples
+
+
+def test_route_graph_rebuilds_in_background_when_too_old(mock_db):
+    departure = datetime.now() + timedelta(days=1)
+    mock_db.flights.insert_one({'flight_number': 'GA1', 'origin': 'CGK', 'destination': 'DPS',
+                                'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+                                'price': 1000.0, 'total_seats': 10, 'available_seats': 10})
+    graph = RouteGraph(mock_db.flights, FixedVersion(), max_age_seconds=0.05)
+    graph.rebuild()
+    assert not graph.stale()
+    time.sleep(0.1)
+    assert graph.stale()
+    graph.warm()
+    for _ in range(100):
+        if graph.rebuilds == 2:
+            break
+        time.sleep(0.01)
+    assert graph.rebuilds == 2 and graph.stats()['flights'] == 1
@@ -0,0 +1,89 @@
+# tests/test_mongo_session.py
+"""MongoSession: perutean baca per rute, koleksi yang dipaku ke primary, dan client baru per PID setelah fork.
+
+Test perutean membutuhkan replica set dengan minimal satu secondary, misalnya:
+    MONGO_REPLICA_SET_URI="mongodb://localhost:27017,localhost:27018/?replicaSet=rs0" python -m pytest tests/test_mongo_session.py
+"""
+import os
+import time
+import pytest
+import mongo_session
+from mongo_session import MongoSession, PRIMARY, connect, read_routes_from_env
+
+REPLICA_SET_URI = os.environ.get('MONGO_REPLICA_SET_URI')
+DATABASE = 'booking_tiket_session_test'
+
+
+@pytest.fixture
+def replica_session():
+    if not REPLICA_SET_URI:
+        pytest.skip('MONGO_REPLICA_SET_URI tidak diset; test ini membutuhkan replica set.')
+    session = MongoSession(REPLICA_SET_URI, DATABASE, read_routes=read_routes_from_env({}))
+    session.client.admin.command('ping')
+    description = session.client.topology_description
+    if not any(server.server_type_name == 'RSSecondary' for server in description.server_descriptions().values()):
+        pytest.skip('Replica set belum memiliki secondary yang sehat.')
+    collection = session.database()['routing_check']
+    collection.insert_one({'checked_at': time.time()})
+    yield session
+    collection.drop()
+    session.close()
+
+
+def server_type(session, address):
+    return session.client.topology_description.server_descriptions()[address].server_type_name
+
+
+def read_address(collection):
+    cursor = collection.find({}).limit(1)
+    list(cursor)
+    return cursor.address
+
+
+def test_read_route_reads_from_secondary_and_primary_stays_pinned(replica_session):
+    session = replica_session
+    routed = session.database()['routing_check']
+    pinned = session.primary('routing_check')
+
+    @session.read_route('search')
+    def search_view():
+        return read_address(routed), read_address(pinned)
+
+    routed_address, pinned_address = search_view()
+    assert server_type(session, routed_address) == 'RSSecondary'
+    assert server_type(session, pinned_address) == 'RSPrimary'
+    # Di luar rute bertanda semua bacaan kembali ke primary
+    assert server_type(session, read_address(routed)) == 'RSPrimary'
+    assert server_type(session, read_address(session.database(PRIMARY)['routing_check'])) == 'RSPrimary'
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='os.fork tidak tersedia')
+def test_forked_worker_creates_its_own_client(replica_session):
+    session = replica_session
+    parent_client = session.client
+    pid = os.fork()
+    if pid == 0:
+        child_ok = (session.client is not parent_client and session.clients_created == 2
+                    and session.health()['ok'])
+        os._exit(0 if child_ok else 1)
+    _, code = os.waitpid(pid, 0)
+    assert code == 0
+    assert session.client is parent_client
+
+
+def test_connect_uses_mongo_db_and_client_options(monkeypatch):
+    created = []
+
+    class RecordingClient(dict):
+        def __init__(self, uri, **options):
+            super().__init__()
+            created.append((uri, options))
+
+        def __missing__(self, name):
+            return name
+
+    monkeypatch.setattr(mongo_session, 'MongoClient', RecordingClient)
+    client, db = connect('mongodb://example/', environ={'MONGO_DB': 'tiket_staging', 'MONGO_MAX_POOL_SIZE': '7'})
+    assert db == 'tiket_staging'
+    assert created == [('mongodb://example/', {'maxPoolSize': 7})]
+    assert connect('mongodb://example/', environ={})[1] == mongo_session.DEFAULT_DATABASE
@@ -0,0 +1,38 @@
+# tests/test_pagination.py
+"""Token paginasi keyset: hanya (nilai sort skalar, ObjectId) yang diterima."""
+import base64
+from datetime import datetime
+import pytest
+from bson import json_util
+from bson.objectid import ObjectId
+from pagination import InvalidPageToken, decode_token, encode_token
+
+
+def token(*parts):
+    return base64.urlsafe_b64encode(json_util.dumps(list(parts)).encode()).decode().rstrip('=')
+
+
+@pytest.mark.parametrize('value', [datetime(2030, 1, 1, 10, 0), 1500000.0, 3, 'GA100'])
+def test_round_trip(value):
+    doc = {'_id': ObjectId(), 'field': value}
+    assert decode_token(encode_token(doc, 'field')) == (value, doc['_id'])
+
+
+@pytest.mark.parametrize('raw', [
+    token({'$gt': ''}, ObjectId()),           # operator query disisipkan lewat nilai sort
+    token([1, 2], ObjectId()),
+    token(None, ObjectId()),
+    token(True, ObjectId()),
+    token(datetime(2030, 1, 1), {'$ne': None}),
+    token(datetime(2030, 1, 1), 'abc'),
+    token(datetime(2030, 1, 1)),
+    'bukan-token',
+])
+def test_malformed_tokens_are_rejected(raw):
+    with pytest.raises(InvalidPageToken):
+        decode_token(raw)
+
+
+def test_api_answers_400_for_a_forged_token(app_module, db):
+    response = app_module.app.test_client().get(f"/api/flights?after={token({'$gt': ''}, ObjectId())}")
+    assert response.status_code == 400
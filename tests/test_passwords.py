@@ -0,0 +1,40 @@
+# tests/test_passwords.py
+"""Hash password di process pool (forkserver/spawn) dan respons 503 saat pool tidak sempat menjawab."""
+import pytest
+from passwords import PasswordHasher, PasswordHashTimeout, POOL_START_METHOD
+
+
+def test_pool_hashes_and_verifies_outside_the_web_process():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1)
+    try:
+        stored = hasher.hash('rahasia')
+        assert hasher.verify(stored, 'rahasia') and not hasher.verify(stored, 'salah')
+        assert hasher._pool._mp_context.get_start_method() == POOL_START_METHOD != 'fork'
+    finally:
+        hasher.shutdown()
+
+
+def test_slow_pool_raises_timeout():
+    hasher = PasswordHasher(method='pbkdf2:sha256:1000', workers=1, timeout=0.001)
+    try:
+        with pytest.raises(PasswordHashTimeout):
+            hasher.hash('rahasia')
+    finally:
+        hasher.shutdown()
+
+
+def test_login_and_register_answer_503_when_hashing_times_out(app_module, db, monkeypatch):
+    def busy(*args):
+        raise PasswordHashTimeout('sibuk')
+
+    monkeypatch.setattr(app_module.password_hasher, 'hash', busy)
+    monkeypatch.setattr(app_module.password_hasher, 'verify', busy)
+    db.users.insert_one({'username': 'andi', 'email': 'andi@test', 'password': '-', 'role': 'user'})
+    test_client = app_module.app.test_client()
+
+    response = test_client.post('/login', data={'username': 'andi', 'password': 'x'})
+    assert response.status_code == 503 and b'sibuk' in response.data
+    response = test_client.post('/register', data={'username': 'budi', 'email': 'budi@test',
+                                                   'password': 'x', 'confirm_password': 'x'})
+    assert response.status_code == 503
+    assert db.users.count_documents({'username': 'budi'}) == 0
@@ -0,0 +1,31 @@
+# tests/test_query_plans.py
+"""Semua query rute (dibangun dengan builder milik aplikasi) harus memakai index: tanpa COLLSCAN atau SORT.
+
+Data diisi lebih dulu agar planner memilih di antara index sungguhan, bukan rencana untuk koleksi kosong.
+"""
+from datetime import datetime, timedelta
+import indexes
+import seed_large
+
+
+def test_route_queries_use_indexes(real_mongo, db):
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    seed_large.seed_in_process(db, {
+        'users': 500, 'flights': 3000, 'bookings': 10000, 'seed': 42, 'batch_size': 1000,
+        'start_date': today - timedelta(days=30), 'end_date': today + timedelta(days=90)
+    })
+    assert indexes.check_query_plans(db) == []
+
+
+def test_origin_only_search_has_matching_index():
+    keys = [keys for keys, options in indexes.INDEXES['flights'] if options['name'] == 'origin_departure'][0]
+    assert [field for field, _ in keys] == ['origin', 'departure_time', '_id', 'available_seats']
+    assert any(route.startswith('index (asal)') for route, *_ in indexes.route_queries())
+
+
+def test_origin_or_destination_only_booking_filters_have_matching_indexes():
+    specs = {options['name']: [field for field, _ in keys] for keys, options in indexes.INDEXES['bookings']}
+    assert specs['origin_booking_date_id'] == ['flight_details.origin', 'booking_date', '_id']
+    assert specs['destination_booking_date_id'] == ['flight_details.destination', 'booking_date', '_id']
+    routes = [route for route, *_ in indexes.route_queries()]
+    assert 'manage_all_bookings (asal)' in routes and 'manage_all_bookings (tujuan)' in routes
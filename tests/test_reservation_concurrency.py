@@ -0,0 +1,91 @@
+# tests/test_reservation_concurrency.py
+"""Ratusan thread memesan dan membatalkan kursi pada satu penerbangan lewat Flask test client.
+
+Permintaan kursi sengaja melebihi kapasitas. Setelah semua selesai, kursi tersisa harus sama
+dengan total kursi dikurangi penumpang booking confirmed, tidak pernah negatif selama berjalan,
+dan p99 latensi request harus di bawah batas.
+
+Contoh:
+    MONGO_URI=mongodb://localhost:27017/ python -m pytest tests/test_reservation_concurrency.py
+    CONCURRENCY_THREADS=500 CONCURRENCY_P99_MS=1000 MONGO_URI=... python -m pytest tests/
+"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+
+THREADS = int(os.environ.get('CONCURRENCY_THREADS', '300'))
+P99_BOUND_MS = float(os.environ.get('CONCURRENCY_P99_MS', '2000'))
+
+
+def p99(values):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * 0.99))]
+
+
+def test_concurrent_booking_and_cancellation_never_oversells(real_mongo, app_module, db, login_as):
+    seats = THREADS // 2
+    departure = datetime.now() + timedelta(days=7)
+    flight_id = db.flights.insert_one({
+        'flight_number': 'GA777', 'origin': 'CGK', 'destination': 'DPS',
+        'departure_time': departure, 'arrival_time': departure + timedelta(hours=2),
+        'price': 1000000.0, 'total_seats': seats, 'available_seats': seats
+    }).inserted_id
+    user_ids = db.users.insert_many([
+        {'username': f'load{index}', 'email': f'load{index}@test', 'password': '-', 'role': 'user',
+         'created_at': datetime.now()} for index in range(THREADS)
+    ]).inserted_ids
+
+    barrier = threading.Barrier(THREADS + 1)
+    done = threading.Event()
+    latencies, failures, lowest = [], [], [seats]
+    lock = threading.Lock()
+
+    def watch_seats():
+        # Memantau kursi selama test berjalan: tidak boleh pernah di bawah nol
+        while not done.is_set():
+            available = db.flights.find_one({'_id': flight_id}, {'available_seats': 1})['available_seats']
+            lowest[0] = min(lowest[0], available)
+
+    def timed_post(test_client, url, data=None):
+        started = time.perf_counter()
+        response = test_client.post(url, data=data)
+        with lock:
+            latencies.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 302:
+            with lock:
+                failures.append((url, response.status_code))
+
+    def customer(index):
+        test_client = app_module.app.test_client()
+        login_as(test_client, user_ids[index])
+        barrier.wait()
+        timed_post(test_client, f'/book_flight/{flight_id}', {'num_passengers': str(1 + index % 3)})
+        if index % 4 == 0:
+            booking = db.bookings.find_one({'user_id': user_ids[index], 'status': 'confirmed'}, {'_id': 1})
+            if booking:
+                timed_post(test_client, f'/cancel_booking/{booking["_id"]}')
+                # Pembatalan kedua harus ditolak tanpa mengembalikan kursi dua kali
+                timed_post(test_client, f'/cancel_booking/{booking["_id"]}')
+
+    watcher = threading.Thread(target=watch_seats, daemon=True)
+    watcher.start()
+    threads = [threading.Thread(target=customer, args=(index,)) for index in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    for thread in threads:
+        thread.join()
+    done.set()
+    watcher.join()
+
+    assert not failures
+    flight = db.flights.find_one({'_id': flight_id})
+    confirmed = sum(booking['num_passengers'] for booking in
+                    db.bookings.find({'flight_id': flight_id, 'status': 'confirmed'}, {'num_passengers': 1}))
+    assert flight['available_seats'] == flight['total_seats'] - confirmed
+    assert flight['available_seats'] >= 0
+    assert lowest[0] >= 0
+    # Permintaan melebihi kapasitas, jadi sebagian kursi memang terjual
+    assert confirmed > 0
+    assert p99(latencies) < P99_BOUND_MS, f'p99 {p99(latencies):.0f} ms melebihi batas {P99_BOUND_MS:.0f} ms'
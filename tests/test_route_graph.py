@@ -0,0 +1,82 @@
+# tests/test_route_graph.py
+"""Graf rute transit: sambungan dalam batas waktu transit, urutan hasil, kursi, dan pembaruan inkremental."""
+from datetime import datetime, timedelta
+from http_cache import CollectionVersion
+from route_graph import RouteGraph
+
+
+def day(hour, minute=0):
+    return (datetime.now() + timedelta(days=2)).replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+def leg(db, flight_number, origin, destination, departure, hours, price, seats=10):
+    flight = {'flight_number': flight_number, 'origin': origin, 'destination': destination,
+              'departure_time': departure, 'arrival_time': departure + timedelta(hours=hours), 'price': price,
+              'total_seats': 10, 'available_seats': seats}
+    flight['_id'] = db.flights.insert_one(flight).inserted_id
+    return flight
+
+
+def numbers(itineraries):
+    return [[item.flight_number for item in itinerary.legs] for itinerary in itineraries]
+
+
+def make_graph(db):
+    graph = RouteGraph(db.flights, CollectionVersion(db.versions, 'schedule', ttl=0))
+    graph.rebuild()
+    return graph
+
+
+def test_connections_respect_layover_limits_and_sort(mock_db):
+    leg(mock_db, 'K1', 'KNO', 'CGK', day(6), 2, 900)        # tiba 08:00
+    leg(mock_db, 'C1', 'CGK', 'DPS', day(9), 2, 800)        # transit 60 menit
+    leg(mock_db, 'C2', 'CGK', 'DPS', day(8, 15), 2, 100)    # transit 15 menit: terlalu singkat
+    leg(mock_db, 'K2', 'KNO', 'SUB', day(7), 2, 300)        # tiba 09:00
+    leg(mock_db, 'S1', 'SUB', 'DPS', day(16), 1, 100)       # transit 7 jam, lebih murah tapi lebih lama
+    leg(mock_db, 'D0', 'KNO', 'DPS', day(7), 3, 2000)       # penerbangan langsung tidak termasuk
+    graph = make_graph(mock_db)
+
+    by_duration, truncated = graph.search('KNO', 'DPS', day(0), day(0) + timedelta(days=1))
+    assert not truncated
+    assert numbers(by_duration) == [['K1', 'C1'], ['K2', 'S1']]
+    by_price, _ = graph.search('KNO', 'DPS', day(0), day(0) + timedelta(days=1), sort='price')
+    assert numbers(by_price) == [['K2', 'S1'], ['K1', 'C1']]
+
+
+def test_two_stops_and_seat_check(mock_db):
+    leg(mock_db, 'K1', 'KNO', 'SUB', day(6), 2, 300)
+    leg(mock_db, 'S1', 'SUB', 'JOG', day(9), 1, 200)
+    full = leg(mock_db, 'J1', 'JOG', 'DPS', day(11), 1, 200)
+    graph = make_graph(mock_db)
+    start, end = day(0), day(0) + timedelta(days=1)
+
+    assert numbers(graph.search('KNO', 'DPS', start, end)[0]) == [['K1', 'S1', 'J1']]
+    assert graph.search('KNO', 'DPS', start, end, max_stops=1)[0] == []
+    # Kursi dibaca dari MongoDB, bukan dari graf
+    mock_db.flights.update_one({'_id': full['_id']}, {'$set': {'available_seats': 1}})
+    assert graph.search('KNO', 'DPS', start, end, passengers=2)[0] == []
+
+
+def test_incremental_changes_update_the_local_graph(mock_db):
+    first = leg(mock_db, 'K1', 'KNO', 'CGK', day(6), 2, 900)
+    graph = make_graph(mock_db)
+    start, end = day(0), day(0) + timedelta(days=1)
+    assert graph.search('KNO', 'DPS', start, end)[0] == []
+
+    added = leg(mock_db, 'C1', 'CGK', 'DPS', day(9), 2, 800)
+    graph.flights_changed([(None, added)])
+    assert numbers(graph.search('KNO', 'DPS', start, end)[0]) == [['K1', 'C1']]
+
+    cancelled = dict(first, status='cancelled')
+    graph.flights_changed([(first, cancelled)])
+    assert graph.search('KNO', 'DPS', start, end)[0] == []
+    assert graph.rebuilds == 1 and not graph.stale()
+
+
+def test_other_workers_see_a_stale_graph_after_a_change(mock_db):
+    leg(mock_db, 'K1', 'KNO', 'CGK', day(6), 2, 900)
+    worker_a, worker_b = make_graph(mock_db), make_graph(mock_db)
+    worker_a.flights_changed([(None, leg(mock_db, 'C1', 'CGK', 'DPS', day(9), 2, 800))])
+    assert not worker_a.stale() and worker_b.stale()
+    worker_b.rebuild()
+    assert numbers(worker_b.search('KNO', 'DPS', day(0), day(0) + timedelta(days=1))[0]) == [['K1', 'C1']]
@@ -0,0 +1,75 @@
+# tests/test_schedule_import.py
+"""Impor jadwal: upsert per (flight_number, departure_time), validasi per baris, dan guard kursi."""
+import io
+import json
+from indexes import ensure_indexes
+from schedule_import import import_schedule, read_rows, SEATS_ERROR
+
+ROW = {'flight_number': 'ga100', 'origin': 'cgk', 'destination': 'dps', 'departure_time': '2030-01-01T10:00',
+       'arrival_time': '2030-01-01T12:00', 'price': '1000', 'total_seats': '10'}
+
+
+def run_import(db, rows, **options):
+    stream = io.BytesIO(''.join(json.dumps(row) + '\n' for row in rows).encode())
+    return import_schedule(db.flights, db.bookings, read_rows(stream, 'jsonl'), **options)
+
+
+def test_rows_are_upserted_validated_and_deduplicated(mock_db):
+    ensure_indexes(mock_db)
+    report = run_import(mock_db, [ROW, dict(ROW, flight_number='GA101'), dict(ROW, origin='DPS'),
+                                  dict(ROW, price='abc'), dict(ROW, flight_number='GA101', price='900')])
+    assert (report.processed, report.inserted, report.duplicates, report.error_count) == (5, 2, 1, 2)
+    assert mock_db.flights.find_one({'flight_number': 'GA101'})['price'] == 900.0
+
+    report = run_import(mock_db, [ROW, dict(ROW, total_seats='12')])
+    assert (report.unchanged, report.updated, report.inserted) == (0, 1, 0)
+    flight = mock_db.flights.find_one({'flight_number': 'GA100'})
+    assert (flight['total_seats'], flight['available_seats']) == (12, 12)
+
+
+def test_reimport_never_drives_available_seats_negative(mock_db):
+    ensure_indexes(mock_db)
+    run_import(mock_db, [ROW])
+    mock_db.flights.update_one({'flight_number': 'GA100'}, {'$inc': {'available_seats': -6}})
+
+    report = run_import(mock_db, [dict(ROW, total_seats='5')])
+    assert report.errors == [{'line': 1, 'error': SEATS_ERROR}]
+    flight = mock_db.flights.find_one({'flight_number': 'GA100'})
+    assert (flight['total_seats'], flight['available_seats']) == (10, 4)
+
+
+class BookingDuringImport:
+    """Koleksi flights yang menjual kursi tepat setelah impor membaca penerbangan lama."""
+
+    def __init__(self, collection, seats):
+        self.collection = collection
+        self.seats = seats
+
+    def find(self, *args, **kwargs):
+        docs = list(self.collection.find(*args, **kwargs))
+        if self.seats:
+            self.collection.update_many({}, {'$inc': {'available_seats': -self.seats}})
+            self.seats = 0
+        return docs
+
+    def __getattr__(self, name):
+        return getattr(self.collection, name)
+
+
+def test_seat_guard_rejects_rows_when_seats_were_sold_meanwhile(mock_db):
+    ensure_indexes(mock_db)
+    run_import(mock_db, [ROW])
+    mock_db.flights.update_one({'flight_number': 'GA100'}, {'$inc': {'available_seats': -4}})
+    flights = BookingDuringImport(mock_db.flights, seats=4)
+    stream = io.BytesIO((json.dumps(dict(ROW, total_seats='7')) + '\n').encode())
+    report = import_schedule(flights, mock_db.bookings, read_rows(stream, 'jsonl'))
+
+    assert report.updated == 0 and report.error_count == 1
+    flight = mock_db.flights.find_one({'flight_number': 'GA100'})
+    assert (flight['total_seats'], flight['available_seats']) == (10, 2)
+
+
+def test_upsert_key_is_unique(mock_db):
+    ensure_indexes(mock_db)
+    info = mock_db.flights.index_information()['flight_number_departure_unique']
+    assert info.get('unique') is True
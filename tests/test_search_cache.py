@@ -0,0 +1,69 @@
+# tests/test_search_cache.py
+"""Cache hasil pencarian: kursi selalu terkini, dan invalidasi satu worker berlaku di worker lain."""
+from datetime import datetime, timedelta
+import pytest
+from flight_search import build_flight_search_query
+from http_cache import CollectionVersion
+from search_cache import MemorySearchBackend, SearchResultCache, SqliteSearchBackend, SEARCH_VERSION
+
+PROJECTION = {'flight_number': 1, 'origin': 1, 'destination': 1, 'departure_time': 1, 'price': 1}
+
+
+def insert_flights(db, count, origin='CGK', destination='DPS'):
+    departure = datetime.now() + timedelta(days=1)
+    db.flights.insert_many([{
+        'flight_number': f'GA{index}', 'origin': origin, 'destination': destination,
+        'departure_time': departure + timedelta(hours=index), 'arrival_time': departure + timedelta(hours=index + 2),
+        'price': 1000.0, 'total_seats': 10, 'available_seats': 10
+    } for index in range(count)])
+
+
+def first_page(cache, db, page_size=2):
+    query = build_flight_search_query('CGK', 'DPS', '')
+    return cache.first_page(db.flights, query, 'CGK', 'DPS', '', page_size, PROJECTION)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def make_backend(request, tmp_path):
+    if request.param == 'memory':
+        return MemorySearchBackend
+    return lambda: SqliteSearchBackend(str(tmp_path / 'search_cache.sqlite3'))
+
+
+def test_hits_read_live_seats(mock_db, make_backend):
+    insert_flights(mock_db, 3)
+    cache = SearchResultCache(make_backend(), ttl=60)
+    page, next_token = first_page(cache, mock_db)
+    assert [doc['flight_number'] for doc in page] == ['GA0', 'GA1'] and next_token
+
+    mock_db.flights.update_one({'flight_number': 'GA0'}, {'$set': {'available_seats': 0}})
+    page, _ = first_page(cache, mock_db)
+    assert [doc['flight_number'] for doc in page] == ['GA1', 'GA2']
+    assert cache.stats()['hits'] == 1
+
+
+def test_invalidation_reaches_other_workers_through_the_shared_version(mock_db):
+    insert_flights(mock_db, 1)
+    # Dua worker: masing-masing punya cache memori sendiri, versi dibaca dari koleksi yang sama
+    worker_a, worker_b = (SearchResultCache(MemorySearchBackend(), ttl=60,
+                                            version=CollectionVersion(mock_db.versions, SEARCH_VERSION, ttl=0))
+                          for _ in range(2))
+    assert len(first_page(worker_a, mock_db)[0]) == 1
+    assert len(first_page(worker_b, mock_db)[0]) == 1
+
+    # Worker A menambah penerbangan pada rute ini
+    insert_flights(mock_db, 2)
+    worker_a.invalidate_route('CGK', 'DPS')
+    assert len(first_page(worker_b, mock_db)[0]) == 2
+    assert worker_b.stats() == {'hits': 0, 'misses': 2, 'hit_rate': 0.0}
+
+
+def test_without_version_invalidation_stays_in_the_writing_worker(mock_db):
+    insert_flights(mock_db, 1)
+    worker_a, worker_b = SearchResultCache(MemorySearchBackend(), ttl=60), SearchResultCache(MemorySearchBackend(), ttl=60)
+    first_page(worker_a, mock_db)
+    first_page(worker_b, mock_db)
+    insert_flights(mock_db, 2)
+    worker_a.invalidate_route('CGK', 'DPS')
+    assert len(first_page(worker_a, mock_db)[0]) == 2
+    assert len(first_page(worker_b, mock_db)[0]) == 1
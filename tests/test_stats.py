@@ -0,0 +1,54 @@
+# tests/test_stats.py
+"""Counter dashboard: delta per booking, rekonsiliasi, dan database baru yang langsung terekonsiliasi."""
+from datetime import datetime, timedelta
+from stats import StatsRecorder
+
+
+def insert_flight(db, seats=10):
+    departure = datetime.now() + timedelta(days=1)
+    flight = {'flight_number': 'GA1', 'origin': 'CGK', 'destination': 'DPS', 'departure_time': departure,
+              'arrival_time': departure + timedelta(hours=2), 'price': 1000.0,
+              'total_seats': seats, 'available_seats': seats}
+    flight['_id'] = db.flights.insert_one(flight).inserted_id
+    return flight
+
+
+def test_fresh_database_is_reconciled_without_the_cli(mock_db):
+    recorder = StatsRecorder(mock_db)
+    assert not recorder.is_reconciled()
+    assert recorder.reconcile_if_empty()
+    assert recorder.is_reconciled()
+
+    # Counter yang naik setelahnya tetap dianggap lengkap
+    mock_db.users.insert_one({'username': 'admin'})
+    recorder.user_registered()
+    assert recorder.is_reconciled() and recorder.summary()['total_users'] == 1
+    assert recorder.reconcile(apply=False) == {}
+
+
+def test_database_with_data_still_needs_reconciliation(mock_db):
+    mock_db.users.insert_one({'username': 'lama'})
+    recorder = StatsRecorder(mock_db)
+    assert not recorder.reconcile_if_empty()
+    assert not recorder.is_reconciled()
+    recorder.reconcile()
+    assert recorder.is_reconciled() and recorder.summary()['total_users'] == 1
+
+
+def test_batched_booking_deltas_match_a_full_reconcile(mock_db):
+    recorder = StatsRecorder(mock_db)
+    recorder.reconcile_if_empty()
+    flight = insert_flight(mock_db)
+    recorder.flight_added(flight)
+    bookings = [{'flight_id': flight['_id'], 'status': 'confirmed', 'num_passengers': count,
+                 'total_price': 1000.0 * count, 'booking_date': datetime.now()} for count in (1, 2, 3)]
+    mock_db.bookings.insert_many(bookings)
+    mock_db.flights.update_one({'_id': flight['_id']}, {'$inc': {'available_seats': -6}})
+    recorder.bookings_changed(confirmed=[(booking, flight) for booking in bookings])
+
+    mock_db.bookings.update_one({'_id': bookings[0]['_id']}, {'$set': {'status': 'cancelled'}})
+    mock_db.flights.update_one({'_id': flight['_id']}, {'$inc': {'available_seats': 1}})
+    recorder.booking_cancelled(bookings[0], flight)
+
+    assert recorder.summary() == {'total_users': 0, 'total_flights': 1, 'total_bookings': 2, 'total_revenue': 5000.0}
+    assert recorder.reconcile(apply=False) == {}
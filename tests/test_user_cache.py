@@ -0,0 +1,43 @@
+# tests/test_user_cache.py
+"""Cache pengguna: penghapusan atau perubahan peran di satu worker berlaku di worker lain."""
+from datetime import datetime
+from http_cache import CollectionVersion
+from user_cache import UserCache
+
+
+def test_invalidation_reaches_other_workers_through_the_shared_version(mock_db):
+    user_id = mock_db.users.insert_one({'username': 'andi', 'email': 'andi@test', 'role': 'admin'}).inserted_id
+    loads = []
+
+    def loader(uid):
+        loads.append(uid)
+        return mock_db.users.find_one({'_id': user_id})
+
+    worker_a, worker_b = (UserCache(ttl=60, version=CollectionVersion(mock_db.versions, 'users', ttl=0))
+                          for _ in range(2))
+    assert worker_b.get(str(user_id), loader)['role'] == 'admin'
+    assert worker_b.get(str(user_id), loader)['role'] == 'admin'
+    assert len(loads) == 1
+
+    # Worker A menurunkan peran pengguna
+    mock_db.users.update_one({'_id': user_id}, {'$set': {'role': 'user'}})
+    worker_a.invalidate(str(user_id))
+    assert worker_b.get(str(user_id), loader)['role'] == 'user'
+
+    mock_db.users.delete_one({'_id': user_id})
+    worker_a.invalidate(str(user_id))
+    assert worker_b.get(str(user_id), loader) is None
+
+
+def test_demoted_admin_loses_access_even_from_a_cached_session(app_module, db, login_as, monkeypatch):
+    monkeypatch.setattr(app_module, 'USER_SESSION_CACHE', True)
+    user_id = db.users.insert_one({'username': 'admin', 'email': 'admin@test', 'password': '-', 'role': 'admin',
+                                   'created_at': datetime.now()}).inserted_id
+    test_client = app_module.app.test_client()
+    login_as(test_client, user_id)
+    assert test_client.get('/admin/users').status_code == 200
+
+    # Worker lain menurunkan peran: data di session dan cache worker ini tidak boleh dipakai lagi
+    db.users.update_one({'_id': user_id}, {'$set': {'role': 'user'}})
+    app_module.user_cache.version.bump()
+    assert test_client.get('/admin/users').status_code == 302
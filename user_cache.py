@@ -0,0 +1,82 @@
+# user_cache.py
+import threading
+import time
+from collections import OrderedDict
+
+# Field pengguna yang cukup untuk membangun objek User (tanpa hash password)
+USER_FIELDS = ('username', 'email', 'role')
+
+
+def minimal_user(user_data):
+    return dict({field: user_data.get(field) for field in USER_FIELDS}, _id=str(user_data['_id']))
+
+
+class UserCache:
+    """Cache LRU + TTL untuk data pengguna yang dimuat oleh Flask-Login di setiap request.
+
+    Dengan `version` (CollectionVersion bersama yang dinaikkan saat pengguna dihapus atau perannya
+    berubah), entri yang diisi sebelum versi naik dianggap miss, jadi worker lain ikut memuat ulang
+    paling lambat setelah TTL cache versi, bukan setelah TTL entri.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60, version=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = version
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.session_hits = 0
+
+    def get(self, user_id, loader):
+        """Mengembalikan data pengguna dari cache, atau memanggil loader(user_id) saat miss."""
+        now = time.monotonic()
+        version = self.current_version()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry and entry[0] > now and entry[2] == version:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user_data = loader(user_id)
+        if user_data is None:
+            return None
+        user_data = minimal_user(user_data)
+        with self._lock:
+            self._entries[user_id] = (now + self.ttl, user_data, version)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return user_data
+
+    def current_version(self):
+        return self.version.get() if self.version else None
+
+    def record_session_hit(self):
+        with self._lock:
+            self.session_hits += 1
+
+    def invalidate(self, user_id):
+        """Menghapus entri di proses ini dan menaikkan versi bersama agar worker lain ikut memuat ulang."""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        if self.version:
+            self.version.bump()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses + self.session_hits
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'session_hits': self.session_hits,
+                'size': len(self._entries),
+                'hit_rate': (self.hits + self.session_hits) / total if total else 0.0
+            }